@@ -1,10 +1,26 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
-from copy import deepcopy
+import json
+import uuid
 from io import BytesIO
 from datetime import datetime
 
+from models import Divida
+from calculator import CarteiraSimulada, MESES_LIMITE_SEGURANCA, simular_quitacao as simular_quitacao_nucleo
+from cache import CacheSimulacao, chave_simulacao
+from solver import saldo_minimo_para_quitar
+from sensitivity import grade_sensibilidade, EIXO_RENDA, EIXO_DESPESAS, EIXO_TAXA_CARTAO
+from ledger import gerar_tabela, exportar_excel, Aba, FORMATO_REAL, FORMATO_PERCENTUAL
+from profiler import PERFIL
+from visualizer import figura_evolucao, figura_por_divida
+from comparison import comparar_estrategias
+from optimizer import otimizar_alocacao, MAX_DIVIDAS_BUSCA_EXATA
+from strategies import estrategias_registradas, obter_estrategia
+from jobs import FilaJobs, PENDENTE, CONCLUIDO, CANCELADO, ERRO
+from storage import ArmazemSQLite
+
 # ==================== CONFIGURAÇÃO ====================
 st.set_page_config(
     page_title="Simulador de Liberdade Financeira",
@@ -42,7 +58,30 @@ st.markdown("""
 st.markdown('<h1 class="main-header">💰 Simulador de Liberdade Financeira</h1>', unsafe_allow_html=True)
 st.markdown('<p class="subtitle">🎯 Configure suas dívidas e receitas abaixo e descubra quando estará livre!</p>', unsafe_allow_html=True)
 
+# ==================== PERSISTÊNCIA (SQLite local) ====================
+@st.cache_resource
+def armazem():
+    """Banco local compartilhado pelas sessões: perfis e resultados de simulação"""
+    return ArmazemSQLite()
+
+def retrato_perfil():
+    """Estado atual do perfil, para saber se mudou desde a última gravação"""
+    return json.dumps([st.session_state.dividas, st.session_state.receitas, st.session_state.despesas_fixas],
+                      sort_keys=True)
+
+# O perfil fica na URL (?perfil=...): recarregar a página traz os dados de volta
+if 'perfil' not in st.query_params:
+    st.query_params['perfil'] = uuid.uuid4().hex
+perfil_id = st.query_params['perfil']
+
 # ==================== SESSION STATE (Dados Persistentes) ====================
+# Sessão nova: começar do perfil gravado, se existir
+if 'perfil_salvo' not in st.session_state:
+    perfil = armazem().carregar_perfil(perfil_id)
+    if perfil is not None:
+        for campo, valor in perfil.items():
+            st.session_state.setdefault(campo, valor)
+
 if 'dividas' not in st.session_state:
     st.session_state.dividas = []
 
@@ -52,62 +91,447 @@ if 'receitas' not in st.session_state:
 if 'despesas_fixas' not in st.session_state:
     st.session_state.despesas_fixas = 0.0
 
+if 'perfil_salvo' not in st.session_state:
+    st.session_state.perfil_salvo = retrato_perfil()
+
+# Jobs desta sessão (vaga -> (chave das entradas, id do job)); as vagas não usadas nesta execução são canceladas no fim
+if 'jobs' not in st.session_state:
+    st.session_state.jobs = {}
+st.session_state.jobs_usados = set()
+
+# Medição por fase, ligada no painel de debug (oculto: abra com ?debug=1)
+if 'debug_perfil' in st.session_state:
+    PERFIL.ativo = st.session_state.debug_perfil
+
 # ==================== FUNÇÕES AUXILIARES ====================
 def calcular_saldo_livre():
     total_receitas = sum(r['valor'] for r in st.session_state.receitas)
     return total_receitas - st.session_state.despesas_fixas
 
-def simular_quitacao(saldo_mensal, estrategia='avalanche'):
-    """Simula mês a mês até quitar todas as dívidas"""
-    dividas_copia = deepcopy(st.session_state.dividas)
-    meses = 0
-    historico = []
-    juros_acumulados = 0
+def dividas_para_modelo():
+    """Converte as dívidas da sessão para objetos `Divida` usados pelos motores"""
+    return [
+        Divida(nome=d['nome'], saldo_devedor=d['saldo'],
+               taxa_juros_mensal=d['taxa_juros'], parcela_mensal=d['parcela_minima'])
+        for d in st.session_state.dividas
+    ]
+
+def simular_quitacao(saldo_mensal, estrategia='avalanche', dividas=None, progresso=None):
+    """
+    Simula mês a mês até quitar todas as dívidas (núcleo compartilhado com o main.py).
+    Sem teto de 10 anos: carteiras impagáveis param no mês em que isso fica provado (`mes_inviavel`).
+    `dividas` (padrão: as da sessão) e `progresso` permitem rodar fora do script, num job.
+    """
+    dividas = st.session_state.dividas if dividas is None else dividas
+    # Juros COMPOSTOS sobre o saldo após a parcela, antes da amortização extra (realidade bancária)
+    resultado = simular_quitacao_nucleo(saldo_mensal, CarteiraSimulada.de_dicts(dividas),
+                                        estrategia, juros_antes_do_extra=True, progresso=progresso)
+    historico = pd.DataFrame({'mes': range(resultado.meses), 'saldo': resultado.historico[:-1]})
+    return resultado.meses, historico, resultado.juros_totais, resultado.mes_inviavel
+
+@st.cache_resource
+def cache_simulacoes():
+    """Cache de resultados compartilhado por todas as sessões do servidor"""
+    return CacheSimulacao(max_bytes=64 * 1024 * 1024, disco=armazem())
+
+# ==================== JOBS (simulações pesadas fora do script) ====================
+MAX_JOBS_SIMULTANEOS = 2  # Por servidor: os demais esperam na fila
+
+@st.cache_resource
+def fila_jobs():
+    """Fila de jobs compartilhada por todas as sessões do servidor"""
+    return FilaJobs(max_simultaneos=MAX_JOBS_SIMULTANEOS)
+
+def job_da_sessao(vaga, chave, funcao, *args, novo=False):
+    """
+    Job desta sessão na `vaga` (ex: 'simulacao'). Com a mesma `chave` de entradas,
+    reaproveita o job que já existe (rodando ou terminado); chave diferente quer dizer
+    que o usuário mudou as entradas: o job antigo é cancelado e um novo é enviado.
+    `novo=True` reenvia mesmo com a mesma chave (ex: depois de cancelar).
+    """
+    st.session_state.jobs_usados.add(vaga)
+    anterior = st.session_state.jobs.get(vaga)
+    if anterior is not None:
+        job = fila_jobs().obter(anterior[1])
+        if anterior[0] == chave and job is not None and not novo:
+            return job
+        fila_jobs().cancelar(anterior[1])
+    job = fila_jobs().enviar(funcao, *args, descricao=vaga)
+    st.session_state.jobs[vaga] = (chave, job.id)
+    return job
+
+def simular_quitacao_job(job, cache, chave, saldo_mensal, estrategia, dividas):
+    """Roda no pool: publica o histórico parcial (progresso = fração da dívida já paga) e guarda no cache"""
+    saldo_inicial = sum(d['saldo'] for d in dividas) or 1.0
+    
+    def progresso(meses, historico):
+        job.reportar(1 - historico[-1] / saldo_inicial, list(historico))
+    return cache.obter_ou_calcular(chave, lambda: simular_quitacao(saldo_mensal, estrategia, dividas, progresso))
+
+def job_simulacao(saldo_mensal, estrategia, novo=False):
+    """Simulação com a sobra atual: um job por sessão, compartilhado pelo botão e pela meta"""
+    chave = chave_simulacao(dividas_para_modelo(), saldo_mensal, estrategia, horizonte=None)
+    return job_da_sessao('simulacao', chave, simular_quitacao_job, cache_simulacoes(), chave, saldo_mensal,
+                         estrategia, [dict(d) for d in st.session_state.dividas], novo=novo)
+
+@st.fragment(run_every=0.5)
+def acompanhar_job(job_id, rotulo, mostrar_parcial=None):
+    """Progresso e resultado parcial do job, atualizados sozinhos; quando termina, reroda o app"""
+    job = fila_jobs().obter(job_id)
+    if job is None or job.terminado or job.cancelado:
+        st.rerun()
+    if job.estado == PENDENTE:
+        st.progress(0.0, text=f"{rotulo}: na fila ({fila_jobs().posicao_na_fila(job) + 1}º)")
+    else:
+        st.progress(job.progresso, text=f"{rotulo}: {job.progresso:.0%}")
+    if mostrar_parcial is not None and job.parcial is not None:
+        mostrar_parcial(job.parcial)
+    if st.button("✖️ Cancelar", key=f"cancelar_{job_id}"):
+        job.cancelar()
+        st.rerun()
+
+def razao_por_divida(dividas, meses, saldo_livre, estrategia_key):
+    """Razão mês a mês por dívida (a parte cara do relatório)"""
+    with PERFIL.medir('exportacao_excel/razao'):
+        return gerar_tabela([
+            Divida(nome=d['nome'], saldo_devedor=d['saldo'],
+                   taxa_juros_mensal=d['taxa_juros'], parcela_mensal=d['parcela_minima'])
+            for d in dividas
+        ], saldo_livre, estrategia_key, max_meses=max(meses, 1), juros_antes_do_extra=True)
+
+def montar_relatorio_excel(dividas, tabela, meses, df_hist, juros_total, saldo_livre, estrategia):
+    """Monta a planilha do relatório (bytes) com a data do download"""
+    # Planilha com números de verdade (formatados no Excel) e o razão por dívida
+    resumo = Aba('Resumo', ['Métrica', 'Valor'], [
+        ('Prazo Total (meses)', meses),
+        ('Juros Pagos (R$)', juros_total),
+        ('Estratégia', estrategia),
+        ('Saldo Mensal (R$)', saldo_livre),
+        ('Data Simulação', datetime.now().strftime('%d/%m/%Y %H:%M'))
+    ], [None, FORMATO_REAL])
+    evolucao = Aba('Evolução Mensal', ['Mês', 'Saldo Devedor (R$)'],
+                   zip(df_hist['mes'].tolist(), df_hist['saldo'].tolist()) if not df_hist.empty else [],
+                   [None, FORMATO_REAL])
+    dividas_aba = Aba('Dívidas', ['Nome', 'Tipo', 'Saldo Inicial (R$)', 'Taxa Juros a.m.', 'Parcela Mínima (R$)'], [
+        (d['nome'], d['tipo'], d['saldo'], d['taxa_juros'], d['parcela_minima'])
+        for d in dividas
+    ], [None, None, FORMATO_REAL, FORMATO_PERCENTUAL, FORMATO_REAL])
+    
+    # Criar Excel em memória (modo write-only: linhas gravadas em sequência)
+    output = BytesIO()
+    with PERFIL.medir('exportacao_excel/planilha'):
+        exportar_excel(tabela, output, [resumo, evolucao, dividas_aba])
+    return output.getvalue()
+
+def razao_em_cache(dividas, meses, saldo_livre, estrategia_key):
+    """Razão por dívida pelo cache compartilhado (relatório e gráfico por dívida usam o mesmo)"""
+    # Nomes não entram na chave da simulação, mas estão no razão
+    chave = "razao:" + chave_simulacao(dividas_para_modelo(), saldo_livre, estrategia_key, horizonte=meses) \
+        + ":" + "|".join(d['nome'] for d in dividas)
+    return cache_simulacoes().obter_ou_calcular(
+        chave, lambda: razao_por_divida(dividas, meses, saldo_livre, estrategia_key))
+
+def relatorio_excel_sob_demanda(meses, df_hist, juros_total, saldo_livre, estrategia, estrategia_key):
+    """
+    Devolve uma função sem argumentos para o download_button: o relatório só é
+    montado no clique. O razão por dívida fica no cache compartilhado (rerodar o script
+    ou baixar de novo não refaz a simulação); a planilha é montada a cada download,
+    para a data sair certa.
+    """
+    dividas = [dict(d) for d in st.session_state.dividas]  # Só valores simples: cópia rasa basta
     
-    while True:
-        # Calcular saldo total
-        saldo_total = sum(d['saldo'] for d in dividas_copia if d['saldo'] > 0)
+    def gerar():
+        tabela = razao_em_cache(dividas, meses, saldo_livre, estrategia_key)
+        return montar_relatorio_excel(dividas, tabela, meses, df_hist, juros_total, saldo_livre, estrategia)
+    return gerar
+
+EXPLICACAO_ESTRATEGIA = {
+    'avalanche': 'Você está pagando primeiro as dívidas com MAIORES JUROS. Isso economiza dinheiro no longo prazo.',
+    'snowball': 'Você está pagando primeiro as MENORES DÍVIDAS. Isso gera motivação rápida (menos boletos).'
+}
+
+def mostrar_resultado(meses, df_hist, juros_total, mes_inviavel, saldo_livre, estrategia, estrategia_key):
+    """Resultado da simulação: prazo, métricas, gráfico, explicações e exportação"""
+    if mes_inviavel is not None:
+        quando = "desde já" if mes_inviavel == 0 else f"a partir do mês {mes_inviavel}"
+        st.error(f"⚠️ Com o saldo atual, as dívidas nunca serão quitadas: {quando} os juros crescem "
+                 "mais rápido do que você consegue pagar. Considere aumentar renda ou renegociar dívidas.")
+    elif meses >= MESES_LIMITE_SEGURANCA:
+        st.error("⚠️ Com o saldo atual, levaria mais de 100 anos. Considere aumentar renda ou renegociar dívidas.")
+    else:
+        st.success(f"🎉 **Você estará LIVRE em {meses} meses** ({meses//12} anos e {meses%12} meses)!")
         
-        if saldo_total <= 1 or meses >= 120:
-            break
+        # Métricas
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("⏱️ Prazo", f"{meses} meses")
+        with col2:
+            st.metric("💸 Juros Totais", f"R$ {juros_total:,.2f}")
+        with col3:
+            economia_vs_minimo = total_dividas * 0.10 * meses - juros_total if meses > 0 else 0
+            st.metric("💰 Economia", f"R$ {max(0, economia_vs_minimo):,.2f}")
         
-        historico.append({'mes': meses, 'saldo': saldo_total})
+        # Gráfico (horizontes longos: pontos reduzidos por LTTB)
+        if not df_hist.empty:
+            st.plotly_chart(figura_evolucao(df_hist['mes'], df_hist['saldo']), width='stretch')
         
-        # Pagar parcelas mínimas
-        saldo_disponivel = saldo_mensal
-        for div in dividas_copia:
-            if div['saldo'] > 0:
-                pagamento = min(div['parcela_minima'], div['saldo'])
-                div['saldo'] -= pagamento
-                saldo_disponivel -= pagamento
+        # Saldo por dívida só quando pedido (simula o razão, o mesmo do relatório)
+        if st.toggle("📊 Ver saldo por dívida", key="grafico_por_divida"):
+            tabela = razao_em_cache(st.session_state.dividas, meses, saldo_livre, estrategia_key)
+            saldos = np.vstack([tabela.saldo_inicial, tabela.saldo_final[-1:]])
+            st.plotly_chart(figura_por_divida(np.arange(len(saldos)), saldos, tabela.nomes), width='stretch')
         
-        # Aplicar juros COMPOSTOS (realidade bancária)
-        for div in dividas_copia:
-            if div['saldo'] > 0 and div['taxa_juros'] > 0:
-                # Juros compostos mensais
-                juros = div['saldo'] * ((1 + div['taxa_juros']) - 1)
-                div['saldo'] += juros
-                juros_acumulados += juros
+        # Explicação Didática
+        st.markdown("---")
+        st.subheader("📖 Como Interpretar Estes Resultados")
         
-        # Amortizar extra (estratégia)
-        if saldo_disponivel > 0:
-            if estrategia == 'avalanche':
-                dividas_ordenadas = sorted([d for d in dividas_copia if d['saldo'] > 0], 
-                                          key=lambda x: x['taxa_juros'], reverse=True)
-            else:  # snowball
-                dividas_ordenadas = sorted([d for d in dividas_copia if d['saldo'] > 0], 
-                                          key=lambda x: x['saldo'])
+        with st.expander("🎯 O que significam esses números?", expanded=True):
+            st.markdown(f"""
+            **Prazo ({meses} meses):**  
+            É o tempo que você levará para quitar TODAS as dívidas se manter o saldo mensal de R$ {saldo_livre:,.2f} focado nisso.
+            
+            **Juros Totais (R$ {juros_total:,.2f}):**  
+            É quanto você pagará de juros ao longo do processo. Quanto menor, melhor!
             
-            for div in dividas_ordenadas:
-                if saldo_disponivel <= 0:
-                    break
-                amortizacao = min(saldo_disponivel, div['saldo'])
-                div['saldo'] -= amortizacao
-                saldo_disponivel -= amortizacao
+            **Estratégia {estrategia}:**  
+            {EXPLICACAO_ESTRATEGIA.get(estrategia_key, f'Você está seguindo a regra: {obter_estrategia(estrategia_key).descricao}.')}
+            """)
         
-        meses += 1
+        with st.expander("💡 Dicas para Acelerar"):
+            st.markdown("""
+            1. **Aumente a Renda:** Qualquer extra (freela, app, hora-extra) reduz drasticamente o prazo
+            2. **Reduza Despesas:** Cortar R$ 100/mês pode economizar meses de dívida
+            3. **Negocie Juros:** Ligue para o banco e peça redução de juros do rotativo
+            4. **Evite Novas Dívidas:** Use apenas se realmente necessário
+            """)
+        
+        # Botão Download Excel
+        st.markdown("---")
+        st.subheader("📥 Exportar Relatório")
+        
+        st.download_button(
+            label="📥 Baixar Relatório Excel",
+            data=relatorio_excel_sob_demanda(meses, df_hist, juros_total, saldo_livre, estrategia, estrategia_key),
+            on_click='ignore',  # Baixar não roda o script de novo
+            file_name=f"simulacao_financeira_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            width='stretch'
+        )
+
+HORIZONTE_SENSIBILIDADE = 420  # Mesmo teto da meta de quitação
+
+def grade_sensibilidade_job(job, cache, chave, *args):
+    """Roda no pool: a grade sai em faixas de linhas, cada faixa publicada como parcial"""
+    return cache.obter_ou_calcular(
+        chave, lambda: grade_sensibilidade(*args, juros_antes_do_extra=True, progresso=job.reportar))
+
+def job_sensibilidade(eixo_y, resolucao, estrategia, novo=False):
+    """
+    Grade renda (±30%) x despesas (±30%) ou juros do cartão (5–15% a.m.), simulada
+    em lote num job; o resultado fica no cache compartilhado
+    """
+    dividas = dividas_para_modelo()
+    cartoes = [d['tipo'] == 'Cartão Crédito' for d in st.session_state.dividas]
+    renda = sum(r['valor'] for r in st.session_state.receitas)
+    despesas = st.session_state.despesas_fixas
+    valores_x = np.linspace(0.7, 1.3, resolucao) * renda
+    if eixo_y == EIXO_DESPESAS:
+        valores_y = np.linspace(0.7, 1.3, resolucao) * despesas
+    else:
+        valores_y = np.linspace(0.05, 0.15, resolucao)
+    chave = "sensibilidade:" + chave_simulacao(dividas, renda - despesas, estrategia, HORIZONTE_SENSIBILIDADE) \
+        + f":{renda:.2f}:{eixo_y}:{resolucao}:" + "".join('1' if c else '0' for c in cartoes)
+    return job_da_sessao('sensibilidade', chave, grade_sensibilidade_job, cache_simulacoes(), chave,
+                         dividas, renda, despesas, EIXO_RENDA, valores_x, eixo_y, valores_y, cartoes,
+                         estrategia, HORIZONTE_SENSIBILIDADE, novo=novo)
+
+def mostrar_grade_sensibilidade(grade, eixo_y, metrica, taxas_cartao):
+    """Desenha a grade (completa ou parcial) como mapa de calor"""
+    renda = sum(r['valor'] for r in st.session_state.receitas)
+    if eixo_y == EIXO_DESPESAS:
+        valores_y, y_atual = grade['eixo_y'], st.session_state.despesas_fixas
+        titulo_y, formato_y = "Despesas Fixas (R$)", "Despesas: R$ %{y:,.0f}"
+    else:
+        valores_y, y_atual = grade['eixo_y'] * 100, np.mean(taxas_cartao) * 100
+        titulo_y, formato_y = "Juros do Cartão (% a.m.)", "Juros do cartão: %{y:.1f}% a.m."
+    if metrica == "Mês de quitação":
+        z, titulo_z, formato_z = grade['meses'], "Meses", "Quitação: %{z:.0f} meses"
+    else:
+        z, titulo_z, formato_z = grade['juros'], "Juros (R$)", "Juros: R$ %{z:,.2f}"
+    
+    fig = go.Figure(go.Heatmap(
+        x=grade['eixo_x'], y=valores_y, z=z,
+        colorscale='RdYlGn_r', colorbar=dict(title=titulo_z),
+        hovertemplate=f"Renda: R$ %{{x:,.0f}}<br>{formato_y}<br>{formato_z}<extra></extra>"
+    ))
+    fig.add_trace(go.Scatter(
+        x=[renda], y=[y_atual], mode='markers', name='Hoje',
+        marker=dict(symbol='x', size=14, color='black'),
+        hovertemplate="Situação atual<extra></extra>"
+    ))
+    fig.update_layout(
+        xaxis_title="Renda Total (R$)",
+        yaxis_title=titulo_y,
+        template='plotly_white',
+        height=450,
+        showlegend=False
+    )
+    st.plotly_chart(fig, width='stretch')
+    return z
+
+@st.fragment
+def painel_sensibilidade(estrategia_key):
+    """Mapa de calor da sensibilidade. Mexer nos controles reroda só este painel"""
+    col_eixo, col_metrica, col_resolucao = st.columns(3)
+    with col_eixo:
+        eixo = st.selectbox("Eixo vertical", ["Despesas fixas (±30%)", "Juros do cartão (5–15% a.m.)"])
+    with col_metrica:
+        metrica = st.selectbox("Mostrar", ["Mês de quitação", "Juros totais"])
+    with col_resolucao:
+        resolucao = st.select_slider("Resolução da grade", [25, 50, 100], value=25,
+                                     help="25 = 25x25 cenários; 100 = 100x100, simulados juntos em lote (mais lento)")
+    eixo_y = EIXO_DESPESAS if eixo.startswith("Despesas") else EIXO_TAXA_CARTAO
+    
+    taxas_cartao = [d['taxa_juros'] for d in st.session_state.dividas if d['tipo'] == 'Cartão Crédito']
+    if eixo_y == EIXO_DESPESAS and st.session_state.despesas_fixas <= 0:
+        st.info("💡 Cadastre as despesas fixas para variar esse eixo.")
+        return
+    if eixo_y == EIXO_TAXA_CARTAO and not taxas_cartao:
+        st.info("💡 Nenhum cartão de crédito cadastrado: os juros do cartão não mudam o resultado.")
+        return
+    # A grade são centenas de simulações: só roda quando pedida
+    if not st.toggle("🌡️ Calcular mapa de sensibilidade", key="sensibilidade_ligada",
+                     help="Enquanto ligado, a grade é recalculada quando os controles ou as dívidas mudam"):
+        return
     
-    return meses, pd.DataFrame(historico), juros_acumulados
+    with PERFIL.medir('sensibilidade/grade'):
+        job = job_sensibilidade(eixo_y, resolucao, estrategia_key)
+        job.aguardar(0.3)  # Grades comuns terminam aqui, sem barra de progresso
+    
+    if job.estado == ERRO:
+        st.error(f"❌ Erro ao calcular a grade: {job.erro}")
+        return
+    if job.cancelado:
+        st.warning("Cálculo da grade cancelado.")
+        if st.button("🔄 Recalcular", key="recalcular_grade"):
+            job_sensibilidade(eixo_y, resolucao, estrategia_key, novo=True)
+            st.rerun(scope="fragment")
+        return
+    if not job.terminado:
+        acompanhar_job(job.id, "Calculando a grade",
+                       lambda parcial: mostrar_grade_sensibilidade(parcial, eixo_y, metrica, taxas_cartao))
+        return
+    
+    z = mostrar_grade_sensibilidade(job.resultado, eixo_y, metrica, taxas_cartao)
+    impagaveis = int(np.isnan(z).sum())
+    if impagaveis:
+        st.caption(f"Células em branco ({impagaveis} de {z.size}): não quitam em {HORIZONTE_SENSIBILIDADE} meses.")
+    if eixo_y == EIXO_TAXA_CARTAO:
+        st.caption("O X marca a média dos juros dos seus cartões; todos os cartões recebem a taxa do eixo vertical.")
+
+def painel_comparacao(saldo_livre, estrategia_key):
+    """Todas as estratégias registradas lado a lado, simuladas juntas numa passada do motor em lote"""
+    dividas = dividas_para_modelo()
+    # Estratégias registradas (plugins incluídos) e nomes das dívidas entram na chave
+    nomes_estrategias = ",".join(sorted(e.nome for e in estrategias_registradas()))
+    chave = "comparacao:" + chave_simulacao(dividas, saldo_livre, nomes_estrategias, horizonte=None) \
+        + ":" + "|".join(d.nome for d in dividas)
+    with PERFIL.medir('comparacao/estrategias'):
+        comparacao = cache_simulacoes().obter_ou_calcular(chave, lambda: comparar_estrategias(dividas, saldo_livre))
+    
+    quitam = [c for c in comparacao if c['quitado']]
+    if not quitam:
+        st.error("❌ Nenhuma estratégia quita as dívidas com a sobra atual.")
+        return
+    menor_juros = min(c['juros_totais'] for c in quitam)
+    
+    # 1. Mês de quitação e juros, lado a lado
+    for coluna, c in zip(st.columns(len(comparacao)), comparacao):
+        with coluna:
+            st.markdown(f"**{c['rotulo']}**" + (" · _selecionada_" if c['nome'] == estrategia_key else ""))
+            if not c['quitado']:
+                st.metric("Quitação", "Nunca" if c['inviavel'] else f"+{c['meses']} meses")
+                continue
+            st.metric("Quitação", f"{c['meses']} meses")
+            diferenca = c['juros_totais'] - menor_juros
+            st.metric("Juros Totais", f"R$ {c['juros_totais']:,.2f}",
+                      delta=f"+R$ {diferenca:,.2f}" if diferenca >= 0.01 else "menor custo",
+                      delta_color="inverse" if diferenca >= 0.01 else "off")
+    
+    # 2. Ordem de quitação: uma coluna por estratégia
+    linhas = max(len(c['ordem_quitacao']) for c in comparacao)
+    st.dataframe(pd.DataFrame({
+        c['rotulo']: [f"{nome} (mês {mes})" if mes is not None else f"{nome} (não quita)"
+                      for nome, mes in c['ordem_quitacao']] + [""] * (linhas - len(c['ordem_quitacao']))
+        for c in comparacao
+    }, index=pd.RangeIndex(1, linhas + 1, name="Ordem")), width='stretch')
+
+OBJETIVOS_OTIMIZACAO = {"Menos juros": 'juros', "Quitar mais cedo": 'meses'}
+
+def otimizacao_job(job, cache, chave, saldo_mensal, dividas, objetivo):
+    """Roda no pool: branch-and-bound das alocações do extra, guardado no cache"""
+    return cache.obter_ou_calcular(chave, lambda: otimizar_alocacao(saldo_mensal, 0.0, dividas, objetivo,
+                                                                    juros_antes_do_extra=True))
+
+@st.fragment
+def painel_otimizacao(saldo_livre):
+    """Melhor alocação do extra além das estratégias prontas (ordens, híbridos e divisões)"""
+    # A busca pode levar segundos: só roda quando pedida
+    if not st.toggle("🧭 Procurar a melhor alocação do extra", key="otimizacao_ligada",
+                     help="Testa ordens de prioridade, híbridos (bola de neve e depois avalanche) "
+                          "e divisões do extra entre duas dívidas"):
+        return
+    objetivo = OBJETIVOS_OTIMIZACAO[st.radio("Objetivo", list(OBJETIVOS_OTIMIZACAO), horizontal=True)]
+    dividas = dividas_para_modelo()
+    chave = f"otimizacao:{objetivo}:" + chave_simulacao(dividas, saldo_livre, "otimizacao", horizonte=None) \
+        + ":" + "|".join(d.nome for d in dividas)
+    with PERFIL.medir('otimizacao/busca'):
+        job = job_da_sessao('otimizacao', chave, otimizacao_job, cache_simulacoes(), chave, saldo_livre,
+                            dividas, objetivo)
+        job.aguardar(0.3)
+    
+    if job.estado == ERRO:
+        st.error(f"❌ Erro na busca: {job.erro}")
+        return
+    if job.cancelado:
+        st.warning("Busca cancelada.")
+        if st.button("🔄 Procurar de novo", key="recalcular_otimizacao"):
+            job_da_sessao('otimizacao', chave, otimizacao_job, cache_simulacoes(), chave, saldo_livre,
+                          dividas, objetivo, novo=True)
+            st.rerun(scope="fragment")
+        return
+    if not job.terminado:
+        acompanhar_job(job.id, "Procurando a melhor alocação")
+        return
+    
+    r = job.resultado
+    if not r['quitado']:
+        st.error("❌ Nenhuma alocação do extra quita as dívidas com a sobra atual.")
+        return
+    avalanche = r['avalanche']
+    col_politica, col_meses, col_juros = st.columns([2, 1, 1])
+    with col_politica:
+        st.markdown(f"**{'Melhor alocação' if r['busca_completa'] else 'Melhor alocação encontrada'}**")
+        st.markdown(r['descricao'])
+    with col_meses:
+        diferenca = r['meses'] - avalanche['meses'] if avalanche['quitado'] else 0
+        st.metric("Quitação", f"{r['meses']} meses",
+                  delta=f"{diferenca:+d} vs. avalanche" if diferenca else None, delta_color="inverse")
+    with col_juros:
+        diferenca = r['juros_totais'] - avalanche['juros_totais'] if avalanche['quitado'] else 0.0
+        st.metric("Juros Totais", f"R$ {r['juros_totais']:,.2f}",
+                  delta=f"R$ {diferenca:+,.2f} vs. avalanche" if abs(diferenca) >= 0.01 else None,
+                  delta_color="inverse")
+    if r['busca_completa']:
+        st.caption(f"Busca completa ({r['nos_avaliados']:,} ordens parciais avaliadas): nenhuma ordem de "
+                   "prioridade, híbrido ou divisão do extra faz melhor.")
+    elif len(dividas) > MAX_DIVIDAS_BUSCA_EXATA:
+        st.warning(f"⚠️ Com mais de {MAX_DIVIDAS_BUSCA_EXATA} dívidas a busca exata pelas ordens de prioridade "
+                   "não roda (são ordens demais): este é o melhor entre estratégias, híbridos e divisões, "
+                   "sem garantia de ser o ótimo.")
+    else:
+        st.warning(f"⚠️ Busca interrompida no limite de {r['nos_avaliados']:,} ordens parciais: esta é a melhor "
+                   "alocação encontrada, sem garantia de ser a ótima.")
 
 # ==================== SIDEBAR: GERENCIAMENTO ====================
 with st.sidebar:
@@ -263,126 +687,135 @@ else:
     col1, col2 = st.columns([3, 1])
     
     with col2:
-        estrategia = st.selectbox(
+        estrategias = {e.nome: e for e in estrategias_registradas()}  # Plugins incluídos
+        estrategia_key = st.selectbox(
             "Estratégia",
-            ["Avalanche 🔥", "Bola de Neve ❄️"],
-            help="**Avalanche**: Paga dívidas com maiores juros primeiro (economiza mais)\n\n**Bola de Neve**: Paga dívidas menores primeiro (motivação psicológica)"
+            list(estrategias),
+            format_func=lambda nome: estrategias[nome].rotulo,
+            help="\n\n".join(f"**{e.rotulo}**: {e.descricao}" for e in estrategias.values())
         )
-        estrategia_key = 'avalanche' if 'Avalanche' in estrategia else 'snowball'
+        estrategia = estrategias[estrategia_key].rotulo
     
     with col1:
+        chave_sim = chave_simulacao(dividas_para_modelo(), saldo_livre, estrategia_key, horizonte=None)
         if st.button("🚀 RODAR SIMULAÇÃO", type="primary", width='stretch'):
-            with st.spinner("Calculando..."):
-                meses, df_hist, juros_total = simular_quitacao(saldo_livre, estrategia_key)
-                
-                if meses >= 120:
-                    st.error("⚠️ Com o saldo atual, levaria mais de 10 anos. Considere aumentar renda ou renegociar dívidas.")
-                else:
-                    st.success(f"🎉 **Você estará LIVRE em {meses} meses** ({meses//12} anos e {meses%12} meses)!")
-                    
-                    # Métricas
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("⏱️ Prazo", f"{meses} meses")
-                    with col2:
-                        st.metric("💸 Juros Totais", f"R$ {juros_total:,.2f}")
-                    with col3:
-                        economia_vs_minimo = total_dividas * 0.10 * meses - juros_total if meses > 0 else 0
-                        st.metric("💰 Economia", f"R$ {max(0, economia_vs_minimo):,.2f}")
-                    
-                    # Gráfico
-                    if not df_hist.empty:
-                        fig = go.Figure()
-                        fig.add_trace(go.Scatter(
-                            x=df_hist['mes'],
-                            y=df_hist['saldo'],
-                            mode='lines+markers',
-                            fill='tozeroy',
-                            line=dict(width=3, color='#667eea')
-                        ))
-                        fig.update_layout(
-                            title="📈 Sua Jornada para R$ 0,00",
-                            xaxis_title="Meses",
-                            yaxis_title="Dívida Total (R$)",
-                            template='plotly_white',
-                            height=400
-                        )
-                        st.plotly_chart(fig, width='stretch')
-                    
-                    # Explicação Didática
-                    st.markdown("---")
-                    st.subheader("📖 Como Interpretar Estes Resultados")
-                    
-                    with st.expander("🎯 O que significam esses números?", expanded=True):
-                        st.markdown(f"""
-                        **Prazo ({meses} meses):**  
-                        É o tempo que você levará para quitar TODAS as dívidas se manter o saldo mensal de R$ {saldo_livre:,.2f} focado nisso.
-                        
-                        **Juros Totais (R$ {juros_total:,.2f}):**  
-                        É quanto você pagará de juros ao longo do processo. Quanto menor, melhor!
-                        
-                        **Estratégia {estrategia}:**  
-                        {'Você está pagando primeiro as dívidas com MAIORES JUROS. Isso economiza dinheiro no longo prazo.' if estrategia_key == 'avalanche' else 'Você está pagando primeiro as MENORES DÍVIDAS. Isso gera motivação rápida (menos boletos).'}
-                        """)
-                    
-                    with st.expander("💡 Dicas para Acelerar"):
-                        st.markdown("""
-                        1. **Aumente a Renda:** Qualquer extra (freela, app, hora-extra) reduz drasticamente o prazo
-                        2. **Reduza Despesas:** Cortar R$ 100/mês pode economizar meses de dívida
-                        3. **Negocie Juros:** Ligue para o banco e peça redução de juros do rotativo
-                        4. **Evite Novas Dívidas:** Use apenas se realmente necessário
-                        """)
-                    
-                    # Botão Download Excel
-                    st.markdown("---")
-                    st.subheader("📥 Exportar Relatório")
-                    
-                    # Preparar dados para Excel
-                    df_export = df_hist.copy()
-                    df_export.columns = ['Mês', 'Saldo Devedor (R$)']
-                    
-                    # Adicionar sumário
-                    sumario_data = {
-                        'Métrica': ['Prazo Total', 'Juros Pagos', 'Estratégia', 'Saldo Mensal', 'Data Simulação'],
-                        'Valor': [
-                            f'{meses} meses',
-                            f'R$ {juros_total:,.2f}',
-                            estrategia,
-                            f'R$ {saldo_livre:,.2f}',
-                            datetime.now().strftime('%d/%m/%Y %H:%M')
-                        ]
-                    }
-                    df_sumario = pd.DataFrame(sumario_data)
-                    
-                    # Criar Excel em memória
-                    output = BytesIO()
-                    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                        df_sumario.to_excel(writer, sheet_name='Resumo', index=False)
-                        df_export.to_excel(writer, sheet_name='Evolução Mensal', index=False)
-                        
-                        # Adicionar detalhes das dívidas
-                        df_dividas_export = pd.DataFrame([
-                            {
-                                'Nome': d['nome'],
-                                'Tipo': d['tipo'],
-                                'Saldo Inicial': f"R$ {d['saldo']:,.2f}",
-                                'Taxa Juros a.m.': f"{d['taxa_juros']*100:.2f}%",
-                                'Parcela Mínima': f"R$ {d['parcela_minima']:,.2f}"
-                            }
-                            for d in st.session_state.dividas
-                        ])
-                        df_dividas_export.to_excel(writer, sheet_name='Dívidas', index=False)
-                    
-                    output.seek(0)
-                    
-                    st.download_button(
-                        label="📥 Baixar Relatório Excel",
-                        data=output,
-                        file_name=f"simulacao_financeira_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        width='stretch'
-                    )
+            st.session_state.simulacao_pedida = chave_sim
+            job = job_simulacao(saldo_livre, estrategia_key)
+            if job.estado in (CANCELADO, ERRO):  # Rodar de novo o que foi cancelado ou falhou
+                job_simulacao(saldo_livre, estrategia_key, novo=True)
+        
+        # O resultado fica na tela enquanto as entradas não mudam
+        if st.session_state.get('simulacao_pedida') == chave_sim:
+            job = job_simulacao(saldo_livre, estrategia_key)
+            job.aguardar(0.3)  # Carteiras comuns terminam aqui, sem barra de progresso
+            if job.estado == ERRO:
+                st.error(f"❌ Erro na simulação: {job.erro}")
+            elif job.cancelado:
+                st.warning("Simulação cancelada. Clique em RODAR SIMULAÇÃO para tentar de novo.")
+            elif not job.terminado:
+                acompanhar_job(job.id, "Simulando", lambda historico: st.plotly_chart(
+                    figura_evolucao(range(len(historico)), historico, "📈 Simulando..."), width='stretch'))
+            else:
+                mostrar_resultado(*job.resultado, saldo_livre, estrategia, estrategia_key)
 
+    # Comparação entre estratégias
+    st.markdown("---")
+    st.subheader("⚖️ Comparar Estratégias")
+    painel_comparacao(saldo_livre, estrategia_key)
+    painel_otimizacao(saldo_livre)
+
+    # Meta de Quitação (solver)
+    st.markdown("---")
+    st.subheader("🎯 Meta: Livre em Quantos Meses?")
+    col_meta, col_resultado = st.columns([1, 2])
+    
+    with col_meta:
+        meses_meta = st.number_input("Quero quitar em (meses)", min_value=1, max_value=420, value=24, step=1,
+                                     help="Calcula a menor sobra mensal que quita tudo até esse mês")
+    
+    with col_resultado:
+        # Mesma ordem de juros de simular_quitacao (juros antes da amortização extra)
+        dividas_modelo = dividas_para_modelo()
+        with PERFIL.medir('meta/solver'):
+            saldo_necessario = saldo_minimo_para_quitar(dividas_modelo, meses_meta, estrategia_key,
+                                                        juros_antes_do_extra=True)
+        
+        if saldo_necessario is None:
+            st.error("❌ Meta impossível com as parcelas atuais.")
+        elif saldo_necessario <= saldo_livre:
+            st.success(f"✅ Sua sobra atual já basta! Precisa de R$ {saldo_necessario:,.2f}/mês e você tem R$ {saldo_livre:,.2f}.")
+        else:
+            st.warning(f"📈 Precisa de **R$ {saldo_necessario:,.2f}/mês** livres: "
+                       f"**+R$ {saldo_necessario - saldo_livre:,.2f}** de renda extra (ou menos despesas).")
+        # Quitação com a sobra atual: mesmo job do botão, só depois de ele ser clicado
+        job = job_simulacao(saldo_livre, estrategia_key) if st.session_state.get('simulacao_pedida') == chave_sim else None
+        if job is None:
+            st.caption("Com a sobra atual: clique em RODAR SIMULAÇÃO para comparar.")
+        elif not job.aguardar(0.3):  # Carteiras comuns terminam aqui
+            st.caption("Com a sobra atual: calculando…")
+        elif job.estado == CANCELADO:
+            st.caption("Com a sobra atual: simulação cancelada.")
+        elif job.estado == ERRO:
+            st.caption("Com a sobra atual: erro na simulação.")
+        else:
+            mes_atual, _, _, mes_inviavel = job.resultado
+            if mes_inviavel is not None:
+                st.caption(f"Com a sobra atual: nunca (impagável {'desde já' if mes_inviavel == 0 else f'a partir do mês {mes_inviavel}'}).")
+            elif mes_atual >= MESES_LIMITE_SEGURANCA:
+                st.caption("Com a sobra atual: mais de 100 anos.")
+            else:
+                st.caption(f"Com a sobra atual: quitação em {mes_atual} meses.")
+    
+    # Sensibilidade (mapa de calor)
+    st.markdown("---")
+    st.subheader("🌡️ Sensibilidade: E Se a Renda, as Despesas ou os Juros Mudarem?")
+    painel_sensibilidade(estrategia_key)
+
+
+# Jobs de vagas que sumiram da tela nesta execução (ex: dívidas apagadas) não precisam mais rodar
+for vaga in set(st.session_state.jobs) - st.session_state.jobs_usados:
+    fila_jobs().cancelar(st.session_state.jobs.pop(vaga)[1])
+
+# Perfil alterado nesta execução: gravar tudo numa transação
+if retrato_perfil() != st.session_state.perfil_salvo:
+    armazem().salvar_perfil(perfil_id, st.session_state.dividas, st.session_state.receitas,
+                            st.session_state.despesas_fixas)
+    st.session_state.perfil_salvo = retrato_perfil()
+
+# ==================== DEBUG (oculto: abra com ?debug=1) ====================
+# Fica no fim do script para mostrar as medições da execução atual
+if st.query_params.get("debug") == "1":
+    with st.sidebar:
+        st.markdown("---")
+        with st.expander("🛠️ Debug: Tempos por Fase", expanded=True):
+            st.toggle("Medir fases da simulação", value=PERFIL.ativo, key="debug_perfil",
+                      help="Vale para o processo inteiro (todas as sessões) enquanto ligado")
+            relatorio = PERFIL.relatorio()
+            if relatorio['fases']:
+                st.dataframe(pd.DataFrame([
+                    {'Fase': fase, 'Chamadas': r['chamadas'], 'Total (ms)': r['segundos'] * 1000,
+                     'Média (ms)': r['media_ms']}
+                    for fase, r in relatorio['fases'].items()
+                ]), hide_index=True, width='stretch')
+            else:
+                st.caption("Nada medido ainda: ligue a medição e rode a simulação.")
+            for nome, valor in relatorio['contadores'].items():
+                st.caption(f"{nome}: {valor:,}")
+            
+            stats = cache_simulacoes().estatisticas()
+            st.caption(f"Cache: {stats['hits']} hits / {stats['misses']} misses ({stats['taxa_acerto']:.0%}) | "
+                       f"{stats['entradas']} entradas, {stats['bytes'] / 1024 / 1024:.1f} de "
+                       f"{stats['max_bytes'] / 1024 / 1024:.0f} MB | {stats['hits_disco']} hits no disco")
+            banco = armazem().estatisticas()
+            st.caption(f"Banco: {banco['perfis']} perfis, {banco['resultados']} resultados "
+                       f"({banco['bytes_resultados'] / 1024 / 1024:.1f} MB), arquivo com "
+                       f"{banco['bytes_arquivo'] / 1024 / 1024:.1f} MB")
+            jobs = fila_jobs().estatisticas()
+            st.caption(f"Jobs: {jobs['rodando']} rodando (máx. {jobs['max_simultaneos']}), "
+                       f"{jobs['na_fila']} na fila, {jobs['guardados']} guardados")
+            if st.button("Zerar medições"):
+                PERFIL.zerar()
+                st.rerun()
 
 # Footer
 st.markdown("---")
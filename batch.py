@@ -0,0 +1,255 @@
+from dataclasses import dataclass
+from typing import List, Dict, Sequence, Union
+
+import numpy as np
+
+from models import Divida
+from calculator import MESES_LIMITE_SEGURANCA
+from strategies import EstrategiasPorLinha, ordem_extra
+
+Valor = Union[float, np.ndarray]
+NomeEstrategia = Union[str, Sequence[str]]  # Um nome para o lote todo, ou um por carteira
+
+
+@dataclass
+class CarteiraLote:
+    """
+    Várias carteiras de dívidas guardadas como matrizes (carteiras x dívidas).
+    Carteiras com menos dívidas são completadas com dívidas de saldo zero,
+    que não interferem na simulação.
+    """
+    saldos: np.ndarray
+    taxas: np.ndarray
+    parcelas: np.ndarray
+    prazos: np.ndarray  # -1 quando a dívida não tem prazo fixo
+
+    @classmethod
+    def from_dividas(cls, carteiras: Sequence[Sequence[Divida]]) -> "CarteiraLote":
+        """Monta o lote a partir de listas de `Divida` (uma lista por carteira)."""
+        n_carteiras = len(carteiras)
+        n_dividas = max((len(c) for c in carteiras), default=0)
+        saldos = np.zeros((n_carteiras, n_dividas))
+        taxas = np.zeros((n_carteiras, n_dividas))
+        parcelas = np.zeros((n_carteiras, n_dividas))
+        prazos = np.full((n_carteiras, n_dividas), -1, dtype=np.int64)
+
+        for i, dividas in enumerate(carteiras):
+            for j, div in enumerate(dividas):
+                saldos[i, j] = div.saldo_devedor
+                taxas[i, j] = div.taxa_juros_mensal
+                parcelas[i, j] = div.parcela_mensal
+                if div.prazo_restante_meses is not None:
+                    prazos[i, j] = div.prazo_restante_meses
+
+        return cls(saldos, taxas, parcelas, prazos)
+
+    @property
+    def n_carteiras(self) -> int:
+        return self.saldos.shape[0]
+
+    def copy(self) -> "CarteiraLote":
+        return CarteiraLote(self.saldos.copy(), self.taxas.copy(),
+                            self.parcelas.copy(), self.prazos.copy())
+
+    def to_dividas(self, indice: int, nomes: Sequence[str]) -> List[Divida]:
+        """Converte uma linha do lote de volta para objetos `Divida`."""
+        return [
+            Divida(
+                nome=nome,
+                saldo_devedor=float(self.saldos[indice, j]),
+                taxa_juros_mensal=float(self.taxas[indice, j]),
+                parcela_mensal=float(self.parcelas[indice, j]),
+                prazo_restante_meses=None if self.prazos[indice, j] < 0 else int(self.prazos[indice, j])
+            )
+            for j, nome in enumerate(nomes)
+        ]
+
+
+def simular_mes_arrays(saldo_disponivel: np.ndarray, saldos: np.ndarray, taxas: np.ndarray,
+                       parcelas: np.ndarray, prazos: np.ndarray, estrategia: NomeEstrategia,
+                       juros_antes_do_extra: bool = False) -> Dict:
+    """
+    Núcleo vetorizado de um mês sobre matrizes (carteiras x dívidas), usado
+    pelos motores que montam as próprias matrizes. Altera `saldos` e `prazos` no lugar.
+    Com `juros_antes_do_extra=True` segue a ordem de `app.simular_quitacao`:
+    juros sobre o saldo após a parcela e só depois a amortização extra.
+    """
+    # 1. Pagar parcelas fixas/mínimas obrigatórias
+    pagamento = np.where(saldos > 0, np.minimum(parcelas, saldos), 0.0)
+    saldos -= pagamento
+    pagamento_total_dividas = pagamento.sum(axis=1)
+    saldo_disponivel = saldo_disponivel - pagamento_total_dividas
+
+    if juros_antes_do_extra:
+        juros = np.where(saldos > 0, saldos * taxas, 0.0)
+        saldos += juros
+
+    # 2. Antecipar dívidas com a sobra: cada dívida, na ordem da estratégia,
+    # recebe o que restou depois de quitar as anteriores (cascata)
+    if np.any(saldo_disponivel > 0):
+        ordem = ordem_extra(saldos, taxas, parcelas, estrategia)
+        saldos_ordenados = np.take_along_axis(saldos, ordem, axis=1)
+        acumulado_anterior = np.cumsum(saldos_ordenados, axis=1) - saldos_ordenados
+        extra_ordenado = np.clip(saldo_disponivel[:, None] - acumulado_anterior, 0.0, saldos_ordenados)
+
+        extra = np.empty_like(extra_ordenado)
+        np.put_along_axis(extra, ordem, extra_ordenado, axis=1)
+        saldos -= extra
+        pagamento_total_dividas += extra.sum(axis=1)
+        pagamento += extra
+
+    # 3. Aplicar Juros sobre o saldo restante
+    if juros_antes_do_extra:
+        ativas = saldos > 0
+    else:
+        ativas = saldos > 0.01  # Considerar quitado se for centavos
+        juros = np.where(ativas, saldos * taxas, 0.0)
+        saldos += juros
+        saldos[~ativas] = 0.0
+    prazos[ativas & (prazos > 0)] -= 1
+
+    return {
+        "saldo_devedor_total": saldos.sum(axis=1),
+        "juros_pagos_mes": juros.sum(axis=1),
+        "dividas_ativas": ativas.sum(axis=1),
+        "pagamento_total_dividas": pagamento_total_dividas,
+        "pagamento_por_divida": pagamento,
+        "juros_por_divida": juros
+    }
+
+
+def inviaveis_lote(saldos: np.ndarray, taxas: np.ndarray, parcelas: np.ndarray,
+                   saldo_mensal: np.ndarray) -> np.ndarray:
+    """
+    Versão vetorizada do teste de inviabilidade de `calculator.diagnosticar`: True nas
+    carteiras que com certeza nunca serão quitadas (juros das dívidas com juros superam
+    tudo o que pode ser pago por mês, ou nada é pago).
+    """
+    ativas = saldos > 0
+    capacidade = np.maximum(saldo_mensal, np.where(ativas, parcelas, 0.0).sum(axis=1))
+    com_juros = ativas & (taxas > 0)
+    saldo_com_juros = np.where(com_juros, saldos, 0.0).sum(axis=1)
+    taxa_min = np.where(com_juros, taxas, np.inf).min(axis=1, initial=np.inf)
+    # Folga de 1 centavo por dívida pelo arredondamento dos saldos de centavos
+    folgada = capacidade + 0.01 * ativas.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        juros_vencem = np.isfinite(taxa_min) & (saldo_com_juros > folgada * (1 + taxa_min) / taxa_min)
+    return (capacidade <= 0) | juros_vencem
+
+
+def _saldo_mensal(renda: Valor, despesas: Valor, n_carteiras: int) -> np.ndarray:
+    saldo = np.asarray(renda, dtype=float) - np.asarray(despesas, dtype=float)
+    return np.broadcast_to(saldo, (n_carteiras,)).astype(float)
+
+
+def simular_mes_lote(renda: Valor, despesas: Valor, carteira: CarteiraLote,
+                     estrategia: NomeEstrategia = 'avalanche', juros_antes_do_extra: bool = False) -> Dict:
+    """
+    Simula um mês de pagamentos para todas as carteiras do lote de uma vez.
+    Mesma semântica de `calculator.simular_mes`, aplicada linha a linha.
+    `renda` e `despesas` podem ser escalares ou um valor por carteira.
+    Retorna o resumo do mês com um array por métrica.
+    """
+    saldo_disponivel = _saldo_mensal(renda, despesas, carteira.n_carteiras)
+    return simular_mes_arrays(saldo_disponivel, carteira.saldos, carteira.taxas,
+                              carteira.parcelas, carteira.prazos, estrategia, juros_antes_do_extra)
+
+
+def simular_quitacao_lote(renda: Valor, despesas: Valor, carteira: CarteiraLote,
+                          estrategia: NomeEstrategia = 'avalanche', max_meses: int = MESES_LIMITE_SEGURANCA,
+                          juros_antes_do_extra: bool = False, parar_inviaveis: bool = True,
+                          registrar_historico: bool = False, registrar_quitacao_dividas: bool = False) -> Dict:
+    """
+    Simula mês a mês até cada carteira ficar com saldo total <= R$ 1
+    (mesmo critério de `main.main`) ou atingir `max_meses`.
+    Carteiras já quitadas saem do lote, então o custo cai conforme elas terminam.
+    Com `parar_inviaveis` (padrão), carteiras provadamente impagáveis (`inviaveis_lote`,
+    testado a cada 12 meses) também saem, sem rodar até `max_meses`; os meses delas param
+    ali. Sem teto curto por padrão: financiamentos de 360-420 meses rodam até o fim.
+    Retorna, por carteira, os meses simulados, os juros totais, se quitou e se foi provada inviável.
+    Com `registrar_historico`, inclui a matriz (carteiras x max_meses + 1) da dívida total
+    no começo de cada mês; de `meses[i] + 1` em diante a linha fica zerada.
+    Com `registrar_quitacao_dividas`, inclui a matriz (carteiras x dívidas) do mês em que
+    cada dívida zerou (0 = já começou zerada, -1 = não quitou); as que sobram quando a
+    carteira para em <= R$ 1 contam como quitadas nesse mês.
+    `estrategia` pode ter um nome por carteira: várias estratégias rodam no mesmo lote.
+    """
+    n = carteira.n_carteiras
+    saldo_mensal = _saldo_mensal(renda, despesas, n)
+    por_carteira = not isinstance(estrategia, str)
+    if por_carteira:
+        estrategia = EstrategiasPorLinha.de_nomes(estrategia)
+    meses = np.zeros(n, dtype=np.int64)
+    juros_totais = np.zeros(n)
+    inviavel = np.zeros(n, dtype=bool)
+
+    restantes = np.flatnonzero(carteira.saldos.sum(axis=1) > 1)
+    estrategias = estrategia.linhas(restantes) if por_carteira else estrategia
+    saldos = carteira.saldos[restantes]
+    taxas = carteira.taxas[restantes]
+    parcelas = carteira.parcelas[restantes]
+    prazos = carteira.prazos[restantes]
+    historico = np.zeros((n, max_meses + 1)) if registrar_historico else None
+    if registrar_historico:
+        historico[:, 0] = carteira.saldos.sum(axis=1)
+    quitacao = None
+    if registrar_quitacao_dividas:
+        quitacao = np.where(carteira.saldos > 0, -1, 0)
+        quitacao[carteira.saldos.sum(axis=1) <= 1] = 0
+
+    def tirar(saem: np.ndarray):
+        """Devolve ao lote as carteiras que terminaram e segue só com as demais."""
+        nonlocal restantes, estrategias, saldos, taxas, parcelas, prazos
+        carteira.saldos[restantes[saem]] = saldos[saem]
+        carteira.prazos[restantes[saem]] = prazos[saem]
+        continuam = ~saem
+        restantes = restantes[continuam]
+        if por_carteira:
+            estrategias = estrategias.linhas(continuam)
+        saldos, taxas = saldos[continuam], taxas[continuam]
+        parcelas, prazos = parcelas[continuam], prazos[continuam]
+
+    for mes in range(max_meses):
+        if restantes.size == 0:
+            break
+
+        if parar_inviaveis and mes % 12 == 0:
+            provadas = inviaveis_lote(saldos, taxas, parcelas, saldo_mensal[restantes])
+            if provadas.any():
+                inviavel[restantes[provadas]] = True
+                tirar(provadas)
+                if restantes.size == 0:
+                    break
+
+        resultado = simular_mes_arrays(saldo_mensal[restantes], saldos, taxas,
+                                       parcelas, prazos, estrategias, juros_antes_do_extra)
+        meses[restantes] += 1
+        juros_totais[restantes] += resultado["juros_pagos_mes"]
+        if registrar_historico:
+            historico[restantes, mes + 1] = resultado["saldo_devedor_total"]
+
+        terminadas = ~(resultado["saldo_devedor_total"] > 1)
+        if registrar_quitacao_dividas:
+            linhas = quitacao[restantes]
+            zeradas = (linhas < 0) & ((saldos <= 0) | terminadas[:, None])
+            linhas[zeradas] = mes + 1
+            quitacao[restantes] = linhas
+        if terminadas.any():
+            tirar(terminadas)  # Carteiras quitadas voltam ao lote; o resto segue
+
+    carteira.saldos[restantes] = saldos
+    carteira.prazos[restantes] = prazos
+    saldo_final = carteira.saldos.sum(axis=1)
+
+    resumo = {
+        "meses": meses,
+        "juros_totais": juros_totais,
+        "saldo_final": saldo_final,
+        "quitado": saldo_final <= 1,
+        "inviavel": inviavel
+    }
+    if registrar_historico:
+        resumo["historico"] = historico
+    if registrar_quitacao_dividas:
+        resumo["quitacao_dividas"] = quitacao
+    return resumo
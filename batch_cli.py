@@ -0,0 +1,320 @@
+"""
+Processamento em lote de carteiras, sem interface gráfica.
+
+Uso:
+    python batch_cli.py carteiras.jsonl resultados.csv
+    python batch_cli.py carteiras.csv resultados.parquet --processos 8
+    python batch_cli.py carteiras.jsonl resultados.csv --graficos graficos/ --graficos-max 500
+    python batch_cli.py carteiras.jsonl resultados.csv --motor float
+
+O motor padrão é o de centavos inteiros (`cents.py`): exato e reprodutível, quita
+quando o saldo zera. `--motor float` usa o motor em float de `batch.py` (quita em <= R$ 1).
+Carteiras fora do alcance do motor em centavos (taxa acima de 100% a.m., valores negativos
+ou enormes) saem do motor em float; a coluna `motor` diz qual motor fez cada linha.
+
+Entrada JSONL: uma carteira por linha
+    {"id": "c1", "renda": 4860, "despesas": 800,
+     "dividas": [{"nome": "Cartão", "saldo_devedor": 4803.58, "taxa_juros_mensal": 0.12,
+                  "parcela_mensal": 1000, "prazo_restante_meses": null}]}
+
+Entrada CSV: uma dívida por linha, linhas da mesma carteira em sequência
+    id,renda,despesas,nome,saldo_devedor,taxa_juros_mensal,parcela_mensal,prazo_restante_meses
+
+A saída tem meses, juros, quitação e inviabilidade para cada estratégia registrada
+(`strategies.py`, plugins de SIMULADOR_ESTRATEGIAS incluídos), todas simuladas juntas numa
+passada por bloco. Sem teto curto: cada carteira roda até quitar (até MESES_LIMITE_SEGURANCA),
+e as provadamente impagáveis param cedo com `inviavel_*` = true e os meses até a prova.
+
+Gráficos custam bem mais que a simulação (~0,15 s por PNG contra milissegundos por bloco),
+então `--graficos` salva só as primeiras GRAFICOS_MAX_PADRAO carteiras, salvo `--graficos-max`.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby, islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from models import Divida
+from batch import CarteiraLote, NomeEstrategia, simular_quitacao_lote
+from calculator import MESES_LIMITE_SEGURANCA
+from cents import CarteiraCentavos, cabem_em_centavos, para_reais, simular_quitacao_centavos
+from comparison import repetir_por_estrategia
+from strategies import estrategias_registradas
+from visualizer import salvar_graficos
+
+MOTORES = ('centavos', 'float')
+GRAFICOS_MAX_PADRAO = 100  # ~0,15 s por PNG: 100 gráficos já somam uns 15 s de um processo
+
+Carteira = Tuple[str, float, float, List[Divida]]
+
+
+def estrategias() -> List[str]:
+    return [e.nome for e in estrategias_registradas()]
+
+
+def colunas() -> List[str]:
+    return ['id'] + [f"{campo}_{e}" for e in estrategias() for campo in ('meses', 'juros', 'quitado', 'inviavel')] \
+        + ['melhor_estrategia', 'economia_juros', 'motor']
+
+
+# ==================== LEITURA (streaming) ====================
+def _divida(campos: Dict) -> Divida:
+    prazo = campos.get('prazo_restante_meses')
+    return Divida(
+        nome=campos.get('nome', ''),
+        saldo_devedor=float(campos['saldo_devedor']),
+        taxa_juros_mensal=float(campos['taxa_juros_mensal']),
+        parcela_mensal=float(campos['parcela_mensal']),
+        prazo_restante_meses=int(prazo) if prazo not in (None, '') else None
+    )
+
+
+def ler_jsonl(caminho: str) -> Iterator[Carteira]:
+    with open(caminho, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            if not linha.strip():
+                continue
+            registro = json.loads(linha)
+            yield (str(registro['id']), float(registro['renda']), float(registro['despesas']),
+                   [_divida(d) for d in registro['dividas']])
+
+
+def ler_csv(caminho: str) -> Iterator[Carteira]:
+    with open(caminho, newline='', encoding='utf-8') as arquivo:
+        for id_carteira, linhas in groupby(csv.DictReader(arquivo), key=lambda l: l['id']):
+            linhas = list(linhas)
+            yield (id_carteira, float(linhas[0]['renda']), float(linhas[0]['despesas']),
+                   [_divida(l) for l in linhas])
+
+
+# ==================== SIMULAÇÃO ====================
+def _arquivo_grafico(pasta: str, id_carteira: str) -> str:
+    return os.path.join(pasta, re.sub(r'[^\w.-]', '_', id_carteira) + '.png')
+
+
+def _linhas(lote: CarteiraLote, indices: np.ndarray) -> CarteiraLote:
+    return CarteiraLote(lote.saldos[indices], lote.taxas[indices], lote.parcelas[indices], lote.prazos[indices])
+
+
+def _simular_centavos(saldo_mensal: np.ndarray, base: CarteiraLote, estrategia: NomeEstrategia, max_meses: int,
+                      registrar_historico: bool) -> Dict:
+    r = simular_quitacao_centavos(saldo_mensal, 0.0, CarteiraCentavos.from_lote(base), estrategia, max_meses,
+                                  registrar_historico=registrar_historico)
+    r["juros_totais"] = para_reais(r["juros_totais"])
+    r["saldo_final"] = para_reais(r["saldo_final"])
+    if registrar_historico:
+        r["historico"] = para_reais(r["historico"])
+    return r
+
+
+def _simular(saldo_mensal: np.ndarray, base: CarteiraLote, estrategia: np.ndarray, max_meses: int,
+             registrar_historico: bool, motor: str, em_centavos: np.ndarray) -> Dict:
+    """
+    Simula o lote no motor escolhido, com a estratégia de cada carteira; valores sempre
+    em reais. Com o motor em centavos,
+    as carteiras fora de `em_centavos` rodam no motor em float (uma linha ruim não
+    derruba o bloco).
+    """
+    if motor == 'float' or not em_centavos.any():
+        return simular_quitacao_lote(saldo_mensal, 0.0, base.copy(), estrategia, max_meses,
+                                     registrar_historico=registrar_historico)
+    if em_centavos.all():
+        return _simular_centavos(saldo_mensal, base, estrategia, max_meses, registrar_historico)
+
+    fora = ~em_centavos
+    r_cent = _simular_centavos(saldo_mensal[em_centavos], _linhas(base, em_centavos), estrategia[em_centavos],
+                               max_meses, registrar_historico)
+    r_float = simular_quitacao_lote(saldo_mensal[fora], 0.0, _linhas(base, fora), estrategia[fora], max_meses,
+                                    registrar_historico=registrar_historico)
+    resumo = {}
+    for chave, valores in r_cent.items():
+        resumo[chave] = np.empty((base.n_carteiras,) + valores.shape[1:],
+                                 dtype=np.result_type(valores, r_float[chave]))
+        resumo[chave][em_centavos] = valores
+        resumo[chave][fora] = r_float[chave]
+    return resumo
+
+
+def simular_bloco(carteiras: List[Carteira], max_meses: int, pasta_graficos: Optional[str] = None,
+                  motor: str = 'centavos', max_graficos: Optional[int] = None) -> List[Dict]:
+    """
+    Simula um bloco de carteiras com todas as estratégias registradas numa passada só
+    do motor em lote: cada carteira vira uma linha por estratégia (`repetir_por_estrategia`).
+    Com `pasta_graficos`, o próprio processo do pool salva o gráfico de cada carteira
+    (evolução na melhor estratégia), então os gráficos saem em paralelo junto com os blocos.
+    `max_graficos` limita o gráfico às primeiras carteiras do bloco (None = todas); sem
+    gráfico nenhum, o histórico mês a mês nem é registrado.
+    """
+    nomes = estrategias()
+    k = len(nomes)
+    base = CarteiraLote.from_dividas([dividas for *_, dividas in carteiras])
+    lote, por_linha = repetir_por_estrategia(base, nomes)
+    saldo_mensal = np.repeat([renda - despesas for _, renda, despesas, _ in carteiras], k).astype(float)
+    em_centavos = cabem_em_centavos(base) if motor == 'centavos' else np.zeros(len(carteiras), dtype=bool)
+    n_graficos = 0
+    if pasta_graficos is not None:
+        n_graficos = len(carteiras) if max_graficos is None else min(max_graficos, len(carteiras))
+    r = _simular(saldo_mensal, lote, por_linha, max_meses, n_graficos > 0, motor, np.repeat(em_centavos, k))
+
+    linhas = []
+    for i, (id_carteira, *_) in enumerate(carteiras):
+        linha = {'id': id_carteira}
+        for j, e in enumerate(nomes):
+            linha[f"meses_{e}"] = int(r['meses'][i * k + j])
+            linha[f"juros_{e}"] = round(float(r['juros_totais'][i * k + j]), 2)
+            linha[f"quitado_{e}"] = bool(r['quitado'][i * k + j])
+            linha[f"inviavel_{e}"] = bool(r['inviavel'][i * k + j])
+        # Melhor = quita, e com menos juros
+        melhor = min(nomes, key=lambda e: (not linha[f"quitado_{e}"], linha[f"juros_{e}"]))
+        linha['melhor_estrategia'] = melhor
+        linha['economia_juros'] = round(max(linha[f"juros_{e}"] for e in nomes) - linha[f"juros_{melhor}"], 2)
+        linha['motor'] = 'centavos' if em_centavos[i] else 'float'
+        linhas.append(linha)
+
+    if n_graficos:
+        historicos = []
+        for i, linha in enumerate(linhas[:n_graficos]):
+            indice = i * k + nomes.index(linha['melhor_estrategia'])
+            historicos.append(r['historico'][indice, :r['meses'][indice] + 1])
+        salvar_graficos(historicos, [_arquivo_grafico(pasta_graficos, l['id']) for l in linhas[:n_graficos]])
+    return linhas
+
+
+# ==================== ESCRITA (incremental) ====================
+class EscritorCSV:
+    def __init__(self, caminho: str):
+        self._arquivo = open(caminho, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._arquivo, fieldnames=colunas())
+        self._writer.writeheader()
+
+    def escrever(self, linhas: List[Dict]):
+        self._writer.writerows(linhas)
+
+    def fechar(self):
+        self._arquivo.close()
+
+
+class EscritorParquet:
+    """Escreve um row group por bloco, sem juntar tudo em memória."""
+
+    def __init__(self, caminho: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Saída Parquet precisa do pyarrow: pip install pyarrow")
+        self._pa = pa
+        self._schema = pa.schema(
+            [('id', pa.string())]
+            + [(f"{campo}_{e}", tipo) for e in estrategias()
+               for campo, tipo in (('meses', pa.int64()), ('juros', pa.float64()), ('quitado', pa.bool_()),
+                                   ('inviavel', pa.bool_()))]
+            + [('melhor_estrategia', pa.string()), ('economia_juros', pa.float64()), ('motor', pa.string())]
+        )
+        self._writer = pq.ParquetWriter(caminho, self._schema)
+
+    def escrever(self, linhas: List[Dict]):
+        self._writer.write_table(self._pa.Table.from_pylist(linhas, schema=self._schema))
+
+    def fechar(self):
+        self._writer.close()
+
+
+# ==================== ORQUESTRAÇÃO ====================
+def _blocos(carteiras: Iterator[Carteira], tamanho: int) -> Iterator[List[Carteira]]:
+    while True:
+        bloco = list(islice(carteiras, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+
+def processar(entrada: str, saida: str, processos: Optional[int] = None, tamanho_bloco: int = 1000,
+              max_meses: int = MESES_LIMITE_SEGURANCA, silencioso: bool = False, pasta_graficos: Optional[str] = None,
+              motor: str = 'centavos', max_graficos: Optional[int] = None) -> Dict:
+    """
+    Lê as carteiras em streaming, simula blocos num pool de processos e grava
+    os resultados na ordem de entrada. Só alguns blocos ficam em voo por vez,
+    então a memória não cresce com o tamanho do arquivo.
+    Com `pasta_graficos`, salva também um PNG por carteira (ver `simular_bloco`), só
+    das primeiras `max_graficos` carteiras do arquivo quando informado.
+    Retorna o relatório de vazão (carteiras/s).
+    """
+    leitor = ler_csv(entrada) if entrada.lower().endswith('.csv') else ler_jsonl(entrada)
+    escritor = EscritorParquet(saida) if saida.lower().endswith('.parquet') else EscritorCSV(saida)
+
+    inicio = time.perf_counter()
+    total = 0
+    graficos_restantes = max_graficos
+    processos = processos or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        em_voo = deque()
+        limite_em_voo = 2 * processos
+
+        def gravar_proximo():
+            nonlocal total
+            linhas = em_voo.popleft().result()
+            escritor.escrever(linhas)
+            total += len(linhas)
+            if not silencioso:
+                decorrido = time.perf_counter() - inicio
+                print(f"\r{total} carteiras | {total / decorrido:,.0f} carteiras/s", end='', file=sys.stderr)
+
+        try:
+            for bloco in _blocos(leitor, tamanho_bloco):
+                em_voo.append(executor.submit(simular_bloco, bloco, max_meses, pasta_graficos, motor,
+                                              graficos_restantes))
+                if graficos_restantes is not None:
+                    graficos_restantes = max(graficos_restantes - len(bloco), 0)
+                if len(em_voo) >= limite_em_voo:
+                    gravar_proximo()
+            while em_voo:
+                gravar_proximo()
+        finally:
+            escritor.fechar()
+
+    decorrido = time.perf_counter() - inicio
+    relatorio = {
+        "carteiras": total,
+        "segundos": decorrido,
+        "carteiras_por_segundo": total / decorrido if decorrido > 0 else 0.0
+    }
+    if not silencioso:
+        print(file=sys.stderr)
+    return relatorio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulação em lote de carteiras de dívidas")
+    parser.add_argument("entrada", help="Arquivo .jsonl ou .csv com as carteiras")
+    parser.add_argument("saida", help="Arquivo .csv ou .parquet de resultados")
+    parser.add_argument("--processos", type=int, default=None, help="Processos no pool (padrão: todos os núcleos)")
+    parser.add_argument("--tamanho-bloco", type=int, default=1000, help="Carteiras por bloco enviado ao pool")
+    parser.add_argument("--max-meses", type=int, default=MESES_LIMITE_SEGURANCA,
+                        help="Horizonte máximo da simulação (impagáveis param antes, quando provadas)")
+    parser.add_argument("--graficos", default=None, metavar="PASTA",
+                        help="Salva um PNG da evolução da dívida por carteira nesta pasta (~0,15 s por "
+                             "gráfico, feito pelo processo do bloco; bem mais lento que a simulação)")
+    parser.add_argument("--graficos-max", type=int, default=GRAFICOS_MAX_PADRAO, metavar="N",
+                        help=f"Com --graficos, salva só as N primeiras carteiras (padrão: {GRAFICOS_MAX_PADRAO}; "
+                             "3000 gráficos levam minutos)")
+    parser.add_argument("--motor", choices=MOTORES, default='centavos',
+                        help="centavos: inteiro e exato (padrão); float: motor antigo de batch.py")
+    args = parser.parse_args()
+
+    relatorio = processar(args.entrada, args.saida, args.processos, args.tamanho_bloco, args.max_meses,
+                          pasta_graficos=args.graficos, motor=args.motor, max_graficos=args.graficos_max)
+    print(f"--- {relatorio['carteiras']} carteiras em {relatorio['segundos']:.2f}s "
+          f"({relatorio['carteiras_por_segundo']:,.0f} carteiras/s) ---")
+
+
+if __name__ == "__main__":
+    main()
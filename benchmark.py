@@ -0,0 +1,391 @@
+"""
+Benchmarks reprodutíveis dos caminhos de simulação, exportação e gráfico.
+
+Uso:
+    python benchmark.py rodar --suite rapida --saida base.json
+    python benchmark.py rodar --suite completa --alvos calculator,lote --saida novo.json
+    python benchmark.py comparar base.json novo.json --tolerancia 0.10
+    python benchmark.py comparar novo.json novo.json --alvo-base calculator --alvo-novo lote
+    python benchmark.py divergencia --suite rapida    # motor em centavos contra o float, mesmas carteiras
+
+As carteiras são geradas com semente fixa e escalam em número de dívidas,
+horizonte (meses) e número de carteiras. Cada caso guarda o menor tempo e a
+mediana das repetições. `comparar` sai com código 1 se algum caso ficou mais
+lento que a tolerância, então serve de portão de regressão.
+"""
+import argparse
+import ast
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from models import Divida
+
+Carteira = Tuple[float, List[Divida]]  # (saldo mensal, dívidas)
+
+SUITES = {
+    # Grade: (n_dividas, horizontes, n_carteiras)
+    "rapida": {"dividas": [1, 10, 100], "horizontes": [12, 120], "carteiras": [1, 10]},
+    "completa": {"dividas": [1, 10, 100, 1000, 10000], "horizontes": [12, 120, 600], "carteiras": [1, 10, 100]},
+}
+
+
+# ==================== CARTEIRAS GERADAS ====================
+def gerar_carteira(n_dividas: int, horizonte: int, semente: int) -> Carteira:
+    """
+    Carteira sintética que leva cerca de `horizonte` meses para quitar: cada
+    parcela amortiza a dívida nesse prazo (tabela Price) e o saldo mensal é a
+    soma das parcelas, sem extra.
+    """
+    rng = random.Random(semente)
+    dividas = []
+    for i in range(n_dividas):
+        saldo = round(rng.uniform(500, 50_000), 2)
+        taxa = rng.choice([0.0, 0.01, 0.02, 0.04, 0.08, 0.12])
+        if taxa > 0:
+            parcela = saldo * taxa / (1 - (1 + taxa) ** -horizonte)
+        else:
+            parcela = saldo / horizonte
+        dividas.append(Divida(f"Dívida {i + 1}", saldo, taxa, round(parcela, 2)))
+    return sum(d.parcela_mensal for d in dividas), dividas
+
+
+def gerar_carteiras(n_dividas: int, horizonte: int, n_carteiras: int, semente: int = 0) -> List[Carteira]:
+    return [gerar_carteira(n_dividas, horizonte, semente * 1_000_003 + n_dividas * 1009 + horizonte * 7 + i)
+            for i in range(n_carteiras)]
+
+
+def _para_dicts(dividas: List[Divida]) -> List[Dict]:
+    """Formato das dívidas na sessão do app"""
+    return [{'nome': d.nome, 'tipo': 'Outro', 'saldo': d.saldo_devedor,
+             'taxa_juros': d.taxa_juros_mensal, 'parcela_minima': d.parcela_mensal} for d in dividas]
+
+
+# ==================== ALVOS ====================
+def _funcoes_do_app(*nomes: str):
+    """
+    Carrega funções do app.py sem rodar o script do Streamlit: executa só os
+    imports e as definições pedidas, com um `st` falso que só tem session_state.
+    """
+    caminho = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+    with open(caminho, encoding='utf-8') as arquivo:
+        arvore = ast.parse(arquivo.read())
+    corpo = [n for n in arvore.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    corpo += [n for n in arvore.body if isinstance(n, ast.FunctionDef) and n.name in nomes]
+    namespace = {}
+    exec(compile(ast.Module(corpo, []), caminho, 'exec'), namespace)
+    st = types.SimpleNamespace(session_state=types.SimpleNamespace(dividas=[]))
+    namespace['st'] = st
+    return st, [namespace[nome] for nome in nomes]
+
+
+class Alvo(NamedTuple):
+    nome: str
+    preparar: Callable  # (carteiras, horizonte) -> entrada; fora da medição
+    executar: Callable  # (entrada, horizonte) -> meses simulados; medido
+    limite_trabalho: int  # Pula casos com n_dividas * horizonte * n_carteiras acima disso
+    horizonte_maximo: Optional[int] = None  # Teto fixo do próprio código, se houver
+
+
+def _preparar_calculator(carteiras, horizonte):
+    return carteiras
+
+
+def _executar_calculator(entrada, horizonte):
+    """Mesma chamada do main.main, sem prints e sem gráfico"""
+    from calculator import CarteiraSimulada, simular_quitacao
+    return sum(simular_quitacao(saldo_mensal, CarteiraSimulada.de_dividas(dividas), max_meses=horizonte).meses
+               for saldo_mensal, dividas in entrada)
+
+
+def _preparar_app(carteiras, horizonte):
+    st, (simular_quitacao,) = _funcoes_do_app('simular_quitacao')
+    return st, simular_quitacao, [(saldo, _para_dicts(dividas)) for saldo, dividas in carteiras]
+
+
+def _executar_app(entrada, horizonte):
+    st, simular_quitacao, carteiras = entrada
+    total_meses = 0
+    for saldo_mensal, dividas in carteiras:
+        st.session_state.dividas = dividas
+        meses, *_ = simular_quitacao(saldo_mensal, 'avalanche')
+        total_meses += meses
+    return total_meses
+
+
+def _preparar_excel(carteiras, horizonte):
+    st, (simular_quitacao, razao_por_divida, montar_relatorio_excel) = _funcoes_do_app(
+        'simular_quitacao', 'razao_por_divida', 'montar_relatorio_excel')
+    simulados = []
+    for saldo_mensal, dividas in carteiras:
+        st.session_state.dividas = _para_dicts(dividas)
+        simulados.append((st.session_state.dividas, saldo_mensal, simular_quitacao(saldo_mensal, 'avalanche')))
+    return razao_por_divida, montar_relatorio_excel, simulados
+
+
+def _executar_excel(entrada, horizonte):
+    razao_por_divida, montar_relatorio_excel, simulados = entrada
+    total_meses = 0
+    for dividas, saldo_mensal, (meses, df_hist, juros_total, _) in simulados:
+        tabela = razao_por_divida(dividas, meses, saldo_mensal, 'avalanche')
+        montar_relatorio_excel(dividas, tabela, meses, df_hist, juros_total, saldo_mensal, 'Avalanche 🔥')
+        total_meses += meses
+    return total_meses
+
+
+def _preparar_grafico(carteiras, horizonte):
+    from calculator import iter_meses
+    return [[m.saldo_devedor_total for m in iter_meses(saldo, 0.0, dividas, max_meses=horizonte)]
+            for saldo, dividas in carteiras]
+
+
+def _executar_grafico(entrada, horizonte):
+    from visualizer import plotar_evolucao_divida  # Sem janela (Agg) e fecha a figura a cada gráfico
+
+    with tempfile.TemporaryDirectory() as pasta, contextlib.redirect_stdout(io.StringIO()):
+        arquivo = os.path.join(pasta, 'evolucao_divida.png')
+        for historico in entrada:
+            plotar_evolucao_divida(historico, arquivo)
+    return sum(len(h) - 1 for h in entrada)
+
+
+def _preparar_lote(carteiras, horizonte):
+    import numpy as np
+    from batch import CarteiraLote
+    return np.array([saldo for saldo, _ in carteiras]), CarteiraLote.from_dividas([d for _, d in carteiras])
+
+
+def _executar_lote(entrada, horizonte):
+    from batch import simular_quitacao_lote
+    saldo_mensal, lote = entrada
+    return int(simular_quitacao_lote(saldo_mensal, 0.0, lote, 'avalanche', horizonte)['meses'].sum())
+
+
+def _preparar_centavos(carteiras, horizonte):
+    import numpy as np
+    from cents import CarteiraCentavos
+    return np.array([saldo for saldo, _ in carteiras]), CarteiraCentavos.from_dividas([d for _, d in carteiras])
+
+
+def _executar_centavos(entrada, horizonte):
+    from cents import simular_quitacao_centavos
+    saldo_mensal, carteira = entrada
+    return int(simular_quitacao_centavos(saldo_mensal, 0.0, carteira, 'avalanche', horizonte)['meses'].sum())
+
+
+ALVOS: Dict[str, Alvo] = {
+    "calculator": Alvo("calculator", _preparar_calculator, _executar_calculator, 20_000_000),
+    "app": Alvo("app", _preparar_app, _executar_app, 20_000_000),
+    "excel": Alvo("excel", _preparar_excel, _executar_excel, 1_000_000),
+    "grafico": Alvo("grafico", _preparar_grafico, _executar_grafico, 20_000_000),
+    "lote": Alvo("lote", _preparar_lote, _executar_lote, 100_000_000),
+    "centavos": Alvo("centavos", _preparar_centavos, _executar_centavos, 100_000_000),
+}
+
+
+# ==================== MEDIÇÃO ====================
+def medir(alvo: Alvo, carteiras: List[Carteira], horizonte: int, repeticoes: int = 5,
+          orcamento_segundos: float = 2.0) -> Dict:
+    """
+    Roda o alvo até `repeticoes` vezes (ou até estourar o orçamento de tempo),
+    cada vez com uma entrada nova preparada fora da medição e com o GC desligado.
+    """
+    tempos = []
+    meses = 0
+    while len(tempos) < repeticoes:
+        entrada = alvo.preparar(carteiras, horizonte)
+        gc.collect()
+        gc.disable()
+        try:
+            inicio = time.perf_counter()
+            meses = alvo.executar(entrada, horizonte)
+            tempos.append(time.perf_counter() - inicio)
+        finally:
+            gc.enable()
+        if sum(tempos) > orcamento_segundos:
+            break
+    return {
+        "segundos_min": min(tempos),
+        "segundos_mediana": statistics.median(tempos),
+        "repeticoes": len(tempos),
+        "meses_simulados": meses
+    }
+
+
+def id_caso(alvo: str, n_dividas: int, horizonte: int, n_carteiras: int) -> str:
+    return f"{alvo}/d{n_dividas}/h{horizonte}/c{n_carteiras}"
+
+
+def rodar(suite: str = "rapida", alvos: Optional[List[str]] = None, repeticoes: int = 5,
+          semente: int = 0, silencioso: bool = False) -> Dict:
+    """Roda a grade da suíte para cada alvo e devolve o documento de baseline."""
+    grade = SUITES[suite]
+    alvos = alvos or list(ALVOS)
+    resultados = {}
+    for nome in alvos:
+        alvo = ALVOS[nome]
+        for n_dividas in grade["dividas"]:
+            for horizonte in grade["horizontes"]:
+                if alvo.horizonte_maximo and horizonte > alvo.horizonte_maximo:
+                    continue  # O próprio código para antes: seria o mesmo caso de novo
+                for n_carteiras in grade["carteiras"]:
+                    if n_dividas * horizonte * n_carteiras > alvo.limite_trabalho:
+                        continue
+                    carteiras = gerar_carteiras(n_dividas, horizonte, n_carteiras, semente)
+                    caso = id_caso(nome, n_dividas, horizonte, n_carteiras)
+                    medida = medir(alvo, carteiras, horizonte, repeticoes)
+                    resultados[caso] = {"alvo": nome, "n_dividas": n_dividas, "horizonte": horizonte,
+                                        "n_carteiras": n_carteiras, **medida}
+                    if not silencioso:
+                        print(f"{caso:<32} {medida['segundos_min'] * 1000:10.2f} ms "
+                              f"(mediana {medida['segundos_mediana'] * 1000:.2f} ms, "
+                              f"{medida['repeticoes']}x)", file=sys.stderr)
+    return {
+        "meta": {
+            "suite": suite,
+            "semente": semente,
+            "data": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "processador": platform.processor() or platform.machine()
+        },
+        "resultados": resultados
+    }
+
+
+# ==================== DIVERGÊNCIA ENTRE MOTORES ====================
+def divergencia(suite: str = "rapida", semente: int = 0, folga: float = 0.05) -> List[Dict]:
+    """
+    Roda as carteiras da suíte nos motores em float e em centavos (`cents.comparar_com_float`),
+    nas duas ordens de juros, com `folga` de sobra mensal acima das parcelas para
+    exercitar o pagamento extra. Horizonte máximo: o dobro do horizonte do caso.
+    """
+    import numpy as np
+    from batch import CarteiraLote
+    from cents import comparar_com_float
+
+    grade = SUITES[suite]
+    linhas = []
+    for n_dividas in grade["dividas"]:
+        for horizonte in grade["horizontes"]:
+            n_carteiras = max(grade["carteiras"])
+            if n_dividas * horizonte * n_carteiras > ALVOS["lote"].limite_trabalho:
+                continue
+            carteiras = gerar_carteiras(n_dividas, horizonte, n_carteiras, semente)
+            saldo_mensal = np.array([saldo * (1 + folga) for saldo, _ in carteiras])
+            lote = CarteiraLote.from_dividas([d for _, d in carteiras])
+            for juros_antes_do_extra in (False, True):
+                r = comparar_com_float(saldo_mensal, 0.0, lote, 'avalanche', 2 * horizonte, juros_antes_do_extra)
+                linhas.append({"caso": f"d{n_dividas}/h{horizonte}/c{n_carteiras}",
+                               "ordem": "app" if juros_antes_do_extra else "main", **r})
+    return linhas
+
+
+def _imprimir_divergencia(linhas: List[Dict]):
+    print(f"{'caso':<20} {'ordem':<6} {'quitadas':>9} {'quit. dif.':>10} {'meses dif.':>10} "
+          f"{'máx. meses':>10} {'juros méd.':>11} {'juros máx.':>11}")
+    for l in linhas:
+        print(f"{l['caso']:<20} {l['ordem']:<6} {l['quitadas_nos_dois']:>9} {l['quitacao_diferente']:>10} "
+              f"{l['meses_diferentes']:>10} {l['maior_diferenca_meses']:>10} "
+              f"{l['diferenca_juros_media']:>11.4f} {l['diferenca_juros_maxima']:>11.4f}")
+
+
+# ==================== COMPARAÇÃO ====================
+def comparar(base: Dict, novo: Dict, tolerancia: float = 0.10, alvo_base: Optional[str] = None,
+             alvo_novo: Optional[str] = None, piso_segundos: float = 0.001) -> List[Dict]:
+    """
+    Casa os casos das duas baselines e calcula a razão de tempo (novo / base,
+    pelo menor tempo). Com `alvo_base`/`alvo_novo` compara dois motores
+    diferentes nos mesmos casos (ex: calculator contra lote). Casos abaixo de
+    `piso_segundos` são ruído de medição e não contam como regressão.
+    """
+    linhas = []
+    for caso, r_base in base["resultados"].items():
+        if alvo_base and r_base["alvo"] != alvo_base:
+            continue
+        caso_novo = id_caso(alvo_novo, r_base["n_dividas"], r_base["horizonte"], r_base["n_carteiras"]) \
+            if alvo_novo else caso
+        r_novo = novo["resultados"].get(caso_novo)
+        if r_novo is None:
+            continue
+        razao = r_novo["segundos_min"] / r_base["segundos_min"]
+        linhas.append({"caso": caso_novo, "base": r_base["segundos_min"], "novo": r_novo["segundos_min"],
+                       "razao": razao,
+                       "regressao": razao > 1 + tolerancia and r_novo["segundos_min"] >= piso_segundos})
+    return linhas
+
+
+def _imprimir_comparacao(linhas: List[Dict]):
+    print(f"{'caso':<32} {'base (ms)':>12} {'novo (ms)':>12} {'razão':>8}")
+    for l in linhas:
+        marca = "  <-- REGRESSÃO" if l["regressao"] else ""
+        print(f"{l['caso']:<32} {l['base'] * 1000:12.2f} {l['novo'] * 1000:12.2f} {l['razao']:8.2f}x{marca}")
+    if linhas:
+        print(f"--- média geométrica: {statistics.geometric_mean(l['razao'] for l in linhas):.3f}x "
+              f"| {sum(l['regressao'] for l in linhas)} regressões em {len(linhas)} casos ---")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do simulador de dívidas")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_rodar = sub.add_parser("rodar", help="Roda a suíte e grava a baseline em JSON")
+    p_rodar.add_argument("--suite", choices=list(SUITES), default="rapida")
+    p_rodar.add_argument("--alvos", default=",".join(ALVOS), help=f"Lista separada por vírgula: {', '.join(ALVOS)}")
+    p_rodar.add_argument("--repeticoes", type=int, default=5)
+    p_rodar.add_argument("--semente", type=int, default=0)
+    p_rodar.add_argument("--saida", default=None, help="Arquivo JSON (padrão: benchmark_<suite>.json)")
+    p_rodar.add_argument("--comparar", default=None, help="Baseline para comparar logo após rodar")
+    p_rodar.add_argument("--tolerancia", type=float, default=0.10)
+
+    p_comparar = sub.add_parser("comparar", help="Compara duas baselines; sai com 1 se houver regressão")
+    p_comparar.add_argument("base")
+    p_comparar.add_argument("novo")
+    p_comparar.add_argument("--tolerancia", type=float, default=0.10, help="Folga antes de contar regressão (0.10 = 10%%)")
+    p_comparar.add_argument("--alvo-base", default=None)
+    p_comparar.add_argument("--alvo-novo", default=None)
+    p_comparar.add_argument("--piso-ms", type=float, default=1.0, help="Casos mais rápidos que isso não contam como regressão")
+
+    p_divergencia = sub.add_parser("divergencia", help="Diferenças de resultado entre os motores float e centavos")
+    p_divergencia.add_argument("--suite", choices=list(SUITES), default="rapida")
+    p_divergencia.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.comando == "rodar":
+        alvos = [a.strip() for a in args.alvos.split(",") if a.strip()]
+        for a in alvos:
+            if a not in ALVOS:
+                parser.error(f"alvo desconhecido: {a}")
+        documento = rodar(args.suite, alvos, args.repeticoes, args.semente)
+        saida = args.saida or f"benchmark_{args.suite}.json"
+        with open(saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(documento, arquivo, indent=2, ensure_ascii=False)
+        print(f"--- {len(documento['resultados'])} casos gravados em {saida} ---")
+        if args.comparar:
+            with open(args.comparar, encoding='utf-8') as arquivo:
+                linhas = comparar(json.load(arquivo), documento, args.tolerancia)
+            _imprimir_comparacao(linhas)
+            sys.exit(1 if any(l["regressao"] for l in linhas) else 0)
+    elif args.comando == "divergencia":
+        _imprimir_divergencia(divergencia(args.suite, args.semente))
+    else:
+        with open(args.base, encoding='utf-8') as a, open(args.novo, encoding='utf-8') as b:
+            linhas = comparar(json.load(a), json.load(b), args.tolerancia, args.alvo_base, args.alvo_novo,
+                              args.piso_ms / 1000)
+        _imprimir_comparacao(linhas)
+        sys.exit(1 if any(l["regressao"] for l in linhas) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from importlib import metadata
+from typing import Any, Callable, Dict, List, Optional
+
+from models import Divida
+from profiler import PERFIL
+
+
+def chave_simulacao(dividas: List[Divida], saldo_mensal: float, estrategia: str, horizonte: int) -> str:
+    """
+    Hash canônico das entradas de uma simulação. Valores em reais são
+    arredondados no centavo e nomes ficam de fora (não mudam o resultado),
+    então carteiras iguais de usuários diferentes caem na mesma chave.
+    """
+    conteudo = {
+        "dividas": [
+            [round(d.saldo_devedor, 2), round(d.taxa_juros_mensal, 8),
+             round(d.parcela_mensal, 2), d.prazo_restante_meses]
+            for d in dividas
+        ],
+        "saldo_mensal": round(saldo_mensal, 2),
+        "estrategia": estrategia,
+        "horizonte": horizonte
+    }
+    texto = json.dumps(conteudo, separators=(",", ":"), sort_keys=True)
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+VERSAO_FORMATO = 1  # Subir quando o formato dos resultados guardados mudar sem mudar os motores
+MODULOS_MOTOR = ('models.py', 'financing.py', 'calculator.py', 'batch.py', 'cents.py', 'strategies.py',
+                 'comparison.py', 'sensitivity.py', 'ledger.py', 'optimizer.py')
+
+
+def versao_resultados() -> str:
+    """
+    Prefixo das chaves guardadas em disco: versão do formato, hash do código dos motores
+    e das estratégias registradas (plugins incluídos) e versões do numpy e do pandas. Mudou qualquer um, os resultados antigos deixam de
+    ser encontrados (e saem na compactação, por falta de acesso).
+    """
+    from strategies import estrategias_registradas
+
+    codigo = hashlib.sha256()
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    for modulo in MODULOS_MOTOR:
+        with open(os.path.join(pasta, modulo), 'rb') as arquivo:
+            codigo.update(arquivo.read())
+    for estrategia in estrategias_registradas():  # Plugins ficam fora de MODULOS_MOTOR
+        funcao = estrategia.chave.__code__
+        codigo.update(estrategia.nome.encode() + funcao.co_code + repr(funcao.co_consts).encode())
+    bibliotecas = []
+    for nome in ('numpy', 'pandas'):
+        try:
+            bibliotecas.append(f"{nome}{metadata.version(nome)}")
+        except metadata.PackageNotFoundError:
+            bibliotecas.append(f"{nome}-")
+    return f"v{VERSAO_FORMATO}:{codigo.hexdigest()[:12]}:{':'.join(bibliotecas)}:"
+
+
+def _tamanho(obj: Any) -> int:
+    """Estimativa de memória em bytes (DataFrames e arrays pelo tamanho dos dados)."""
+    if hasattr(obj, "memory_usage"):  # pandas
+        uso = obj.memory_usage(deep=True)
+        return int(uso.sum() if hasattr(uso, "sum") else uso)
+    if hasattr(obj, "nbytes"):  # numpy
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(_tamanho(k) + _tamanho(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(_tamanho(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class CacheSimulacao:
+    """
+    Cache LRU de resultados limitado pelo total de bytes, seguro para várias
+    threads (cada sessão do Streamlit roda na sua). Os valores guardados são
+    compartilhados entre sessões: quem lê não deve alterá-los.
+    Com `disco` (um `storage.ArmazemSQLite`), vira um cache de dois níveis: o que
+    sai da memória continua no disco, e cenários repetidos voltam de lá depois de
+    reiniciar o servidor. No disco as chaves levam o prefixo de `versao_resultados`.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, disco: Optional[Any] = None):
+        self.max_bytes = max_bytes
+        self.disco = disco
+        self._itens: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.hits_disco = 0
+        self.prefixo_disco = versao_resultados() if disco is not None else ''
+
+    def obter(self, chave: str, padrao: Any = None) -> Any:
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.hits += 1
+                if PERFIL.ativo:
+                    PERFIL.contar('cache/hits')
+                return self._itens[chave][0]
+
+        # Fora do lock: ler do disco não trava as outras sessões
+        ausente = object()
+        valor = self.disco.obter_resultado(self.prefixo_disco + chave, ausente) if self.disco is not None else ausente
+        with self._lock:
+            if valor is ausente:
+                self.misses += 1
+                if PERFIL.ativo:
+                    PERFIL.contar('cache/misses')
+                return padrao
+            self.hits += 1
+            self.hits_disco += 1
+            if PERFIL.ativo:
+                PERFIL.contar('cache/hits_disco')
+        self._guardar_memoria(chave, valor)
+        return valor
+
+    def guardar(self, chave: str, valor: Any):
+        self._guardar_memoria(chave, valor)
+        if self.disco is not None:
+            self.disco.guardar_resultado(self.prefixo_disco + chave, valor)
+
+    def _guardar_memoria(self, chave: str, valor: Any):
+        tamanho = _tamanho(valor)
+        if tamanho > self.max_bytes:
+            return  # Não cabe nem sozinho: não vale despejar o cache inteiro
+        with self._lock:
+            if chave in self._itens:
+                self._bytes -= self._itens.pop(chave)[1]
+            self._itens[chave] = (valor, tamanho)
+            self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                _, (_, tamanho_antigo) = self._itens.popitem(last=False)
+                self._bytes -= tamanho_antigo
+                self.evictions += 1
+
+    def obter_ou_calcular(self, chave: str, calcular: Callable[[], Any]) -> Any:
+        """Devolve o valor em cache ou calcula, guarda e devolve."""
+        ausente = object()
+        valor = self.obter(chave, ausente)
+        if valor is ausente:
+            valor = calcular()
+            self.guardar(chave, valor)
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hits_disco": self.hits_disco,
+                "taxa_acerto": self.hits / consultas if consultas else 0.0,
+                "entradas": len(self._itens),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes
+            }
@@ -1,68 +1,422 @@
-from typing import List, Dict
+import heapq
+from time import perf_counter
+from typing import Callable, List, Dict, Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
 from models import Divida
+from fastforward import avancar, pode_saltar
+from financing import PRICE, REDUZIR_PRAZO, Financiamento, parcela_do_mes
+from profiler import PERFIL
+from strategies import obter_estrategia
 
-def simular_mes(renda: float, despesas: float, dividas: List[Divida], estrategia: str = 'avalanche') -> Dict:
+# ==================== NÚCLEO ====================
+class CarteiraSimulada:
     """
-    Simula um mês de pagamentos.
-    Retorna o resumo do mês.
+    Estado compacto de uma carteira para o núcleo da simulação: listas paralelas
+    de números (uma posição por dívida), sem objetos por dívida nem deepcopy.
+    `ativas` guarda as posições com saldo, em ordem; quitadas saem e não são
+    mais percorridas. Avalanche usa um heap fixo (a taxa não muda); snowball
+    remonta o heap em O(n) a cada mês, já que parcelas e juros mexem nos saldos.
+    `financiamentos` (posição -> sistema, modo de antecipação, amortização fixa) marca
+    as posições Price/SAC cuja parcela é recalculada em forma fechada a cada mês.
+    """
+    __slots__ = ('saldos', 'taxas', 'parcelas', 'prazos', 'ativas', 'financiamentos', '_fila_avalanche')
+
+    def __init__(self, saldos: List[float], taxas: List[float], parcelas: List[float],
+                 prazos: Optional[List[Optional[int]]] = None):
+        self.saldos = saldos
+        self.taxas = taxas
+        self.parcelas = parcelas
+        self.prazos = prazos if prazos is not None else [None] * len(saldos)
+        self.ativas = [i for i, saldo in enumerate(saldos) if saldo > 0]
+        self.financiamentos: Dict[int, Tuple[str, str, Optional[float]]] = {}
+        self._fila_avalanche = None
+
+    @classmethod
+    def de_dividas(cls, dividas: List[Divida],
+                   financiamentos: Sequence[Financiamento] = ()) -> "CarteiraSimulada":
+        """
+        Copia só os números das dívidas: a lista original não muda.
+        `financiamentos` entram depois das dívidas, com a taxa real (a avalanche
+        passa a pesar o custo de antecipá-los) e o saldo na data do vencimento,
+        já com os juros do mês, já que o núcleo paga a parcela antes dos juros.
+        Pagamento extra num financiamento é uma antecipação no `modo_antecipacao` dele.
+        """
+        carteira = cls([d.saldo_devedor for d in dividas] + [f.saldo_devedor * (1 + f.taxa_juros_mensal)
+                                                             for f in financiamentos],
+                       [d.taxa_juros_mensal for d in dividas] + [f.taxa_juros_mensal for f in financiamentos],
+                       [d.parcela_mensal for d in dividas] + [f.parcela for f in financiamentos],
+                       [d.prazo_restante_meses for d in dividas] + [f.prazo_restante_meses for f in financiamentos])
+        for posicao, f in enumerate(financiamentos, start=len(dividas)):
+            amortizacao = f.amortizacao_fixa
+            if amortizacao is None and f.sistema != PRICE and f.prazo_restante_meses:
+                amortizacao = f.saldo_devedor / f.prazo_restante_meses
+            carteira.financiamentos[posicao] = (f.sistema, f.modo_antecipacao, amortizacao)
+        return carteira
+
+    @classmethod
+    def de_dicts(cls, dividas: List[Dict]) -> "CarteiraSimulada":
+        """Dívidas no formato da sessão do app ('saldo', 'taxa_juros', 'parcela_minima')."""
+        return cls([d['saldo'] for d in dividas], [d['taxa_juros'] for d in dividas],
+                   [d['parcela_minima'] for d in dividas])
+
+    def saldo_total(self) -> float:
+        return sum(self.saldos)
+
+    def copy(self) -> "CarteiraSimulada":
+        carteira = CarteiraSimulada(list(self.saldos), self.taxas, list(self.parcelas), list(self.prazos))
+        carteira.financiamentos = self.financiamentos
+        return carteira
+
+    def fila_extra(self, estrategia: str) -> list:
+        """
+        Heap com a ordem de prioridade do pagamento extra; a posição desempata como o sorted() estável.
+        Avalanche e snowball têm caminho próprio; as demais estratégias do registro (`strategies.py`)
+        calculam a chave de cada dívida ativa a cada mês.
+        """
+        if estrategia == 'avalanche':
+            if self._fila_avalanche is None:
+                self._fila_avalanche = [(-self.taxas[i], i) for i in self.ativas]
+                heapq.heapify(self._fila_avalanche)
+            return self._fila_avalanche
+        if estrategia == 'snowball':
+            fila = [(self.saldos[i], i) for i in self.ativas]
+        else:
+            ativas = self.ativas
+            chaves = obter_estrategia(estrategia).chave(
+                np.array([[self.saldos[i] for i in ativas]]), np.array([[self.taxas[i] for i in ativas]]),
+                np.array([[self.parcelas[i] for i in ativas]]))
+            fila = list(zip(chaves[0].tolist(), ativas))
+        heapq.heapify(fila)
+        return fila
+
+def simular_mes_carteira(carteira: CarteiraSimulada, saldo_disponivel: float, estrategia: str = 'avalanche',
+                         juros_antes_do_extra: bool = False, ordem: Optional[Sequence[int]] = None,
+                         fracoes: Sequence[float] = ()) -> Tuple[float, float, int]:
+    """
+    Um mês da simulação sobre o estado compacto, alterando `carteira`.
+    Padrão (main.py): parcelas, extra e juros no fim; saldos de centavos (<= 0,01) são zerados.
+    Com `juros_antes_do_extra=True` (app): parcelas, juros sobre o que sobrou e só depois o extra.
+    `ordem` (posições) substitui a ordem da estratégia no extra; dívidas fora dela não recebem
+    extra. Com `fracoes`, as primeiras dívidas ativas da ordem recebem essas frações do extra
+    e o resto segue em cascata (políticas do `optimizer.py`).
+    Retorna (saldo devedor total, juros do mês, dívidas ativas).
     """
-    saldo_disponivel = renda - despesas
-    pagamento_total_dividas = 0
-    
+    perfil = PERFIL if PERFIL.ativo else None
+    if perfil:
+        inicio = perf_counter()
+    saldos, taxas, parcelas, prazos = carteira.saldos, carteira.taxas, carteira.parcelas, carteira.prazos
+    ativas = carteira.ativas
+    juros_totais = 0.0
+
     # 1. Pagar parcelas fixas/mínimas obrigatórias
-    for div in dividas:
-        if div.saldo_devedor > 0:
-            valor_pagar = min(div.parcela_mensal, div.saldo_devedor)
-            div.pagar(valor_pagar)
-            pagamento_total_dividas += valor_pagar
+    for i in ativas:
+        saldo = saldos[i]
+        if saldo > 0:
+            valor_pagar = min(parcelas[i], saldo)
+            saldos[i] = saldo - valor_pagar
             saldo_disponivel -= valor_pagar
 
-    # 2. Se sobrar dinheiro, antecipar dívidas (Snowball ou Avalanche)
+    if perfil:
+        fim_minimo = perf_counter()
+        perfil.registrar('simular_mes/minimo', fim_minimo - inicio)
+
+    # 2. (app) Juros compostos sobre o saldo após a parcela
+    if juros_antes_do_extra:
+        for i in ativas:
+            if saldos[i] > 0 and taxas[i] > 0:
+                juros = saldos[i] * taxas[i]
+                saldos[i] += juros
+                juros_totais += juros
+        if perfil:
+            fim_juros = perf_counter()
+            perfil.registrar('simular_mes/juros', fim_juros - fim_minimo)
+            fim_minimo = fim_juros
+
+    # 3. Se sobrar dinheiro, antecipar dívidas (Snowball ou Avalanche)
     # Avalanche: Paga a com maior juros primeiro
     # Snowball: Paga a com menor saldo devedor primeiro
-    
     if saldo_disponivel > 0:
-        if estrategia == 'avalanche':
-            dividas_ordenadas = sorted(dividas, key=lambda x: x.taxa_juros_mensal, reverse=True)
-        else: # snowball
-            dividas_ordenadas = sorted(dividas, key=lambda x: x.saldo_devedor)
-            
-        for div in dividas_ordenadas:
-            if saldo_disponivel <= 0:
-                break
-            if div.saldo_devedor > 0:
-                # Se for financiamento com prazo fixo, muitas vezes antecipar desconta juros futuros.
-                # Aqui simplificamos assumindo que reduz o saldo direto.
-                pagamento_extra = saldo_disponivel
-                if pagamento_extra > div.saldo_devedor:
-                    pagamento_extra = div.saldo_devedor
-                
-                div.pagar(pagamento_extra)
-                pagamento_total_dividas += pagamento_extra
+        if ordem is None:
+            fila = carteira.fila_extra(estrategia)
+        else:
+            fila = [(posicao, i) for posicao, i in enumerate(ordem) if saldos[i] > 0]  # Já ordenada: é um heap
+
+        if fracoes:
+            extra_total = saldo_disponivel
+            primeiras = heapq.nsmallest(len(fracoes), [item for item in fila if saldos[item[1]] > 0])
+            for (_, i), fracao in zip(primeiras, fracoes):
+                pagamento_extra = min(extra_total * fracao, saldos[i])
+                saldos[i] -= pagamento_extra
                 saldo_disponivel -= pagamento_extra
 
-    # 3. Aplicar Juros sobre o saldo restante
-    juros_totais = 0
-    saldo_devedor_total = 0
+        while saldo_disponivel > 0 and fila:
+            i = fila[0][1]
+            if saldos[i] <= 0:
+                heapq.heappop(fila)  # Quitada: sai da fila de vez
+                continue
+            # Financiamentos (Price/SAC) recalculam a parcela no fim do mês, no modo de antecipação deles
+            pagamento_extra = saldo_disponivel
+            if pagamento_extra > saldos[i]:
+                pagamento_extra = saldos[i]
+
+            saldos[i] -= pagamento_extra
+            saldo_disponivel -= pagamento_extra
+            if saldos[i] <= 0:
+                heapq.heappop(fila)
+
+    if perfil:
+        fim_extra = perf_counter()
+        perfil.registrar('simular_mes/extra', fim_extra - fim_minimo)
+
+    # 4. (main) Aplicar Juros sobre o saldo restante; fechar o mês
+    saldo_devedor_total = 0.0
     dividas_ativas = 0
-    
-    for div in dividas:
-        if div.saldo_devedor > 0.01: # Considerar quitado se for centavos
+
+    for i in ativas:
+        if juros_antes_do_extra:
+            saldo_devedor_total += saldos[i]
+            if saldos[i] <= 0:
+                continue
+        elif saldos[i] > 0.01:  # Considerar quitado se for centavos
             # Só projeta juros se não for parcela fixa sem juros compostos (ex: carro)
             # No data.py colocamos juros 0 para o carro para simplificar
-            juros = div.aplicar_juros()
+            juros = saldos[i] * taxas[i]
+            saldos[i] += juros
             juros_totais += juros
-            saldo_devedor_total += div.saldo_devedor
-            dividas_ativas += 1
-            
-            # Decrementar prazo se houver
-            if div.prazo_restante_meses and div.prazo_restante_meses > 0:
-                div.prazo_restante_meses -= 1
+            saldo_devedor_total += saldos[i]
+        else:
+            saldos[i] = 0.0
+            continue
+        dividas_ativas += 1
+
+        # Decrementar prazo se houver
+        if prazos[i] and prazos[i] > 0:
+            prazos[i] -= 1
+
+    carteira.ativas = [i for i in ativas if saldos[i] > 0]
+
+    # 5. Financiamentos: parcela do próximo mês pelo saldo que sobrou (fórmula fechada)
+    if carteira.financiamentos:
+        for i, (sistema, modo, amortizacao) in carteira.financiamentos.items():
+            if saldos[i] > 0:
+                fixa = modo == REDUZIR_PRAZO
+                parcelas[i] = parcela_do_mes(saldos[i] / (1 + taxas[i]), taxas[i], prazos[i], sistema,
+                                             parcela=parcelas[i] if fixa and sistema == PRICE else None,
+                                             amortizacao=amortizacao if fixa else None)
+
+    if perfil:
+        if not juros_antes_do_extra:
+            perfil.registrar('simular_mes/juros', perf_counter() - fim_extra)
+        perfil.contar('meses_simulados')
+
+    return saldo_devedor_total, juros_totais, dividas_ativas
+
+# Diagnóstico analítico do rumo da carteira
+QUITACAO_GARANTIDA = 'quitacao_garantida'
+INVIAVEL = 'inviavel'
+MESES_LIMITE_SEGURANCA = 1200  # 100 anos: só para carteiras no limiar exato, que o diagnóstico não decide
+MESES_POR_PROGRESSO = 12  # De quantos em quantos meses `simular_quitacao` avisa o andamento
+
+def diagnosticar(carteira: CarteiraSimulada, saldo_mensal: float, juros_antes_do_extra: bool = False) -> Optional[str]:
+    """
+    Decide, sem simular, se a carteira com certeza será quitada ou nunca será.
+    - Quitação garantida: com P = sobra mensal e r = maior taxa ativa, a dívida total T
+      cai todo mês enquanto T < P(1+r)/r (juros depois do extra) ou T < P/r (juros antes).
+      Sem juros, basta haver sobra ou parcela em todas as dívidas.
+    - Inviável: as dívidas com juros (menor taxa r*, soma S) recebem no máximo
+      M = max(sobra, soma das parcelas) por mês; se S > M(1+r*)/r*, os juros
+      superam qualquer pagamento e S cresce para sempre. Nada é pago (M <= 0) também é inviável.
+    As duas condições, uma vez verdadeiras, continuam verdadeiras nos meses seguintes.
+    Retorna QUITACAO_GARANTIDA, INVIAVEL ou None (ainda indefinido).
+    """
+    saldos, taxas = carteira.saldos, carteira.taxas
+    saldo_total = 0.0
+    saldo_com_juros = 0.0
+    soma_parcelas = 0.0
+    todas_com_parcela = True
+    taxa_max = 0.0
+    taxa_min = None
+    for i in carteira.ativas:
+        saldo_total += saldos[i]
+        soma_parcelas += carteira.parcelas[i]
+        todas_com_parcela = todas_com_parcela and carteira.parcelas[i] > 0
+        taxa = taxas[i]
+        if taxa > 0:
+            saldo_com_juros += saldos[i]
+            taxa_max = max(taxa_max, taxa)
+            taxa_min = taxa if taxa_min is None else min(taxa_min, taxa)
+
+    # 1. Quitação garantida (sem juros, basta cada dívida receber algo todo mês)
+    if taxa_max == 0:
+        if saldo_mensal > 0 or todas_com_parcela:
+            return QUITACAO_GARANTIDA
+    elif saldo_mensal > 0:
+        limite = saldo_mensal / taxa_max if juros_antes_do_extra else saldo_mensal * (1 + taxa_max) / taxa_max
+        if saldo_total < limite:
+            return QUITACAO_GARANTIDA
+
+    # 2. Inviável (folga de 1 centavo por dívida pelo arredondamento dos saldos de centavos)
+    capacidade = max(saldo_mensal, soma_parcelas)
+    if capacidade <= 0:
+        return INVIAVEL
+    if taxa_min is not None:
+        capacidade += 0.01 * len(carteira.ativas)
+        if saldo_com_juros > capacidade * (1 + taxa_min) / taxa_min:
+            return INVIAVEL
+    return None
+
+class ResultadoQuitacao(NamedTuple):
+    meses: int
+    juros_totais: float
+    quitado: bool
+    historico: List[float]  # Dívida total no começo de cada mês; o último é o saldo final
+    mes_quitacao_garantida: Optional[int] = None  # Mês a partir do qual a quitação ficou garantida
+    mes_inviavel: Optional[int] = None  # Mês em que ficou provado que a dívida nunca será quitada
+
+def simular_quitacao(saldo_mensal: float, carteira: CarteiraSimulada, estrategia: str = 'avalanche',
+                     juros_antes_do_extra: bool = False, max_meses: Optional[int] = None,
+                     progresso: Optional[Callable[[int, List[float]], None]] = None) -> ResultadoQuitacao:
+    """
+    API única de simulação até quitar (usada pelo app e pelo main.py). Altera `carteira`.
+    Sem teto de meses por padrão: financiamentos de 360-420 meses rodam até o fim, e
+    carteiras impagáveis param no mês em que `diagnosticar` prova que nunca serão quitadas.
+    Depois que a quitação fica garantida o diagnóstico não roda mais, e os trechos sem
+    evento (nenhuma quitação nem troca de alvo) passam a ser saltados pela forma fechada
+    de `fastforward.avancar`, quando a carteira permite (`fastforward.pode_saltar`).
+    `progresso(meses, historico)` é chamado a cada MESES_POR_PROGRESSO meses (ou ao fim do
+    salto que passar de um múltiplo deles); se levantar exceção (ex: job cancelado), a
+    simulação para ali.
+    """
+    saldo_total = carteira.saldo_total()
+    historico = [saldo_total]
+    juros_totais = 0.0
+    meses = 0
+    mes_garantido = mes_inviavel = None
+    limite = max_meses if max_meses is not None else MESES_LIMITE_SEGURANCA
+    rapido = pode_saltar(carteira, estrategia)
+    proxima_tentativa = 0  # Salto recusado: só tenta de novo depois do evento que estava perto
+    while saldo_total > 1 and meses < limite:
+        antes = meses
+        salto = None
+        if mes_garantido is None:
+            diagnostico = diagnosticar(carteira, saldo_mensal, juros_antes_do_extra)
+            if diagnostico == INVIAVEL:
+                mes_inviavel = meses
+                break
+            if diagnostico == QUITACAO_GARANTIDA:
+                mes_garantido = meses
+        elif rapido and meses >= proxima_tentativa:
+            salto = avancar(carteira, saldo_mensal, estrategia, juros_antes_do_extra, limite - meses)
+            proxima_tentativa = meses + salto.proximo_evento
+        if salto is not None and salto.meses:
+            juros_mes = salto.juros
+            saldo_total = salto.totais[-1]
+            historico.extend(salto.totais)
+            meses += salto.meses
         else:
-            div.saldo_devedor = 0
+            saldo_total, juros_mes, _ = simular_mes_carteira(carteira, saldo_mensal, estrategia, juros_antes_do_extra)
+            historico.append(saldo_total)
+            meses += 1
+        juros_totais += juros_mes
+        if progresso is not None and meses // MESES_POR_PROGRESSO > antes // MESES_POR_PROGRESSO:
+            progresso(meses, historico)
+    return ResultadoQuitacao(meses, juros_totais, saldo_total <= 1, historico, mes_garantido, mes_inviavel)
+
+# ==================== API POR OBJETOS `Divida` ====================
+class IndiceAlocacao:
+    """
+    Liga uma lista de `Divida` ao estado compacto do núcleo entre os meses.
+    Passado mês após mês para simular_mes, reaproveita conjunto ativo e filas.
+    Enquanto o índice estiver em uso, as dívidas só devem mudar via simular_mes.
+    """
+    def __init__(self, dividas: List[Divida]):
+        self.carteira = CarteiraSimulada.de_dividas(dividas)
+
+def simular_mes(renda: float, despesas: float, dividas: List[Divida], estrategia: str = 'avalanche',
+                indice: Optional[IndiceAlocacao] = None) -> Dict:
+    """
+    Simula um mês de pagamentos, alterando as dívidas no lugar.
+    Passe o mesmo `indice` mês após mês para reaproveitar o conjunto ativo e a fila.
+    Retorna o resumo do mês.
+    """
+    if indice is None:
+        indice = IndiceAlocacao(dividas)
+    carteira = indice.carteira
+    tocadas = carteira.ativas  # O núcleo troca a lista; esta fica com as ativas do começo do mês
+
+    saldo_devedor_total, juros_totais, dividas_ativas = simular_mes_carteira(carteira, renda - despesas, estrategia)
+
+    for i in tocadas:
+        dividas[i].saldo_devedor = carteira.saldos[i]
+        dividas[i].prazo_restante_meses = carteira.prazos[i]
 
     return {
         "saldo_devedor_total": saldo_devedor_total,
         "juros_pagos_mes": juros_totais,
         "dividas_ativas": dividas_ativas
     }
+
+class MesSimulado(NamedTuple):
+    """Retrato compacto de um mês (mês 0 = situação inicial)."""
+    mes: int
+    saldo_devedor_total: float
+    juros_pagos_mes: float
+    dividas_ativas: int
+    saldos: Optional[Tuple[float, ...]] = None  # Por dívida, só se pedido
+
+def iter_meses(renda: float, despesas: float, dividas: List[Divida], estrategia: str = 'avalanche',
+               max_meses: int = MESES_LIMITE_SEGURANCA, por_divida: bool = False,
+               juros_antes_do_extra: bool = False, parar_inviaveis: bool = True) -> Iterator[MesSimulado]:
+    """
+    Gera os meses da simulação um a um, sem guardar histórico.
+    Para quando a dívida total fica <= R$ 1, ao atingir `max_meses` ou quando
+    quem consome parar de pedir; com `parar_inviaveis`, também no mês em que
+    `diagnosticar` prova que a carteira nunca será quitada (como `simular_quitacao`).
+    Trabalha sobre o estado compacto: `dividas` não muda.
+    """
+    carteira = CarteiraSimulada.de_dividas(dividas)
+
+    def saldos():
+        return tuple(carteira.saldos) if por_divida else None
+
+    saldo_total = carteira.saldo_total()
+    yield MesSimulado(0, saldo_total, 0.0, len(carteira.ativas), saldos())
+
+    mes = 0
+    diagnostico = None if parar_inviaveis else QUITACAO_GARANTIDA
+    while saldo_total > 1 and mes < max_meses:
+        if diagnostico != QUITACAO_GARANTIDA:
+            diagnostico = diagnosticar(carteira, renda - despesas, juros_antes_do_extra)
+            if diagnostico == INVIAVEL:
+                return
+        mes += 1
+        saldo_total, juros_mes, dividas_ativas = simular_mes_carteira(carteira, renda - despesas, estrategia,
+                                                                      juros_antes_do_extra)
+        yield MesSimulado(mes, saldo_total, juros_mes, dividas_ativas, saldos())
+
+# Redutores: consomem o gerador só até onde precisam
+def mes_quitacao(meses: Iterable[MesSimulado]) -> Optional[int]:
+    """Mês em que a dívida total chega a <= R$ 1 (None se não chegar)."""
+    for m in meses:
+        if m.saldo_devedor_total <= 1:
+            return m.mes
+    return None
+
+def somar_juros(meses: Iterable[MesSimulado]) -> float:
+    return sum(m.juros_pagos_mes for m in meses)
+
+def saldo_no_mes(meses: Iterable[MesSimulado], mes: int) -> Optional[float]:
+    """Dívida total no fim do mês `mes` (None se a simulação acabou antes)."""
+    for m in meses:
+        if m.mes == mes:
+            return m.saldo_devedor_total
+    return None
+
+def primeiro_mes_abaixo(meses: Iterable[MesSimulado], limite: float) -> Optional[int]:
+    """Primeiro mês em que a dívida total fica abaixo de `limite`."""
+    for m in meses:
+        if m.saldo_devedor_total < limite:
+            return m.mes
+    return None
@@ -0,0 +1,237 @@
+from dataclasses import dataclass
+from typing import Dict, Sequence
+
+import numpy as np
+
+from models import Divida
+from batch import CarteiraLote, NomeEstrategia, inviaveis_lote
+from calculator import MESES_LIMITE_SEGURANCA
+from strategies import EstrategiasPorLinha, ordem_extra
+
+ESCALA_TAXA = 10 ** 8  # Taxas guardadas como inteiros em 1e-8 (mesma precisão de `cache.chave_simulacao`)
+LIMITE_CENTAVOS = (2 ** 63 - 1) // ESCALA_TAXA  # Maior saldo por dívida em que saldo * taxa cabe em int64
+
+
+def para_centavos(valores) -> np.ndarray:
+    """Reais (float) para centavos int64, arredondando no centavo mais próximo (empate: par)."""
+    return np.rint(np.asarray(valores, dtype=float) * 100).astype(np.int64)
+
+
+def para_reais(centavos) -> np.ndarray:
+    return np.asarray(centavos) / 100
+
+
+def juros_bancario(saldos: np.ndarray, taxas: np.ndarray) -> np.ndarray:
+    """
+    saldo * taxa em centavos inteiros, com arredondamento bancário (meio centavo vai
+    para o par) feito na aritmética inteira: sem erro de float, o mesmo resultado em
+    qualquer máquina. `taxas` em unidades de 1/ESCALA_TAXA.
+    """
+    quociente, resto = np.divmod(saldos * taxas, ESCALA_TAXA)
+    sobe = (2 * resto > ESCALA_TAXA) | ((2 * resto == ESCALA_TAXA) & (quociente % 2 == 1))
+    return quociente + sobe
+
+
+def cabem_em_centavos(lote: CarteiraLote) -> np.ndarray:
+    """True nas carteiras que o motor em centavos aceita (taxas de 0 a 100% a.m., saldos até LIMITE_CENTAVOS)."""
+    taxas_ok = ((lote.taxas >= 0) & (lote.taxas <= 1)).all(axis=1)
+    valores_ok = ((lote.saldos >= 0) & (lote.saldos < LIMITE_CENTAVOS / 100)
+                  & (lote.parcelas >= 0) & (lote.parcelas < LIMITE_CENTAVOS / 100)).all(axis=1)
+    return taxas_ok & valores_ok
+
+
+@dataclass
+class CarteiraCentavos:
+    """
+    `batch.CarteiraLote` com dinheiro em centavos int64 e taxas em 1e-8 (int64).
+    Saldos e parcelas são arredondados no centavo uma vez, na entrada.
+    """
+    saldos: np.ndarray
+    taxas: np.ndarray
+    parcelas: np.ndarray
+    prazos: np.ndarray  # -1 quando a dívida não tem prazo fixo
+
+    @classmethod
+    def from_lote(cls, lote: CarteiraLote) -> "CarteiraCentavos":
+        taxas = lote.taxas
+        if np.any(taxas < 0) or np.any(taxas > 1):
+            raise ValueError("Taxas mensais precisam estar entre 0 e 1 (100% a.m.)")
+        carteira = cls(para_centavos(lote.saldos), np.rint(taxas * ESCALA_TAXA).astype(np.int64),
+                       para_centavos(lote.parcelas), lote.prazos.astype(np.int64))
+        if np.any(carteira.saldos > LIMITE_CENTAVOS):
+            raise ValueError(f"Saldo acima do limite do motor em centavos (R$ {LIMITE_CENTAVOS / 100:,.2f} por dívida)")
+        return carteira
+
+    @classmethod
+    def from_dividas(cls, carteiras: Sequence[Sequence[Divida]]) -> "CarteiraCentavos":
+        return cls.from_lote(CarteiraLote.from_dividas(carteiras))
+
+    @property
+    def n_carteiras(self) -> int:
+        return self.saldos.shape[0]
+
+    def copy(self) -> "CarteiraCentavos":
+        return CarteiraCentavos(self.saldos.copy(), self.taxas.copy(), self.parcelas.copy(), self.prazos.copy())
+
+
+def simular_mes_centavos(saldo_disponivel: np.ndarray, saldos: np.ndarray, taxas: np.ndarray,
+                         parcelas: np.ndarray, prazos: np.ndarray, estrategia: NomeEstrategia,
+                         juros_antes_do_extra: bool = False) -> Dict:
+    """
+    Mesmo mês de `batch.simular_mes_arrays`, em centavos inteiros. Altera `saldos`
+    e `prazos` no lugar. Sem limiares: uma dívida está ativa enquanto deve ao menos
+    1 centavo, e os juros de cada dívida são arredondados no centavo todo mês.
+    """
+    # 1. Pagar parcelas fixas/mínimas obrigatórias
+    pagamento = np.minimum(parcelas, saldos)
+    saldos -= pagamento
+    pagamento_total_dividas = pagamento.sum(axis=1)
+    saldo_disponivel = saldo_disponivel - pagamento_total_dividas
+
+    if juros_antes_do_extra:
+        juros = juros_bancario(saldos, taxas)
+        saldos += juros
+
+    # 2. Antecipar dívidas com a sobra, em cascata na ordem da estratégia (soma exata)
+    if np.any(saldo_disponivel > 0):
+        ordem = ordem_extra(para_reais(saldos), taxas / ESCALA_TAXA, para_reais(parcelas), estrategia)
+        saldos_ordenados = np.take_along_axis(saldos, ordem, axis=1)
+        acumulado_anterior = np.cumsum(saldos_ordenados, axis=1) - saldos_ordenados
+        extra_ordenado = np.clip(saldo_disponivel[:, None] - acumulado_anterior, 0, saldos_ordenados)
+
+        extra = np.empty_like(extra_ordenado)
+        np.put_along_axis(extra, ordem, extra_ordenado, axis=1)
+        saldos -= extra
+        pagamento_total_dividas += extra.sum(axis=1)
+        pagamento += extra
+
+    # 3. Aplicar juros sobre o saldo restante
+    if not juros_antes_do_extra:
+        juros = juros_bancario(saldos, taxas)
+        saldos += juros
+    ativas = saldos > 0
+    prazos[ativas & (prazos > 0)] -= 1
+
+    return {
+        "saldo_devedor_total": saldos.sum(axis=1),
+        "juros_pagos_mes": juros.sum(axis=1),
+        "dividas_ativas": ativas.sum(axis=1),
+        "pagamento_total_dividas": pagamento_total_dividas,
+        "pagamento_por_divida": pagamento,
+        "juros_por_divida": juros
+    }
+
+
+def simular_quitacao_centavos(renda, despesas, carteira: CarteiraCentavos, estrategia: NomeEstrategia = 'avalanche',
+                              max_meses: int = MESES_LIMITE_SEGURANCA, juros_antes_do_extra: bool = False,
+                              parar_inviaveis: bool = True, registrar_historico: bool = False) -> Dict:
+    """
+    `batch.simular_quitacao_lote` em centavos: cada carteira roda até o saldo ficar
+    exatamente zerado (e não "<= R$ 1") ou atingir `max_meses`. `renda` e `despesas`
+    em reais (escalares ou um valor por carteira). Altera `carteira`.
+    Carteiras cujo saldo passa de LIMITE_CENTAVOS (juros fora de controle) saem como
+    inviáveis, para a conta seguir exata em int64. Valores do resumo em centavos.
+    Como no motor em float, `estrategia` pode ter um nome por carteira.
+    """
+    n = carteira.n_carteiras
+    por_carteira = not isinstance(estrategia, str)
+    if por_carteira:
+        estrategia = EstrategiasPorLinha.de_nomes(estrategia)
+    saldo_mensal = np.broadcast_to(para_centavos(np.asarray(renda, dtype=float) - np.asarray(despesas, dtype=float)),
+                                   (n,)).copy()
+    meses = np.zeros(n, dtype=np.int64)
+    juros_totais = np.zeros(n, dtype=np.int64)
+    inviavel = np.zeros(n, dtype=bool)
+
+    restantes = np.flatnonzero(carteira.saldos.sum(axis=1) > 0)
+    estrategias = estrategia.linhas(restantes) if por_carteira else estrategia
+    saldos = carteira.saldos[restantes]
+    taxas = carteira.taxas[restantes]
+    parcelas = carteira.parcelas[restantes]
+    prazos = carteira.prazos[restantes]
+    historico = np.zeros((n, max_meses + 1), dtype=np.int64) if registrar_historico else None
+    if registrar_historico:
+        historico[:, 0] = carteira.saldos.sum(axis=1)
+
+    def tirar(saem: np.ndarray):
+        """Devolve ao lote as carteiras que terminaram e segue só com as demais."""
+        nonlocal restantes, estrategias, saldos, taxas, parcelas, prazos
+        carteira.saldos[restantes[saem]] = saldos[saem]
+        carteira.prazos[restantes[saem]] = prazos[saem]
+        continuam = ~saem
+        restantes = restantes[continuam]
+        if por_carteira:
+            estrategias = estrategias.linhas(continuam)
+        saldos, taxas = saldos[continuam], taxas[continuam]
+        parcelas, prazos = parcelas[continuam], prazos[continuam]
+
+    for mes in range(max_meses):
+        if restantes.size == 0:
+            break
+
+        if parar_inviaveis and mes % 12 == 0:
+            provadas = inviaveis_lote(para_reais(saldos), taxas / ESCALA_TAXA, para_reais(parcelas),
+                                      para_reais(saldo_mensal[restantes]))
+            if provadas.any():
+                inviavel[restantes[provadas]] = True
+                tirar(provadas)
+                if restantes.size == 0:
+                    break
+
+        resultado = simular_mes_centavos(saldo_mensal[restantes], saldos, taxas,
+                                         parcelas, prazos, estrategias, juros_antes_do_extra)
+        meses[restantes] += 1
+        juros_totais[restantes] += resultado["juros_pagos_mes"]
+        saldo_total = resultado["saldo_devedor_total"]
+        if registrar_historico:
+            historico[restantes, mes + 1] = saldo_total
+
+        # Quitadas saem; as que estouram o limite do int64 também (como inviáveis)
+        estouradas = saldo_total > LIMITE_CENTAVOS
+        inviavel[restantes[estouradas]] = True
+        saem = (saldo_total == 0) | estouradas
+        if saem.any():
+            tirar(saem)
+
+    carteira.saldos[restantes] = saldos
+    carteira.prazos[restantes] = prazos
+    saldo_final = carteira.saldos.sum(axis=1)
+
+    resumo = {
+        "meses": meses,
+        "juros_totais": juros_totais,
+        "saldo_final": saldo_final,
+        "quitado": saldo_final == 0,
+        "inviavel": inviavel
+    }
+    if registrar_historico:
+        resumo["historico"] = historico
+    return resumo
+
+
+def comparar_com_float(renda, despesas, lote: CarteiraLote, estrategia: str = 'avalanche',
+                       max_meses: int = MESES_LIMITE_SEGURANCA, juros_antes_do_extra: bool = False) -> Dict:
+    """
+    Roda o mesmo lote nos dois motores (float de `batch.py` e centavos) e mede onde
+    divergem. Meses e juros (R$) são comparados nas carteiras que os dois quitam;
+    as impagáveis saem cedo nos dois (`parar_inviaveis`) e só contam em `quitacao_diferente`.
+    """
+    from batch import simular_quitacao_lote
+
+    r_float = simular_quitacao_lote(renda, despesas, lote.copy(), estrategia, max_meses, juros_antes_do_extra,
+                                    parar_inviaveis=True)
+    r_cent = simular_quitacao_centavos(renda, despesas, CarteiraCentavos.from_lote(lote), estrategia,
+                                       max_meses, juros_antes_do_extra, parar_inviaveis=True)
+    ambas = r_float["quitado"] & r_cent["quitado"]
+    diferenca_meses = (r_cent["meses"] - r_float["meses"])[ambas]
+    diferenca_juros = np.abs(para_reais(r_cent["juros_totais"]) - r_float["juros_totais"])[ambas]
+    return {
+        "carteiras": lote.n_carteiras,
+        "quitadas_nos_dois": int(ambas.sum()),
+        "quitacao_diferente": int(np.count_nonzero(r_cent["quitado"] != r_float["quitado"])),
+        "meses_diferentes": int(np.count_nonzero(diferenca_meses)),
+        "meses_a_mais": int(np.count_nonzero(diferenca_meses > 0)),
+        "maior_diferenca_meses": int(np.abs(diferenca_meses).max(initial=0)),
+        "diferenca_juros_media": float(diferenca_juros.mean()) if diferenca_juros.size else 0.0,
+        "diferenca_juros_maxima": float(diferenca_juros.max(initial=0.0))
+    }
@@ -0,0 +1,55 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import Divida
+from batch import CarteiraLote, simular_quitacao_lote
+from calculator import MESES_LIMITE_SEGURANCA
+from strategies import estrategias_registradas, obter_estrategia
+
+
+def repetir_por_estrategia(lote: CarteiraLote, nomes: Sequence[str]) -> Tuple[CarteiraLote, np.ndarray]:
+    """
+    Lote com cada carteira repetida uma vez por estratégia (linha i * len(nomes) + k é a
+    carteira i com a estratégia nomes[k]) e o nome da estratégia de cada linha, para
+    `simular_quitacao_lote` rodar todas numa passada só.
+    """
+    repetido = CarteiraLote(*(np.repeat(m, len(nomes), axis=0)
+                              for m in (lote.saldos, lote.taxas, lote.parcelas, lote.prazos)))
+    return repetido, np.tile(np.asarray(nomes), lote.n_carteiras)
+
+
+def comparar_estrategias(dividas: List[Divida], saldo_mensal: float, estrategias: Optional[Sequence[str]] = None,
+                         max_meses: int = MESES_LIMITE_SEGURANCA, juros_antes_do_extra: bool = True) -> List[Dict]:
+    """
+    Quitação da mesma carteira com cada estratégia (padrão: todas as registradas,
+    plugins incluídos), numa passada só do motor em lote: a carteira é montada uma vez
+    e repetida uma linha por estratégia. Carteiras impagáveis param quando isso fica
+    provado (`inviavel`). Para cada estratégia, devolve meses, juros e a ordem em que
+    as dívidas zeram (`ordem_quitacao`: pares (nome, mês), mês None se não quitou).
+    """
+    nomes = [e.nome for e in estrategias_registradas()] if estrategias is None else list(estrategias)
+    rotulos = [obter_estrategia(nome).rotulo for nome in nomes]  # Nome desconhecido: ValueError já aqui
+
+    # 1. Estado inicial montado uma vez e repetido por estratégia
+    lote, por_linha = repetir_por_estrategia(CarteiraLote.from_dividas([dividas]), nomes)
+
+    # 2. Todas as estratégias no mesmo lote
+    r = simular_quitacao_lote(saldo_mensal, 0.0, lote, por_linha, max_meses, juros_antes_do_extra,
+                              parar_inviaveis=True, registrar_quitacao_dividas=True)
+
+    # 3. Ordem de quitação por estratégia (empates no mesmo mês: ordem de cadastro)
+    comparacao = []
+    for i, (nome, rotulo) in enumerate(zip(nomes, rotulos)):
+        quitacao = r["quitacao_dividas"][i]
+        ordem = sorted(range(len(dividas)), key=lambda j: (quitacao[j] < 0, quitacao[j]))
+        comparacao.append({
+            "nome": nome,
+            "rotulo": rotulo,
+            "meses": int(r["meses"][i]),
+            "juros_totais": float(r["juros_totais"][i]),
+            "quitado": bool(r["quitado"][i]),
+            "inviavel": bool(r["inviavel"][i]),
+            "ordem_quitacao": [(dividas[j].nome, int(quitacao[j]) if quitacao[j] >= 0 else None) for j in ordem]
+        })
+    return comparacao
@@ -0,0 +1,182 @@
+import math
+from typing import List, Dict, NamedTuple
+
+import numpy as np
+
+from models import Divida
+
+ESTRATEGIAS_RAPIDAS = ('avalanche', 'snowball')  # Alvo do extra previsível pela forma fechada
+CELULAS_POR_SALTO = 1_000_000  # Meses x dívidas avaliados por salto (limita a memória)
+SALTO_MINIMO = 8  # Trechos regulares mais curtos que isso saem mais baratos mês a mês
+
+
+class Salto(NamedTuple):
+    meses: int  # 0: nenhum salto (o próximo evento está perto demais)
+    juros: float
+    totais: List[float]  # Dívida total no fim de cada mês saltado
+    proximo_evento: int  # Sem salto: em quantos meses vale tentar de novo
+
+
+def pode_saltar(carteira, estrategia: str) -> bool:
+    """
+    Saltos valem sem financiamentos Price/SAC (a parcela deles muda todo mês) e para
+    estratégias cujo alvo a forma fechada acompanha. O prazo das dívidas comuns não
+    muda os pagamentos no núcleo, então não interfere.
+    """
+    return not carteira.financiamentos and estrategia in ESTRATEGIAS_RAPIDAS
+
+
+def _serie(inicio: np.ndarray, pagamento: np.ndarray, taxas: np.ndarray, k: np.ndarray) -> np.ndarray:
+    """
+    Matriz (meses x dívidas) de x(k) com x(0) = `inicio` e x(k+1) = (1 + taxa) * x(k) - pagamento:
+    ponto fixo pagamento/taxa mais a distância até ele crescendo (1 + taxa)^k; sem juros, reta.
+    """
+    com_juros = taxas > 0
+    ponto_fixo = np.divide(pagamento, taxas, out=np.zeros_like(pagamento), where=com_juros)
+    geometrica = ponto_fixo + (inicio - ponto_fixo) * (1 + taxas) ** k
+    return np.where(com_juros, geometrica, inicio - k * pagamento)
+
+
+def _meses_acima(inicio: float, pagamento: float, taxa: float, piso: float) -> float:
+    """
+    Quantos termos de x(k+1) = (1 + taxa) * x(k) - pagamento, a partir de x(0) = `inicio`,
+    ficam acima de `piso` (inf se nunca cai). Estimativa pelo log, só para dimensionar o
+    salto: a matriz de `_serie` confere mês a mês.
+    """
+    if inicio <= piso:
+        return 0
+    if taxa == 0:
+        return (inicio - piso) / pagamento if pagamento > 0 else math.inf
+    ponto_fixo = pagamento / taxa
+    if inicio >= ponto_fixo or ponto_fixo <= piso:
+        return math.inf  # Juros >= pagamento: o saldo nunca cai até o piso
+    return math.log((ponto_fixo - piso) / (ponto_fixo - inicio)) / math.log1p(taxa)
+
+
+def avancar(carteira, saldo_mensal: float, estrategia: str = 'avalanche', juros_antes_do_extra: bool = False,
+            limite: int = 1200) -> Salto:
+    """
+    Aplica de uma vez os meses regulares seguintes (até `limite`): nenhuma dívida quita,
+    o alvo do extra não muda e o saldo total segue acima de R$ 1 (o mês em que cai para
+    <= R$ 1 entra no salto, já que a simulação para ali). Nesse trecho cada saldo segue
+    uma recorrência geométrica fixa, nas duas ordens de juros de `simular_mes_carteira`:
+    - juros depois do extra: u(k+1) = (1+r) u(k) - (parcela + extra), u = saldo pós-pagamento;
+    - juros antes do extra: s(k+1) = (1+r) s(k) - ((1+r) parcela + extra).
+    Altera `carteira` (saldos e prazos). Se o próximo evento está a menos de SALTO_MINIMO
+    meses (esses saem mais baratos simulados um a um), não salta e devolve em
+    `proximo_evento` quantos meses simular antes de tentar de novo.
+    """
+    ativas = carteira.ativas
+    sem_salto = Salto(0, 0.0, [], 1)
+    if not ativas or limite <= 0:
+        return sem_salto
+    saldos = [carteira.saldos[i] for i in ativas]
+    taxas = [carteira.taxas[i] for i in ativas]
+    parcelas = [carteira.parcelas[i] for i in ativas]
+    if any(saldo <= parcela for saldo, parcela in zip(saldos, parcelas)):
+        return sem_salto  # Alguma parcela quita a dívida já neste mês
+
+    # 1. Alvo do extra (empates: a dívida que vem antes, como no heap do núcleo)
+    extras = [0.0] * len(ativas)
+    extra = saldo_mensal - sum(parcelas)
+    alvo = None
+    if extra > 0:
+        if estrategia == 'avalanche':
+            alvo = max(range(len(ativas)), key=taxas.__getitem__)
+        else:  # snowball: menor saldo no momento do extra
+            alvo = min(range(len(ativas)), key=lambda j: (saldos[j] - parcelas[j])
+                       * (1 + taxas[j] if juros_antes_do_extra else 1))
+        extras[alvo] = extra
+
+    # 2. Quantos meses até a primeira quitação (estimativa em Python: custa menos que um mês simulado)
+    if juros_antes_do_extra:
+        estimativa = min(_meses_acima(s, (1 + r) * p + e, r, 0.0)
+                         for s, r, p, e in zip(saldos, taxas, parcelas, extras)) - 1
+    else:
+        estimativa = min(_meses_acima(s - p - e, p + e, r, 0.01)
+                         for s, r, p, e in zip(saldos, taxas, parcelas, extras))
+    if estimativa < SALTO_MINIMO:
+        return sem_salto._replace(proximo_evento=max(1, int(estimativa)))
+
+    # 3. Saldos dos próximos meses pela forma fechada, conferidos mês a mês
+    saldos, taxas = np.array(saldos, dtype=float), np.array(taxas, dtype=float)
+    parcelas, extras = np.array(parcelas, dtype=float), np.array(extras, dtype=float)
+    n = int(min(limite, max(1, CELULAS_POR_SALTO // len(ativas)), estimativa + 2))
+    k = np.arange(n)[:, None]
+    if juros_antes_do_extra:
+        fim = _serie(saldos, (1 + taxas) * parcelas + extras, taxas, k + 1)  # Saldo no fim de cada mês
+        regular = np.all(fim > 0, axis=1)
+        chave = fim + extras  # Saldo quando o extra é escolhido
+    else:
+        pos_pagamento = _serie(saldos - parcelas - extras, parcelas + extras, taxas, k)
+        fim = pos_pagamento * (1 + taxas)
+        regular = np.all(pos_pagamento > 0.01, axis=1)  # Centavos são zerados: quitação
+        chave = pos_pagamento + extras
+    if alvo is not None and estrategia == 'snowball':
+        regular &= np.argmin(chave, axis=1) == alvo
+    meses = n if regular.all() else int(np.argmin(regular))
+    totais = fim[:meses].sum(axis=1)
+    abaixo = np.flatnonzero(totais <= 1)
+    if abaixo.size:
+        meses = int(abaixo[0]) + 1
+    if meses == 0:
+        return sem_salto
+
+    # 4. Aplicar o salto
+    finais = fim[meses - 1]
+    juros = float(np.sum(finais - saldos + meses * (parcelas + extras)))  # Variação do saldo + tudo o que foi pago
+    for i, saldo in zip(ativas, finais.tolist()):
+        carteira.saldos[i] = saldo
+        prazo = carteira.prazos[i]
+        if prazo and prazo > 0:
+            carteira.prazos[i] = max(prazo - meses, 0)
+    return Salto(meses, juros, totais[:meses].tolist(), 0)
+
+
+def simular_quitacao_rapida(renda: float, despesas: float, dividas: List[Divida],
+                            estrategia: str = 'avalanche', max_meses: int = 600,
+                            juros_antes_do_extra: bool = False) -> Dict:
+    """
+    Mesmo resultado do laço mês a mês com `simular_mes_carteira` (até saldo total <= R$ 1),
+    mas saltando de evento em evento pela forma fechada (`avancar`). Só os meses de
+    evento (quitação, troca de alvo) são simulados um a um, então o custo cresce com o
+    número de dívidas, não de meses. Altera as dívidas no lugar, como `simular_mes`.
+    """
+    from calculator import CarteiraSimulada, simular_mes_carteira
+
+    carteira = CarteiraSimulada.de_dividas(dividas)
+    saldo_mensal = renda - despesas
+    rapido = pode_saltar(carteira, estrategia)
+    meses = 0
+    juros_totais = 0.0
+    passos = 0
+    eventos = []
+
+    while meses < max_meses and carteira.saldo_total() > 1:
+        passos += 1
+        if rapido:
+            salto = avancar(carteira, saldo_mensal, estrategia, juros_antes_do_extra, max_meses - meses)
+            if salto.meses:
+                meses += salto.meses
+                juros_totais += salto.juros
+                continue
+
+        # Mês de evento: simulado exatamente
+        ativas_antes = carteira.ativas
+        _, juros, _ = simular_mes_carteira(carteira, saldo_mensal, estrategia, juros_antes_do_extra)
+        meses += 1
+        juros_totais += juros
+        eventos.extend({'mes': meses, 'evento': f"Quitada: {dividas[i].nome}"}
+                       for i in ativas_antes if carteira.saldos[i] <= 0)
+
+    for d, saldo, prazo in zip(dividas, carteira.saldos, carteira.prazos):
+        d.saldo_devedor, d.prazo_restante_meses = saldo, prazo
+    saldo_final = carteira.saldo_total()
+    return {
+        "meses": meses,
+        "juros_totais": juros_totais,
+        "saldo_devedor_total": saldo_final,
+        "quitado": saldo_final <= 1,
+        "eventos": eventos,
+        "passos": passos
+    }
@@ -0,0 +1,236 @@
+from dataclasses import dataclass, replace
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from models import Divida
+
+Valor = Union[float, np.ndarray]
+
+# Sistemas de amortização
+PRICE = 'price'  # Parcela constante
+SAC = 'sac'  # Amortização constante, parcela decrescente
+
+# O que fazer com uma antecipação
+REDUZIR_PRAZO = 'reduzir_prazo'  # Mantém a parcela (Price) ou a amortização (SAC)
+REDUZIR_PARCELA = 'reduzir_parcela'  # Mantém o número de parcelas
+
+
+def _saida(valor: np.ndarray) -> Valor:
+    """Escalar entra, escalar sai; arrays continuam arrays."""
+    return valor if valor.ndim else float(valor)
+
+
+# ==================== FÓRMULAS FECHADAS (escalares ou arrays) ====================
+def parcela_price(saldo: Valor, taxa: Valor, prazo: Valor) -> Valor:
+    """Parcela constante que quita `saldo` em `prazo` meses: S·r / (1 - (1+r)^-n)."""
+    saldo, taxa, prazo = np.asarray(saldo, float), np.asarray(taxa, float), np.asarray(prazo, float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        parcela = np.where(taxa > 0, saldo * taxa / -np.expm1(-prazo * np.log1p(taxa)), saldo / prazo)
+    return _saida(parcela)
+
+
+def prazo_para_quitar(saldo: Valor, taxa: Valor, parcela: Valor) -> Valor:
+    """Parcelas (a última possivelmente menor) para quitar `saldo` pagando `parcela`: ⌈-ln(1 - S·r/P) / ln(1+r)⌉."""
+    saldo, taxa, parcela = np.asarray(saldo, float), np.asarray(taxa, float), np.asarray(parcela, float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        meses = np.where(taxa > 0, -np.log1p(-saldo * taxa / parcela) / np.log1p(taxa), saldo / parcela)
+    # Folga contra ruído de ponto flutuante (ex: 35.0000000001); NaN = parcela não cobre os juros
+    return _saida(np.ceil(np.nan_to_num(meses, nan=np.inf) - 1e-9))
+
+
+def cronograma(saldo: Valor, taxa: Valor, prazo: Valor, sistema: str = PRICE,
+               parcela: Optional[Valor] = None, amortizacao: Optional[Valor] = None) -> Dict[str, np.ndarray]:
+    """
+    Tabela de amortização em forma fechada, sem iterar mês a mês.
+    Com arrays, calcula vários financiamentos de uma vez: cada coluna tem forma
+    (financiamentos x maior prazo), com zeros depois do fim de cada contrato.
+    Com escalares, vetores de tamanho `prazo`.
+    `parcela` (Price) ou `amortizacao` (SAC) fixam o valor do contrato depois de uma
+    antecipação que reduziu o prazo; a última parcela leva só o que sobrou.
+    Colunas: parcela, juros, amortizacao e saldo (depois do pagamento do mês).
+    """
+    escalar = all(np.ndim(valor) == 0 for valor in (saldo, taxa, prazo))
+    saldo, taxa, prazo = np.broadcast_arrays(np.atleast_1d(np.asarray(saldo, float)),
+                                             np.atleast_1d(np.asarray(taxa, float)),
+                                             np.atleast_1d(np.asarray(prazo, np.int64)))
+    n_max = int(prazo.max()) if prazo.size else 0
+    k = np.arange(n_max + 1, dtype=float)[None, :]  # Parcelas já pagas: 0..n
+    s, r, n = saldo[:, None], taxa[:, None], prazo[:, None]
+
+    if sistema == PRICE:
+        p = parcela_price(saldo, taxa, prazo) if parcela is None else parcela
+        p = np.broadcast_to(np.asarray(p, float), saldo.shape)[:, None]
+        # Saldo após k parcelas: S(1+r)^k - P((1+r)^k - 1)/r  (sem juros: S - kP)
+        crescimento = np.expm1(k * np.log1p(r))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            saldos = np.where(r > 0, s * (1 + crescimento) - p * crescimento / r, s - k * p)
+    elif sistema == SAC:
+        a = s / n if amortizacao is None else np.broadcast_to(np.asarray(amortizacao, float), saldo.shape)[:, None]
+        saldos = s - k * a
+    else:
+        raise ValueError(f"Sistema de amortização desconhecido: {sistema}")
+
+    saldos = np.where(k <= n, np.maximum(saldos, 0.0), 0.0)
+    vigente = k[:, 1:] <= n
+    juros = np.where(vigente, saldos[:, :-1] * r, 0.0)
+    amortizado = np.where(vigente, saldos[:, :-1] - saldos[:, 1:], 0.0)
+    tabela = {"parcela": amortizado + juros, "juros": juros, "amortizacao": amortizado, "saldo": saldos[:, 1:]}
+    if escalar:
+        tabela = {coluna: valores[0] for coluna, valores in tabela.items()}
+    return tabela
+
+
+def juros_restantes(saldo: Valor, taxa: Valor, prazo: Valor, sistema: str = PRICE,
+                    parcela: Optional[Valor] = None, amortizacao: Optional[Valor] = None) -> Valor:
+    """
+    Juros que ainda serão pagos até o fim do contrato, em forma fechada.
+    Price: n·P - S; com `parcela` fixa, a última parcela é só o que sobrou.
+    SAC: r·(soma dos saldos) = r·(n·S - A·n(n-1)/2), com A = S/n ou `amortizacao` e n = ⌈S/A⌉.
+    """
+    saldo, taxa, prazo = np.asarray(saldo, float), np.asarray(taxa, float), np.asarray(prazo, float)
+    if sistema == PRICE:
+        if parcela is None:
+            juros = prazo * parcela_price(saldo, taxa, prazo) - saldo
+        else:
+            parcela = np.asarray(parcela, float)
+            cheias = np.asarray(prazo_para_quitar(saldo, taxa, parcela)) - 1
+            crescimento = np.expm1(cheias * np.log1p(taxa))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                resto = saldo * (1 + crescimento) - parcela * np.where(taxa > 0, crescimento / taxa, cheias)
+            juros = parcela * cheias + resto * (1 + taxa) - saldo
+    else:
+        a = saldo / prazo if amortizacao is None else np.asarray(amortizacao, float)
+        n = np.ceil(saldo / a - 1e-9)
+        juros = taxa * (n * saldo - a * n * (n - 1) / 2)
+    return _saida(np.maximum(juros, 0.0))
+
+
+def taxa_implicita(saldo: Valor, parcela: Valor, prazo: Valor, iteracoes: int = 60) -> Valor:
+    """
+    Taxa mensal embutida numa parcela fixa (Price): resolve parcela_price(S, r, n) = P
+    por bisseção vetorizada. Serve para financiamentos cadastrados com juros 0%
+    ("juros já embutidos na parcela"), que a avalanche trataria como dívida sem custo.
+    """
+    saldo, parcela, prazo = np.broadcast_arrays(np.asarray(saldo, float), np.asarray(parcela, float),
+                                                np.asarray(prazo, float))
+    baixo = np.zeros(saldo.shape)
+    alto = np.ones(saldo.shape)  # 100% a.m. cobre qualquer contrato real
+    for _ in range(iteracoes):
+        meio = (baixo + alto) / 2
+        caro = np.asarray(parcela_price(saldo, meio, prazo)) > parcela
+        alto = np.where(caro, meio, alto)
+        baixo = np.where(caro, baixo, meio)
+    return _saida(np.where(parcela * prazo <= saldo, 0.0, (baixo + alto) / 2))
+
+
+def parcela_do_mes(saldo: float, taxa: float, prazo: Optional[int], sistema: str = PRICE,
+                   parcela: Optional[float] = None, amortizacao: Optional[float] = None) -> float:
+    """
+    Próxima parcela de um contrato em andamento com `saldo` (antes dos juros do mês).
+    Price: a `parcela` fixa, se houver, senão a que quita em `prazo` meses.
+    SAC: amortização (fixa ou S/n) mais os juros do mês. Sem prazo, quita o que restou.
+    """
+    if not prazo or prazo <= 0:
+        return saldo * (1 + taxa)
+    if sistema == PRICE:
+        return parcela if parcela is not None else parcela_price(saldo, taxa, prazo)
+    a = amortizacao if amortizacao is not None else saldo / prazo
+    return min(a, saldo) + saldo * taxa
+
+
+# ==================== ANTECIPAÇÃO ====================
+def antecipar(saldo: float, taxa: float, prazo: int, valor: float, sistema: str = PRICE,
+              modo: str = REDUZIR_PRAZO, parcela: Optional[float] = None,
+              amortizacao: Optional[float] = None) -> Dict:
+    """
+    Recalcula o restante do contrato após antecipar `valor`, sem refazer a tabela.
+    Reduzir prazo mantém a parcela (Price) ou a amortização (SAC); reduzir parcela
+    mantém o prazo e recalcula a parcela. Retorna saldo, prazo, próxima parcela,
+    o valor que ficou fixo no contrato (`fixo`: parcela Price ou amortização SAC;
+    None se derivado do prazo) e os juros economizados em relação a não antecipar.
+    """
+    juros_antes = juros_restantes(saldo, taxa, prazo, sistema, parcela, amortizacao)
+    novo_saldo = max(saldo - valor, 0.0)
+    if novo_saldo <= 0:
+        return {"saldo": 0.0, "prazo": 0, "parcela": 0.0, "fixo": None, "juros_economizados": juros_antes}
+
+    if modo == REDUZIR_PARCELA:
+        novo_prazo, fixo = prazo, None
+    elif sistema == PRICE:
+        fixo = parcela if parcela is not None else parcela_price(saldo, taxa, prazo)
+        novo_prazo = int(prazo_para_quitar(novo_saldo, taxa, fixo))
+    else:
+        fixo = amortizacao if amortizacao is not None else saldo / prazo
+        novo_prazo = int(np.ceil(novo_saldo / fixo - 1e-9))
+
+    fixos = {"parcela": fixo} if sistema == PRICE else {"amortizacao": fixo}
+    juros_depois = juros_restantes(novo_saldo, taxa, novo_prazo, sistema, **fixos)
+    return {"saldo": novo_saldo, "prazo": novo_prazo,
+            "parcela": parcela_do_mes(novo_saldo, taxa, novo_prazo, sistema, **fixos),
+            "fixo": fixo, "juros_economizados": juros_antes - juros_depois}
+
+
+# ==================== FINANCIAMENTO ====================
+@dataclass
+class Financiamento:
+    """Financiamento de prazo fixo (Price ou SAC), com fórmulas fechadas para o restante do contrato."""
+    nome: str
+    saldo_devedor: float
+    taxa_juros_mensal: float
+    prazo_restante_meses: int
+    sistema: str = PRICE
+    modo_antecipacao: str = REDUZIR_PRAZO
+    # Valor mantido depois de antecipar reduzindo o prazo (None = derivado de saldo e prazo)
+    parcela_fixa: Optional[float] = None  # Price
+    amortizacao_fixa: Optional[float] = None  # SAC
+
+    @classmethod
+    def de_parcela(cls, nome: str, saldo_devedor: float, parcela: float, prazo_restante_meses: int,
+                   **kwargs) -> "Financiamento":
+        """Price a partir da parcela do carnê: descobre a taxa embutida."""
+        taxa = taxa_implicita(saldo_devedor, parcela, prazo_restante_meses)
+        return cls(nome, saldo_devedor, taxa, prazo_restante_meses, PRICE, **kwargs)
+
+    def _fixos(self) -> Dict:
+        return {"parcela": self.parcela_fixa, "amortizacao": self.amortizacao_fixa}
+
+    @property
+    def parcela(self) -> float:
+        """Parcela do próximo mês."""
+        return parcela_do_mes(self.saldo_devedor, self.taxa_juros_mensal, self.prazo_restante_meses,
+                              self.sistema, **self._fixos())
+
+    def cronograma(self) -> Dict[str, np.ndarray]:
+        return cronograma(self.saldo_devedor, self.taxa_juros_mensal, self.prazo_restante_meses,
+                          self.sistema, **self._fixos())
+
+    def juros_restantes(self) -> float:
+        return juros_restantes(self.saldo_devedor, self.taxa_juros_mensal, self.prazo_restante_meses,
+                               self.sistema, **self._fixos())
+
+    def antecipar(self, valor: float, modo: Optional[str] = None) -> Tuple["Financiamento", float]:
+        """Contrato depois de antecipar `valor` e os juros economizados com isso."""
+        r = antecipar(self.saldo_devedor, self.taxa_juros_mensal, self.prazo_restante_meses, valor,
+                      self.sistema, modo or self.modo_antecipacao, **self._fixos())
+        fixo = "parcela_fixa" if self.sistema == PRICE else "amortizacao_fixa"
+        novo = replace(self, saldo_devedor=r["saldo"], prazo_restante_meses=r["prazo"], **{fixo: r["fixo"]})
+        return novo, r["juros_economizados"]
+
+    def comparar_antecipacao(self, valor: float) -> Dict[str, Dict]:
+        """Reduzir prazo x reduzir parcela para o mesmo valor antecipado."""
+        return {
+            modo: antecipar(self.saldo_devedor, self.taxa_juros_mensal, self.prazo_restante_meses, valor,
+                            self.sistema, modo, **self._fixos())
+            for modo in (REDUZIR_PRAZO, REDUZIR_PARCELA)
+        }
+
+    def para_divida(self) -> Divida:
+        """
+        `Divida` equivalente para os motores de parcela fixa (batch, otimizador):
+        saldo na data do vencimento, já com os juros do mês, porque eles pagam a
+        parcela antes de aplicar juros. Exata para Price; no SAC a parcela cai todo
+        mês, o que só o núcleo acompanha (`CarteiraSimulada.de_dividas(..., financiamentos)`).
+        """
+        return Divida(self.nome, self.saldo_devedor * (1 + self.taxa_juros_mensal), self.taxa_juros_mensal,
+                      self.parcela, self.prazo_restante_meses)
@@ -0,0 +1,135 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Estados de um job
+PENDENTE = 'pendente'
+RODANDO = 'rodando'
+CONCLUIDO = 'concluido'
+CANCELADO = 'cancelado'
+ERRO = 'erro'
+
+
+class JobCancelado(Exception):
+    """Levantada dentro do job (em `reportar`/`verificar`) quando alguém pediu o cancelamento."""
+
+
+class Job:
+    """
+    Uma simulação enviada para a fila. A função do job recebe o próprio `Job` e
+    chama `reportar(progresso, parcial)` de tempos em tempos: é por aí que a
+    interface acompanha o andamento e que o cancelamento chega (cooperativo).
+    """
+
+    def __init__(self, funcao: Callable, args: tuple, descricao: str = ''):
+        self.id = uuid.uuid4().hex
+        self.descricao = descricao
+        self.estado = PENDENTE
+        self.progresso = 0.0  # 0..1
+        self.parcial: Any = None  # Último resultado parcial reportado
+        self.resultado: Any = None
+        self.erro: Optional[str] = None
+        self.criado_em = time.time()
+        self._funcao = funcao
+        self._args = args
+        self._cancelar = threading.Event()
+        self._fim = threading.Event()
+
+    @property
+    def terminado(self) -> bool:
+        return self._fim.is_set()
+
+    @property
+    def cancelado(self) -> bool:
+        """Cancelamento pedido (o job pode ainda estar terminando o passo atual)."""
+        return self._cancelar.is_set()
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    def aguardar(self, timeout: Optional[float] = None) -> bool:
+        """Espera o job terminar; True se terminou dentro do `timeout`."""
+        return self._fim.wait(timeout)
+
+    # Chamados de dentro da função do job
+    def verificar(self):
+        if self._cancelar.is_set():
+            raise JobCancelado()
+
+    def reportar(self, progresso: float, parcial: Any = None):
+        self.verificar()
+        self.progresso = min(max(progresso, 0.0), 1.0)
+        if parcial is not None:
+            self.parcial = parcial
+
+    def _rodar(self):
+        try:
+            self.verificar()  # Cancelado ainda na fila
+            self.estado = RODANDO
+            self.resultado = self._funcao(self, *self._args)
+            self.progresso = 1.0
+            self.estado = CONCLUIDO
+        except JobCancelado:
+            self.estado = CANCELADO
+        except Exception as erro:
+            self.erro = f"{type(erro).__name__}: {erro}"
+            self.estado = ERRO
+        finally:
+            self._fim.set()
+
+
+class FilaJobs:
+    """
+    Fila de simulações pesadas compartilhada pelo servidor. No máximo
+    `max_simultaneos` jobs rodam ao mesmo tempo (os demais esperam na fila), então
+    muitos usuários não disputam todos os núcleos. Threads, e não processos: o job
+    precisa publicar progresso e parciais e receber o cancelamento sem serializar nada.
+    Guarda os `max_guardados` jobs mais recentes para consulta por id.
+    """
+
+    def __init__(self, max_simultaneos: int = 2, max_guardados: int = 200):
+        self.max_simultaneos = max_simultaneos
+        self.max_guardados = max_guardados
+        self._executor = ThreadPoolExecutor(max_workers=max_simultaneos, thread_name_prefix='simulacao')
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def enviar(self, funcao: Callable, *args, descricao: str = '') -> Job:
+        """Agenda `funcao(job, *args)` e devolve o job (use `job.id` para consultar depois)."""
+        job = Job(funcao, args, descricao)
+        with self._lock:
+            self._jobs[job.id] = job
+            # Descartar os terminados mais antigos
+            excesso = len(self._jobs) - self.max_guardados
+            for antigo in [j for j in self._jobs.values() if j.terminado][:max(excesso, 0)]:
+                del self._jobs[antigo.id]
+        self._executor.submit(job._rodar)
+        return job
+
+    def obter(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancelar(self, job_id: str):
+        job = self.obter(job_id)
+        if job is not None:
+            job.cancelar()
+
+    def posicao_na_fila(self, job: Job) -> int:
+        """Quantos jobs pendentes foram enviados antes deste (0 = é o próximo)."""
+        with self._lock:
+            pendentes = [j for j in self._jobs.values() if j.estado == PENDENTE and not j.terminado]
+        return next((i for i, j in enumerate(pendentes) if j.id == job.id), 0)
+
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            estados = [j.estado for j in self._jobs.values()]
+        return {
+            "max_simultaneos": self.max_simultaneos,
+            "rodando": estados.count(RODANDO),
+            "na_fila": estados.count(PENDENTE),
+            "guardados": len(estados)
+        }
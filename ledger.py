@@ -0,0 +1,148 @@
+import csv
+from dataclasses import dataclass
+from typing import List, Iterable, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from models import Divida
+from batch import CarteiraLote, simular_mes_arrays
+
+FORMATO_REAL = '"R$" #,##0.00'
+FORMATO_PERCENTUAL = '0.00%'
+
+
+@dataclass
+class TabelaAmortizacao:
+    """
+    Razão por dívida e por mês, guardado em colunas (matrizes meses x dívidas).
+    Amortização = pagamento - juros, ou seja, quanto o saldo caiu no mês.
+    """
+    nomes: List[str]
+    saldo_inicial: np.ndarray  # Saldo no começo do mês, antes da parcela
+    pagamento: np.ndarray
+    juros: np.ndarray
+    saldo_final: np.ndarray
+
+    @property
+    def meses(self) -> int:
+        return self.pagamento.shape[0]
+
+    @property
+    def amortizacao(self) -> np.ndarray:
+        return self.pagamento - self.juros
+
+    def saldo_total_inicial(self) -> np.ndarray:
+        """Dívida total no começo de cada mês (a 'Evolução Mensal')."""
+        return self.saldo_inicial.sum(axis=1)
+
+    def colunas(self) -> dict:
+        """Formato longo (uma linha por mês e dívida), sem copiar mais que o necessário."""
+        n_dividas = len(self.nomes)
+        return {
+            "mes": np.repeat(np.arange(1, self.meses + 1, dtype=np.int32), n_dividas),
+            "divida": np.tile(np.arange(n_dividas, dtype=np.int32), self.meses),
+            "saldo_inicial": self.saldo_inicial.ravel(),
+            "pagamento": self.pagamento.ravel(),
+            "juros": self.juros.ravel(),
+            "amortizacao": self.amortizacao.ravel(),
+            "saldo_final": self.saldo_final.ravel()
+        }
+
+
+def gerar_tabela(dividas: List[Divida], saldo_mensal: float, estrategia: str = 'avalanche',
+                 max_meses: int = 120, juros_antes_do_extra: bool = False) -> TabelaAmortizacao:
+    """Simula até quitar (saldo total <= R$ 1) registrando cada dívida em cada mês."""
+    lote = CarteiraLote.from_dividas([dividas])
+    n_dividas = len(dividas)
+    saldo_inicial = np.zeros((max_meses, n_dividas))
+    pagamento = np.zeros((max_meses, n_dividas))
+    juros = np.zeros((max_meses, n_dividas))
+    saldo_final = np.zeros((max_meses, n_dividas))
+    disponivel = np.array([saldo_mensal], dtype=float)
+
+    mes = 0
+    while mes < max_meses and lote.saldos.sum() > 1:
+        saldo_inicial[mes] = lote.saldos[0]
+        resultado = simular_mes_arrays(disponivel, lote.saldos, lote.taxas, lote.parcelas,
+                                       lote.prazos, estrategia, juros_antes_do_extra)
+        pagamento[mes] = resultado["pagamento_por_divida"][0]
+        juros[mes] = resultado["juros_por_divida"][0]
+        saldo_final[mes] = lote.saldos[0]
+        mes += 1
+
+    return TabelaAmortizacao([d.nome for d in dividas], saldo_inicial[:mes], pagamento[:mes],
+                             juros[:mes], saldo_final[:mes])
+
+
+# ==================== EXPORTAÇÃO ====================
+class Aba(NamedTuple):
+    """Aba extra da planilha: valores numéricos continuam números, com formato por coluna."""
+    titulo: str
+    cabecalho: Sequence[str]
+    linhas: Iterable[Sequence]
+    formatos: Sequence[Optional[str]] = ()
+
+
+def _linhas_tabela(tabela: TabelaAmortizacao) -> Iterable[tuple]:
+    """Linhas do razão geradas sob demanda, sem montar a tabela inteira."""
+    for mes in range(tabela.meses):
+        for j, nome in enumerate(tabela.nomes):
+            yield (mes + 1, nome, float(tabela.saldo_inicial[mes, j]), float(tabela.pagamento[mes, j]),
+                   float(tabela.juros[mes, j]), float(tabela.pagamento[mes, j] - tabela.juros[mes, j]),
+                   float(tabela.saldo_final[mes, j]))
+
+
+CABECALHO_TABELA = ['Mês', 'Dívida', 'Saldo Inicial (R$)', 'Pagamento (R$)', 'Juros (R$)',
+                    'Amortização (R$)', 'Saldo Final (R$)']
+FORMATOS_TABELA = [None, None] + [FORMATO_REAL] * 5
+
+
+def exportar_excel(tabela: TabelaAmortizacao, destino, abas: Sequence[Aba] = ()):
+    """
+    Grava a planilha no modo write-only do openpyxl: as linhas vão direto para
+    o arquivo, sem manter a pasta de trabalho em memória. `destino` pode ser um
+    caminho ou um arquivo aberto (ex: BytesIO). As `abas` extras vêm antes do razão.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    livro = Workbook(write_only=True)
+    todas = list(abas) + [Aba('Amortização', CABECALHO_TABELA, _linhas_tabela(tabela), FORMATOS_TABELA)]
+    for aba in todas:
+        planilha = livro.create_sheet(aba.titulo)
+        planilha.append(list(aba.cabecalho))
+        formatos = list(aba.formatos) + [None] * (len(aba.cabecalho) - len(aba.formatos))
+        for linha in aba.linhas:
+            celulas = []
+            for valor, formato in zip(linha, formatos):
+                if formato and isinstance(valor, (int, float)):
+                    celula = WriteOnlyCell(planilha, value=valor)
+                    celula.number_format = formato
+                    celulas.append(celula)
+                else:
+                    celulas.append(valor)
+            planilha.append(celulas)
+    livro.save(destino)
+
+
+def exportar_csv(tabela: TabelaAmortizacao, destino):
+    """CSV do razão em formato longo, escrito linha a linha. `destino`: caminho ou arquivo texto."""
+    if isinstance(destino, str):
+        with open(destino, 'w', newline='', encoding='utf-8') as arquivo:
+            return exportar_csv(tabela, arquivo)
+    writer = csv.writer(destino)
+    writer.writerow(['mes', 'divida', 'saldo_inicial', 'pagamento', 'juros', 'amortizacao', 'saldo_final'])
+    writer.writerows((m, n, *(round(v, 2) for v in valores)) for m, n, *valores in _linhas_tabela(tabela))
+
+
+def exportar_parquet(tabela: TabelaAmortizacao, destino):
+    """Parquet do razão direto das colunas numpy (nome da dívida como dicionário). Requer pyarrow."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Exportar Parquet precisa do pyarrow: pip install pyarrow")
+
+    colunas = tabela.colunas()
+    colunas["divida"] = pa.DictionaryArray.from_arrays(colunas["divida"], pa.array(tabela.nomes))
+    pq.write_table(pa.table(colunas), destino)
@@ -0,0 +1,170 @@
+"""
+Gerador de carga para o serviço HTTP (`server.py`).
+
+Uso:
+    python server.py &
+    python loadgen.py --taxa 2000 --conexoes 200 --duracao 30          # pico: 2000 pedidos/s
+    python loadgen.py --rota simular --dividas 10 --horizonte 120      # até quitar, carteiras maiores
+    python loadgen.py --taxa 0 --conexoes 64                           # sem ritmo: o máximo que o serviço aguenta
+
+Com `--taxa`, os pedidos saem em chegadas de Poisson nesse ritmo, independente de as
+respostas voltarem (carga aberta, como tráfego real); a latência conta a partir do
+instante agendado, então a fila do lado do cliente também aparece no p99. Com
+`--taxa 0`, cada conexão manda o próximo pedido assim que recebe a resposta.
+As carteiras vêm do mesmo gerador com semente do `benchmark.py`.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmark import gerar_carteiras
+
+
+def montar_corpos(n: int, n_dividas: int, horizonte: int, rota: str, semente: int) -> List[bytes]:
+    """Corpos JSON prontos (codificados uma vez só, fora da medição)."""
+    corpos = []
+    for saldo_mensal, dividas in gerar_carteiras(n_dividas, horizonte, n, semente):
+        corpo = {
+            "renda": round(saldo_mensal * 1.1, 2), "despesas": 0.0,  # 10% de folga para o extra
+            "estrategia": "avalanche",
+            "dividas": [{"nome": d.nome, "saldo_devedor": d.saldo_devedor, "taxa_juros_mensal": d.taxa_juros_mensal,
+                         "parcela_mensal": d.parcela_mensal, "prazo_restante_meses": d.prazo_restante_meses}
+                        for d in dividas]
+        }
+        if rota == 'simular':
+            corpo["max_meses"] = horizonte * 2
+        corpos.append(json.dumps(corpo).encode('utf-8'))
+    return corpos
+
+
+class Conexao:
+    """Uma conexão keep-alive com o serviço; um pedido por vez."""
+
+    def __init__(self, host: str, porta: int):
+        self.host, self.porta = host, porta
+        self._leitor: Optional[asyncio.StreamReader] = None
+        self._escritor: Optional[asyncio.StreamWriter] = None
+
+    async def pedir(self, metodo: str, caminho: str, corpo: bytes = b'') -> Tuple[int, bytes]:
+        if self._escritor is None:
+            self._leitor, self._escritor = await asyncio.open_connection(self.host, self.porta)
+        self._escritor.write(f"{metodo} {caminho} HTTP/1.1\r\nHost: {self.host}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(corpo)}\r\n\r\n"
+                             .encode('ascii') + corpo)
+        await self._escritor.drain()
+        status = int((await self._leitor.readline()).split()[1])
+        tamanho = 0
+        while True:
+            linha = await self._leitor.readline()
+            if linha in (b'\r\n', b''):
+                break
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            if nome.strip().lower() == 'content-length':
+                tamanho = int(valor)
+        return status, await self._leitor.readexactly(tamanho)
+
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+
+
+async def gerar_carga(host: str, porta: int, caminho: str, corpos: List[bytes], conexoes: int,
+                      duracao: float, taxa: float, semente: int = 0) -> Dict:
+    latencias: List[float] = []
+    erros = 0
+    livres: asyncio.Queue = asyncio.Queue()
+    for _ in range(conexoes):
+        livres.put_nowait(Conexao(host, porta))
+    rng = random.Random(semente)
+
+    async def um_pedido(agendado: float):
+        nonlocal erros
+        conexao = await livres.get()
+        try:
+            status, _ = await conexao.pedir('POST', caminho, rng.choice(corpos))
+            if status != 200:
+                erros += 1
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            erros += 1
+            conexao.fechar()  # Reconecta no próximo uso
+        finally:
+            livres.put_nowait(conexao)
+        latencias.append(time.perf_counter() - agendado)
+
+    inicio = time.perf_counter()
+    fim = inicio + duracao
+    if taxa > 0:
+        # 1. Carga aberta: chegadas de Poisson no ritmo pedido
+        tarefas = set()
+        proximo = inicio
+        while proximo < fim:
+            espera = proximo - time.perf_counter()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            tarefa = asyncio.create_task(um_pedido(proximo))
+            tarefas.add(tarefa)
+            tarefa.add_done_callback(tarefas.discard)
+            proximo += rng.expovariate(taxa)
+        await asyncio.gather(*tarefas)
+    else:
+        # 2. Carga fechada: cada conexão pede de novo ao receber a resposta
+        async def cliente():
+            while time.perf_counter() < fim:
+                await um_pedido(time.perf_counter())
+        await asyncio.gather(*(cliente() for _ in range(conexoes)))
+    total = time.perf_counter() - inicio
+
+    while not livres.empty():
+        livres.get_nowait().fechar()
+    p50, p99 = np.percentile(latencias, [50, 99]) * 1000 if latencias else (0.0, 0.0)
+    return {"pedidos": len(latencias), "erros": erros, "segundos": total,
+            "vazao_por_segundo": len(latencias) / total,
+            "latencia_p50_ms": float(p50), "latencia_p99_ms": float(p99)}
+
+
+async def metricas_do_servidor(host: str, porta: int) -> Dict:
+    conexao = Conexao(host, porta)
+    try:
+        _, corpo = await conexao.pedir('GET', '/metricas')
+        return json.loads(corpo)
+    finally:
+        conexao.fechar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerador de carga para o server.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--rota", choices=['simular_mes', 'simular'], default='simular_mes')
+    parser.add_argument("--taxa", type=float, default=1000, help="Pedidos por segundo (0 = sem ritmo)")
+    parser.add_argument("--conexoes", type=int, default=100, help="Conexões keep-alive simultâneas")
+    parser.add_argument("--duracao", type=float, default=10, help="Segundos de carga")
+    parser.add_argument("--dividas", type=int, default=5, help="Dívidas por carteira")
+    parser.add_argument("--horizonte", type=int, default=60, help="Meses para quitar as carteiras geradas")
+    parser.add_argument("--carteiras", type=int, default=500, help="Carteiras distintas sorteadas nos pedidos")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    corpos = montar_corpos(args.carteiras, args.dividas, args.horizonte, args.rota, args.semente)
+    ritmo = f"{args.taxa:g}/s" if args.taxa > 0 else "sem ritmo"
+    print(f"--- {args.duracao:g}s em /{args.rota}, {ritmo}, {args.conexoes} conexões, "
+          f"{args.dividas} dívidas por carteira ---")
+    cliente = asyncio.run(gerar_carga(args.host, args.porta, f"/{args.rota}", corpos, args.conexoes,
+                                      args.duracao, args.taxa, args.semente))
+    print(f"Cliente:  {cliente['pedidos']} pedidos ({cliente['erros']} erros) | "
+          f"{cliente['vazao_por_segundo']:,.0f}/s | p50 {cliente['latencia_p50_ms']:.2f} ms | "
+          f"p99 {cliente['latencia_p99_ms']:.2f} ms")
+    servidor = asyncio.run(metricas_do_servidor(args.host, args.porta))
+    print(f"Servidor: p50 {servidor['latencia_p50_ms']:.2f} ms | p99 {servidor['latencia_p99_ms']:.2f} ms | "
+          f"{servidor['vazao_por_segundo']:,.0f}/s na janela de {servidor['janela_segundos']:g}s | "
+          f"{servidor['lotes']} lotes, média {servidor['media_por_lote']:g} e máximo {servidor['maior_lote']} pedidos")
+
+
+if __name__ == "__main__":
+    main()
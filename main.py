@@ -1,5 +1,5 @@
 from data import get_dados_iniciais
-from calculator import simular_mes
+from calculator import CarteiraSimulada, simular_quitacao
 from visualizer import plotar_evolucao_divida # Importar visualização
 from models import Divida
 
@@ -14,33 +14,24 @@ def main():
     print(f"Saldo Inicial Disponível para Dívidas: R$ {renda - despesas:.2f}")
     print("-" * 30)
     
-    # 2. Loop de Simulação
-    meses = 0
-    historico_divida_total = []
+    # 2. Simulação (mesmo núcleo do app; para cedo se a dívida for comprovadamente impagável)
+    carteira = CarteiraSimulada.de_dividas(dividas)
+    resultado = simular_quitacao(renda - despesas, carteira)
     
-    while True:
-        meses += 1
-        
-        # Calcular Saldo Total Devedor
-        saldo_total = sum(d.saldo_devedor for d in dividas)
-        historico_divida_total.append(saldo_total)
-        
-        if saldo_total <= 1: # Consideramos quitado se for menor que 1 real
-            print(f"\nPARABÉNS! Dívidas quitadas em {meses} meses.")
-            break
-            
-        if meses > 120: # Limite de segurança (10 anos)
-            print("\nAviso: Simulação interrompida após 10 anos (dívida impagável?)")
-            break
-            
-        resultado = simular_mes(renda, despesas, dividas)
-        
-        # Opcional: Mostrar progresso a cada ano
-        if meses % 12 == 0:
-            print(f"Mês {meses}: Saldo Devedor Total R$ {resultado['saldo_devedor_total']:.2f}")
+    # Opcional: Mostrar progresso a cada ano
+    for mes in range(12, resultado.meses + 1, 12):
+        print(f"Mês {mes}: Saldo Devedor Total R$ {resultado.historico[mes]:.2f}")
+    
+    if resultado.quitado: # Consideramos quitado se for menor que 1 real
+        print(f"\nPARABÉNS! Dívidas quitadas em {resultado.meses} meses.")
+    elif resultado.mes_inviavel is not None:
+        print(f"\nAviso: Dívida impagável! A partir do mês {resultado.mes_inviavel} os juros "
+              f"crescem mais rápido que a capacidade de pagamento.")
+    else:
+        print(f"\nAviso: Simulação interrompida após {resultado.meses} meses sem quitar.")
 
     # 3. Visualizar Resultado
-    plotar_evolucao_divida(historico_divida_total)
+    plotar_evolucao_divida(resultado.historico)
 
 if __name__ == "__main__":
     main()
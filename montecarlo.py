@@ -0,0 +1,132 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from models import Divida
+from batch import simular_mes_arrays
+
+
+@dataclass
+class CenarioEstocastico:
+    """
+    Parâmetros da simulação estocástica. Os padrões seguem `data.get_dados_iniciais`:
+    salário fixo, renda de app variável e cartões no rotativo.
+    """
+    renda_fixa: float
+    renda_variavel: float  # Ex: renda de app, sujeita a choques
+    despesas: float
+    volatilidade_renda: float = 0.30  # Desvio relativo mensal da renda variável
+    prob_mudanca_taxa: float = 0.03  # Chance por mês de o banco mudar as taxas
+    variacao_taxa: float = 0.02  # Desvio (a.m.) da mudança de taxa
+    prob_despesa_extra: float = 0.05  # Chance por mês de um gasto inesperado
+    despesa_extra_media: float = 800.0
+
+
+def _simular_bloco(dividas: List[Divida], cenario: CenarioEstocastico, estrategia: str,
+                   n_caminhos: int, max_meses: int, semente: np.random.SeedSequence) -> Dict:
+    """Simula um bloco de caminhos, cada caminho como uma linha do motor em lote."""
+    rng = np.random.default_rng(semente)
+
+    saldos = np.tile([d.saldo_devedor for d in dividas], (n_caminhos, 1)).astype(float)
+    taxas = np.tile([d.taxa_juros_mensal for d in dividas], (n_caminhos, 1)).astype(float)
+    parcelas = np.tile([d.parcela_mensal for d in dividas], (n_caminhos, 1)).astype(float)
+    prazos = np.tile([-1 if d.prazo_restante_meses is None else d.prazo_restante_meses
+                      for d in dividas], (n_caminhos, 1)).astype(np.int64)
+    # Só dívidas com juros (cartões) sofrem mudança de taxa; financiamentos têm taxa embutida
+    com_juros = taxas > 0
+
+    meses = np.full(n_caminhos, max_meses, dtype=np.int64)
+    juros_totais = np.zeros(n_caminhos)
+    restantes = np.flatnonzero(saldos.sum(axis=1) > 1)
+    meses[saldos.sum(axis=1) <= 1] = 0
+
+    for mes in range(1, max_meses + 1):
+        if restantes.size == 0:
+            break
+        n = restantes.size
+
+        # Sorteios do mês, só para os caminhos ainda ativos
+        choque = np.maximum(0.0, 1 + cenario.volatilidade_renda * rng.standard_normal(n))
+        renda = cenario.renda_fixa + cenario.renda_variavel * choque
+        extra = np.where(rng.random(n) < cenario.prob_despesa_extra,
+                         rng.exponential(cenario.despesa_extra_media, n), 0.0)
+        muda = (rng.random(n) < cenario.prob_mudanca_taxa)[:, None] & com_juros
+        if muda.any():
+            nova_taxa = taxas + cenario.variacao_taxa * rng.standard_normal(taxas.shape)
+            taxas = np.where(muda, np.maximum(nova_taxa, 0.0), taxas)
+
+        resultado = simular_mes_arrays(renda - cenario.despesas - extra, saldos, taxas,
+                                       parcelas, prazos, estrategia)
+        juros_totais[restantes] += resultado["juros_pagos_mes"]
+
+        quitou = resultado["saldo_devedor_total"] <= 1
+        if quitou.any():
+            meses[restantes[quitou]] = mes
+            continuam = ~quitou
+            restantes = restantes[continuam]
+            saldos, taxas, parcelas = saldos[continuam], taxas[continuam], parcelas[continuam]
+            prazos, com_juros = prazos[continuam], com_juros[continuam]
+
+    quitado = np.ones(n_caminhos, dtype=bool)
+    quitado[restantes] = False
+    return {"meses": meses, "juros_totais": juros_totais, "quitado": quitado}
+
+
+def _percentis(valores: np.ndarray) -> Dict:
+    p5, p50, p95 = np.percentile(valores, [5, 50, 95])
+    return {"p5": float(p5), "p50": float(p50), "p95": float(p95)}
+
+
+def simular_monte_carlo(dividas: List[Divida], cenario: CenarioEstocastico,
+                        estrategia: str = 'avalanche', n_caminhos: int = 100_000,
+                        max_meses: int = 120, semente: int = 0,
+                        tamanho_bloco: int = 10_000, processos: Optional[int] = None) -> Dict:
+    """
+    Roda `n_caminhos` cenários aleatórios com a semântica de `simular_mes`
+    e devolve a distribuição (P5/P50/P95) do mês de quitação e dos juros totais.
+    Os caminhos são divididos em blocos com sementes derivadas de `semente`,
+    então o resultado não depende de quantos processos foram usados.
+    Caminhos que não quitam em `max_meses` entram com `max_meses` no percentil.
+    """
+    tamanhos = [tamanho_bloco] * (n_caminhos // tamanho_bloco)
+    if n_caminhos % tamanho_bloco:
+        tamanhos.append(n_caminhos % tamanho_bloco)
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    argumentos = [(dividas, cenario, estrategia, n, max_meses, s) for n, s in zip(tamanhos, sementes)]
+
+    processos = processos or os.cpu_count() or 1
+    if processos == 1 or len(argumentos) == 1:
+        blocos = [_simular_bloco(*args) for args in argumentos]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processos, len(argumentos))) as executor:
+            blocos = list(executor.map(_simular_bloco, *zip(*argumentos)))
+
+    meses = np.concatenate([b["meses"] for b in blocos])
+    juros = np.concatenate([b["juros_totais"] for b in blocos])
+    quitado = np.concatenate([b["quitado"] for b in blocos])
+
+    return {
+        "mes_quitacao": _percentis(meses),
+        "juros_totais": _percentis(juros),
+        "prob_quitacao": float(quitado.mean()),
+        "n_caminhos": n_caminhos,
+        "meses": meses,
+        "juros": juros
+    }
+
+
+if __name__ == "__main__":
+    from data import get_dados_iniciais
+
+    _, despesas, dividas = get_dados_iniciais()
+    cenario = CenarioEstocastico(renda_fixa=3360, renda_variavel=1500, despesas=despesas)
+    resultado = simular_monte_carlo(dividas, cenario)
+
+    print(f"--- Monte Carlo ({resultado['n_caminhos']} cenários) ---")
+    print(f"Chance de quitar em 10 anos: {resultado['prob_quitacao']:.1%}")
+    for nome, chave in [("Mês de quitação", "mes_quitacao"), ("Juros totais (R$)", "juros_totais")]:
+        p = resultado[chave]
+        print(f"{nome}: P5 {p['p5']:.1f} | P50 {p['p50']:.1f} | P95 {p['p95']:.1f}")
@@ -0,0 +1,322 @@
+import math
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Sequence, Tuple
+
+from models import Divida
+from calculator import (CarteiraSimulada, INVIAVEL, MESES_LIMITE_SEGURANCA, QUITACAO_GARANTIDA,
+                        diagnosticar, simular_mes_carteira)
+
+# Acima disso o branch-and-bound estoura `max_nos` (2^n conjuntos de dívidas já escolhidas):
+# a busca fica nas estratégias, híbridos e divisões, e o resultado sai com busca_completa=False
+MAX_DIVIDAS_BUSCA_EXATA = 11  # ~12 mil nós e ~2 s no pior caso medido; 13 dívidas já chegam perto de max_nos
+
+
+# ==================== POLÍTICAS DE ALOCAÇÃO ====================
+def _ordem_estrategia(estrategia: str, saldos: Sequence[float], taxas: Sequence[float]) -> List[int]:
+    """Ordem de `simular_mes`: avalanche por maior taxa, snowball por menor saldo (estável)."""
+    indices = range(len(saldos))
+    if estrategia == 'avalanche':
+        return sorted(indices, key=lambda i: taxas[i], reverse=True)
+    return sorted(indices, key=lambda i: saldos[i])
+
+
+@dataclass(frozen=True)
+class PoliticaEstrategia:
+    """Avalanche ou snowball, exatamente como em `simular_mes`."""
+    estrategia: str
+    fracoes: Tuple[float, ...] = ()
+
+    @property
+    def descricao(self) -> str:
+        return self.estrategia.capitalize()
+
+    def ordem(self, saldos, taxas) -> List[int]:
+        return _ordem_estrategia(self.estrategia, saldos, taxas)
+
+
+@dataclass(frozen=True)
+class PoliticaOrdem:
+    """
+    Prioridade fixa entre as dívidas. Com `fracoes`, o extra é dividido entre
+    as primeiras dívidas ativas da ordem (ex: 70% / 30%) e o resto segue em cascata.
+    """
+    ordem_fixa: Tuple[int, ...]
+    fracoes: Tuple[float, ...] = ()
+    nomes: Tuple[str, ...] = ()
+
+    @property
+    def descricao(self) -> str:
+        ordem = " > ".join(self.nomes[i] if self.nomes else str(i) for i in self.ordem_fixa)
+        if self.fracoes:
+            fatias = "/".join(f"{f:.0%}" for f in self.fracoes)
+            return f"Ordem {ordem} (extra dividido {fatias})"
+        return f"Ordem {ordem}"
+
+    def ordem(self, saldos, taxas) -> List[int]:
+        return list(self.ordem_fixa)
+
+
+@dataclass(frozen=True)
+class PoliticaHibrida:
+    """Uma estratégia enquanto houver mais de `n_restantes` dívidas ativas, depois a outra."""
+    n_restantes: int
+    inicio: str = 'snowball'
+    fim: str = 'avalanche'
+    fracoes: Tuple[float, ...] = ()
+
+    @property
+    def descricao(self) -> str:
+        return f"{self.inicio.capitalize()} até restarem {self.n_restantes}, depois {self.fim.capitalize()}"
+
+    def ordem(self, saldos, taxas) -> List[int]:
+        ativas = sum(1 for s in saldos if s > 0)
+        estrategia = self.inicio if ativas > self.n_restantes else self.fim
+        return _ordem_estrategia(estrategia, saldos, taxas)
+
+
+# ==================== SIMULAÇÃO ====================
+def _mes_decidido(carteira: CarteiraSimulada, saldo_mensal: float, ordem: Sequence[int],
+                  juros_antes_do_extra: bool = False) -> bool:
+    """
+    Se a ordem (possivelmente parcial) decide o extra do mês sozinha: False quando o
+    extra passa das dívidas listadas e ainda há dívida ativa fora dela.
+    """
+    saldos, parcelas, taxas = carteira.saldos, carteira.parcelas, carteira.taxas
+    pos_parcela = {i: saldos[i] - min(parcelas[i], saldos[i]) for i in carteira.ativas}
+    extra = saldo_mensal - sum(saldos[i] - resto for i, resto in pos_parcela.items())
+    if juros_antes_do_extra:
+        pos_parcela = {i: resto * (1 + taxas[i]) for i, resto in pos_parcela.items()}
+    if extra <= sum(pos_parcela.get(i, 0.0) for i in ordem):
+        return True
+    listadas = set(ordem)
+    return not any(resto > 0 for i, resto in pos_parcela.items() if i not in listadas)
+
+
+def simular_politica(renda: float, despesas: float, dividas: List[Divida], politica,
+                     max_meses: Optional[int] = None, juros_antes_do_extra: bool = False) -> Dict:
+    """
+    Simula até quitar (saldo total <= R$ 1) seguindo uma política de alocação do extra,
+    mês a mês pelo núcleo (`calculator.simular_mes_carteira`). Como `simular_quitacao`,
+    sem teto de meses por padrão e parando quando `diagnosticar` prova que é impagável.
+    """
+    carteira = CarteiraSimulada.de_dividas(dividas)
+    saldo_mensal = renda - despesas
+    limite = max_meses if max_meses is not None else MESES_LIMITE_SEGURANCA
+    saldo_total = carteira.saldo_total()
+    meses = 0
+    juros_totais = 0.0
+    garantida = inviavel = False
+
+    while saldo_total > 1 and meses < limite:
+        if not garantida:
+            diagnostico = diagnosticar(carteira, saldo_mensal, juros_antes_do_extra)
+            if diagnostico == INVIAVEL:
+                inviavel = True
+                break
+            garantida = diagnostico == QUITACAO_GARANTIDA
+        ordem = politica.ordem(_pos_parcela(carteira.saldos, carteira.parcelas), carteira.taxas)
+        saldo_total, juros_mes, _ = simular_mes_carteira(carteira, saldo_mensal, ordem=ordem, fracoes=politica.fracoes,
+                                                         juros_antes_do_extra=juros_antes_do_extra)
+        juros_totais += juros_mes
+        meses += 1
+
+    return {"meses": meses, "juros_totais": juros_totais, "quitado": saldo_total <= 1, "inviavel": inviavel}
+
+
+def _pos_parcela(saldos: Sequence[float], parcelas: Sequence[float]) -> List[float]:
+    """Saldos depois das parcelas mínimas (chave de ordenação do snowball)."""
+    return [s - min(p, s) if s > 0 else s for s, p in zip(saldos, parcelas)]
+
+
+# ==================== BUSCA ====================
+class _Busca:
+    """
+    Branch-and-bound sobre ordens de prioridade. A ordem só importa quando o alvo
+    atual é quitado, então cada nó da árvore é o ponto em que o extra transborda
+    das dívidas já escolhidas: o trecho simulado até ali (prefixo) é compartilhado
+    por todas as ordens que começam igual.
+    """
+
+    def __init__(self, saldo_mensal, taxas, parcelas, max_meses, objetivo, max_nos, juros_antes_do_extra=False):
+        self.saldo_mensal = saldo_mensal
+        self.taxas = taxas
+        self.parcelas = parcelas
+        self.max_meses = max_meses
+        self.objetivo = objetivo
+        self.max_nos = max_nos
+        self.juros_antes_do_extra = juros_antes_do_extra
+        self.truncada = False  # Algum ramo ficou sem explorar por causa de `max_nos`
+        self.melhor_custo = (math.inf, math.inf)
+        self.melhor_ordem = None
+        self.nos = 0
+        self.podados = 0
+        # Dominância: mesmo conjunto escolhido no mesmo mês -> (juros, resíduo) já vistos
+        self.vistos: Dict[Tuple[frozenset, int], List[Tuple[float, float]]] = {}
+
+    def custo(self, meses: float, juros: float, quitado: bool = True) -> Tuple[float, float]:
+        if not quitado:
+            return (math.inf, math.inf)
+        return (juros, meses) if self.objetivo == 'juros' else (meses, juros)
+
+    def limite_inferior(self, saldos: List[float], meses: int, juros: float) -> Tuple[float, float]:
+        """
+        Relaxação: sem parcelas mínimas, todo o dinheiro do mês vai para as maiores
+        taxas, antes dos juros. Isso nunca custa mais juros nem mais meses que uma
+        política real, em qualquer ordem de juros.
+        """
+        pagamento_mes = max(self.saldo_mensal,
+                            sum(p for s, p in zip(saldos, self.parcelas) if s > 0))
+        ordem = sorted((i for i in range(len(saldos)) if saldos[i] > 0), key=lambda i: self.taxas[i], reverse=True)
+        restantes = [saldos[i] for i in ordem]
+        taxas = [self.taxas[i] for i in ordem]
+        total = sum(restantes)
+        primeira = 0  # As dívidas antes dela já zeraram na relaxação
+        while total > 1 and meses < self.max_meses:
+            # 1. Pagamento em cascata: só as primeiras dívidas da ordem recebem
+            disponivel = pagamento_mes
+            k = primeira
+            while disponivel > 0 and k < len(restantes):
+                pagamento = min(disponivel, restantes[k])
+                restantes[k] -= pagamento
+                disponivel -= pagamento
+                k += 1
+            # 2. Juros; saldos de centavos zeram
+            total = 0.0
+            for k in range(primeira, len(restantes)):
+                if restantes[k] > 0.01:
+                    juros += restantes[k] * taxas[k]
+                    restantes[k] *= 1 + taxas[k]
+                    total += restantes[k]
+                else:
+                    restantes[k] = 0.0
+                    if k == primeira:
+                        primeira += 1
+            meses += 1
+            if self.custo(meses, juros) >= self.melhor_custo:
+                break
+        return self.custo(meses, juros, total <= 1)
+
+    def dominado(self, ordem: Tuple[int, ...], meses: int, juros: float, saldos: List[float]) -> bool:
+        chave = (frozenset(ordem), meses)
+        residuo = sum(saldos[i] for i in ordem)
+        vistos = self.vistos.setdefault(chave, [])
+        for j, r in vistos:
+            if j <= juros and r <= residuo:
+                return True
+        vistos.append((juros, residuo))
+        return False
+
+    def explorar(self, carteira: CarteiraSimulada, meses: int, juros: float, ordem: Tuple[int, ...]):
+        self.nos += 1
+        carteira = carteira.copy()
+        saldos = carteira.saldos
+
+        # Avança o prefixo enquanto a ordem parcial decide sozinha
+        while sum(saldos) > 1 and meses < self.max_meses:
+            if not _mes_decidido(carteira, self.saldo_mensal, ordem, self.juros_antes_do_extra):
+                break
+            _, juros_mes, _ = simular_mes_carteira(carteira, self.saldo_mensal, ordem=ordem,
+                                                   juros_antes_do_extra=self.juros_antes_do_extra)
+            juros += juros_mes
+            meses += 1
+            if self.custo(meses, juros) >= self.melhor_custo:
+                self.podados += 1
+                return
+
+        if sum(saldos) <= 1 or meses >= self.max_meses:
+            custo = self.custo(meses, juros, sum(saldos) <= 1)
+            if custo < self.melhor_custo:
+                self.melhor_custo = custo
+                self.melhor_ordem = ordem
+            return
+
+        if self.nos >= self.max_nos:
+            self.truncada = True
+            self.podados += 1
+            return
+        if diagnosticar(carteira, self.saldo_mensal, self.juros_antes_do_extra) == INVIAVEL \
+                or self.dominado(ordem, meses, juros, saldos) \
+                or self.limite_inferior(saldos, meses, juros) >= self.melhor_custo:
+            self.podados += 1
+            return
+
+        # Ramifica: próxima dívida a receber o extra (maiores taxas primeiro, para achar cedo boas soluções)
+        candidatas = [i for i in range(len(saldos)) if i not in ordem and saldos[i] > 0]
+        candidatas.sort(key=lambda i: (-self.taxas[i], saldos[i]))
+        for i in candidatas:
+            self.explorar(carteira, meses, juros, ordem + (i,))
+
+
+def otimizar_alocacao(renda: float, despesas: float, dividas: List[Divida],
+                      objetivo: str = 'juros', max_meses: int = MESES_LIMITE_SEGURANCA,
+                      max_nos: int = 50_000, juros_antes_do_extra: bool = False) -> Dict:
+    """
+    Procura a política de alocação do pagamento extra que minimiza `objetivo`
+    ('juros' ou 'meses'; o outro desempata). O espaço inclui avalanche,
+    snowball, híbridos (snowball até restarem N dívidas, depois avalanche),
+    ordens de prioridade fixas (branch-and-bound) e divisões do extra entre as
+    duas primeiras dívidas da melhor ordem.
+    Retorna a melhor política, seus resultados e os de avalanche/snowball.
+    Carteira provadamente impagável (`calculator.diagnosticar`) volta na hora, sem busca.
+    `busca_completa` só é True quando o branch-and-bound percorreu todas as ordens:
+    com mais de MAX_DIVIDAS_BUSCA_EXATA dívidas ele nem roda, e um ramo cortado por
+    `max_nos` também deixa o resultado sem garantia de ser o ótimo.
+    Com `juros_antes_do_extra=True`, simula na ordem de juros do app.
+    """
+    taxas = [d.taxa_juros_mensal for d in dividas]
+    parcelas = [d.parcela_mensal for d in dividas]
+    saldos = [d.saldo_devedor for d in dividas]
+    nomes = tuple(d.nome for d in dividas)
+    saldo_mensal = renda - despesas
+
+    carteira = CarteiraSimulada.de_dividas(dividas)
+    if diagnosticar(carteira, saldo_mensal, juros_antes_do_extra) == INVIAVEL:
+        politica = PoliticaEstrategia('avalanche')
+        impagavel = {"meses": 0, "juros_totais": 0.0, "quitado": False, "inviavel": True}
+        return {"politica": politica, "descricao": politica.descricao, "meses": 0, "juros_totais": 0.0,
+                "quitado": False, "inviavel": True, "avalanche": impagavel, "snowball": dict(impagavel),
+                "nos_avaliados": 0, "nos_podados": 0, "busca_completa": True}
+
+    busca = _Busca(saldo_mensal, taxas, parcelas, max_meses, objetivo, max_nos, juros_antes_do_extra)
+
+    def avaliar(politica):
+        r = simular_politica(renda, despesas, dividas, politica, max_meses, juros_antes_do_extra)
+        return busca.custo(r["meses"], r["juros_totais"], r["quitado"]), r
+
+    # 1. Estratégias fixas e híbridas: dão um bom limite superior para a poda
+    candidatas = [PoliticaEstrategia('avalanche'), PoliticaEstrategia('snowball')]
+    candidatas += [PoliticaHibrida(n) for n in range(1, len(dividas))]
+    resultados = [(avaliar(p), p) for p in candidatas]
+    (melhor_custo, melhor_resultado), melhor_politica = min(resultados, key=lambda x: x[0][0])
+    busca.melhor_custo = melhor_custo
+
+    # 2. Ordens fixas por branch-and-bound (só onde ele termina)
+    exata = len(dividas) <= MAX_DIVIDAS_BUSCA_EXATA
+    if exata:
+        busca.explorar(carteira, 0, 0.0, ())
+    if busca.melhor_ordem is not None:
+        ordem = busca.melhor_ordem + tuple(i for i in range(len(dividas)) if i not in busca.melhor_ordem)
+        melhor_politica = PoliticaOrdem(ordem, nomes=nomes)
+        melhor_custo, melhor_resultado = avaliar(melhor_politica)
+
+    # 3. Divisões do extra entre as duas primeiras dívidas da melhor ordem
+    ordem_base = melhor_politica.ordem(_pos_parcela(saldos, parcelas), taxas)
+    for fracao in (0.9, 0.75, 0.6, 0.5):
+        politica = PoliticaOrdem(tuple(ordem_base), fracoes=(fracao, 1 - fracao), nomes=nomes)
+        custo, resultado = avaliar(politica)
+        if custo < melhor_custo:
+            melhor_custo, melhor_resultado, melhor_politica = custo, resultado, politica
+
+    return {
+        "politica": melhor_politica,
+        "descricao": melhor_politica.descricao,
+        "meses": melhor_resultado["meses"],
+        "juros_totais": melhor_resultado["juros_totais"],
+        "quitado": melhor_resultado["quitado"],
+        "inviavel": melhor_resultado["inviavel"],
+        "avalanche": resultados[0][0][1],
+        "snowball": resultados[1][0][1],
+        "nos_avaliados": busca.nos,
+        "nos_podados": busca.podados,
+        "busca_completa": exata and not busca.truncada
+    }
@@ -0,0 +1,76 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class Perfil:
+    """
+    Cronômetros e contadores por fase da simulação, compartilhados pelo processo
+    (todas as sessões do Streamlit somam no mesmo perfil).
+    Desligado por padrão: o código instrumentado só testa `ativo` uma vez por
+    chamada e não mede nada, então o custo fica perto de zero.
+    """
+
+    def __init__(self):
+        self.ativo = False
+        self._tempos: Dict[str, list] = {}  # fase -> [chamadas, segundos]
+        self._contadores: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, fase: str, segundos: float):
+        with self._lock:
+            acumulado = self._tempos.setdefault(fase, [0, 0.0])
+            acumulado[0] += 1
+            acumulado[1] += segundos
+
+    def contar(self, nome: str, n: int = 1):
+        with self._lock:
+            self._contadores[nome] = self._contadores.get(nome, 0) + n
+
+    @contextmanager
+    def medir(self, fase: str) -> Iterator[None]:
+        """Cronometra o bloco como uma chamada da fase (só se o perfil estiver ativo)."""
+        if not self.ativo:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(fase, time.perf_counter() - inicio)
+
+    def zerar(self):
+        with self._lock:
+            self._tempos.clear()
+            self._contadores.clear()
+
+    def relatorio(self) -> Dict:
+        """Fases ordenadas pelo tempo total, com média por chamada, e os contadores."""
+        with self._lock:
+            fases = {
+                fase: {"chamadas": chamadas, "segundos": segundos,
+                       "media_ms": segundos / chamadas * 1000 if chamadas else 0.0}
+                for fase, (chamadas, segundos) in sorted(self._tempos.items(), key=lambda f: -f[1][1])
+            }
+            return {"fases": fases, "contadores": dict(self._contadores)}
+
+
+PERFIL = Perfil()
+
+
+@contextmanager
+def perfilar() -> Iterator[Perfil]:
+    """
+    Liga o perfil (zerado) durante o bloco:
+        with perfilar() as perfil:
+            simular_mes(...)
+        print(perfil.relatorio())
+    """
+    anterior = PERFIL.ativo
+    PERFIL.zerar()
+    PERFIL.ativo = True
+    try:
+        yield PERFIL
+    finally:
+        PERFIL.ativo = anterior
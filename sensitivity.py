@@ -0,0 +1,66 @@
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from models import Divida
+from batch import CarteiraLote, simular_quitacao_lote
+
+# Eixos da grade de sensibilidade
+EIXO_RENDA = 'renda'
+EIXO_DESPESAS = 'despesas'
+EIXO_TAXA_CARTAO = 'taxa_cartao'  # Taxa mensal aplicada às dívidas marcadas como cartão
+
+
+def grade_sensibilidade(dividas: List[Divida], renda: float, despesas: float,
+                        eixo_x: str, valores_x: Sequence[float], eixo_y: str, valores_y: Sequence[float],
+                        cartoes: Optional[Sequence[bool]] = None, estrategia: str = 'avalanche',
+                        max_meses: int = 420, juros_antes_do_extra: bool = False,
+                        progresso: Optional[Callable[[float, Dict], None]] = None, blocos: int = 10) -> Dict:
+    """
+    Mês de quitação e juros totais para cada combinação dos dois eixos, numa única
+    simulação em lote: cada célula da grade é uma carteira do lote (100x100 = 10.000
+    carteiras simuladas juntas), em vez de uma simulação por célula.
+    O eixo que não entra na grade fica no valor atual (`renda`, `despesas` ou as taxas
+    das próprias dívidas). `cartoes` marca quais dívidas recebem a taxa do eixo de cartão.
+    Células provadamente impagáveis saem do lote cedo, em vez de rodar até `max_meses`.
+    Retorna matrizes (len(valores_y) x len(valores_x)) com NaN onde não quita em `max_meses`.
+    Com `progresso(fração, parcial)`, a grade é simulada em `blocos` faixas de linhas (cada
+    uma ainda em lote) e o parcial traz as linhas prontas, NaN no resto.
+    """
+    if eixo_x == eixo_y:
+        raise ValueError("Os dois eixos da grade precisam ser diferentes")
+    valores_x = np.asarray(valores_x, dtype=float)
+    valores_y = np.asarray(valores_y, dtype=float)
+    grade_x, grade_y = np.meshgrid(valores_x, valores_y)
+    n = grade_x.size
+
+    # 1. Parâmetros por célula (eixos fora da grade ficam no valor atual)
+    parametros = {EIXO_RENDA: np.full(n, float(renda)), EIXO_DESPESAS: np.full(n, float(despesas))}
+    parametros[eixo_x] = grade_x.ravel()
+    parametros[eixo_y] = grade_y.ravel()
+
+    # 2. Uma carteira do lote por célula
+    base = CarteiraLote.from_dividas([dividas])
+    lote = CarteiraLote(np.repeat(base.saldos, n, axis=0), np.repeat(base.taxas, n, axis=0),
+                        np.repeat(base.parcelas, n, axis=0), np.repeat(base.prazos, n, axis=0))
+    if EIXO_TAXA_CARTAO in parametros:
+        marcadas = np.asarray(cartoes if cartoes is not None else [True] * len(dividas), dtype=bool)
+        lote.taxas[:, marcadas] = parametros[EIXO_TAXA_CARTAO][:, None]
+
+    # 3. Simular tudo junto (ou em faixas, se alguém acompanha o progresso)
+    meses = np.full(n, np.nan)
+    juros = np.full(n, np.nan)
+    grade = {"eixo_x": valores_x, "eixo_y": valores_y,
+             "meses": meses.reshape(grade_x.shape), "juros": juros.reshape(grade_x.shape)}
+    limites = np.linspace(0, n, (blocos if progresso is not None else 1) + 1).astype(int)
+    faixas = [slice(inicio, fim) for inicio, fim in zip(limites[:-1], limites[1:]) if fim > inicio]
+    for feitas, faixa in enumerate(faixas, start=1):
+        parte = CarteiraLote(lote.saldos[faixa], lote.taxas[faixa], lote.parcelas[faixa], lote.prazos[faixa])
+        resultado = simular_quitacao_lote(parametros[EIXO_RENDA][faixa], parametros[EIXO_DESPESAS][faixa], parte,
+                                          estrategia, max_meses, juros_antes_do_extra, parar_inviaveis=True)
+        quitado = resultado["quitado"]
+        meses[faixa] = np.where(quitado, resultado["meses"], np.nan)
+        juros[faixa] = np.where(quitado, resultado["juros_totais"], np.nan)
+        if progresso is not None:
+            progresso(feitas / len(faixas), {chave: valor.copy() for chave, valor in grade.items()})
+    return grade
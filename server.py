@@ -0,0 +1,369 @@
+"""
+Serviço HTTP local (JSON) do simulador, sem Streamlit e sem dependências externas.
+
+Uso:
+    python server.py                       # http://127.0.0.1:8765
+    python server.py --porta 9000 --janela-ms 5 --max-lote 2048
+
+Rotas:
+    POST /simular_mes   um mês de pagamentos (mesma semântica de `calculator.simular_mes`)
+        {"renda": 4860, "despesas": 800, "estrategia": "avalanche",
+         "dividas": [{"nome": "Cartão", "saldo_devedor": 4803.58, "taxa_juros_mensal": 0.12,
+                      "parcela_mensal": 1000, "prazo_restante_meses": null}]}
+    POST /simular       até quitar (mesmo corpo, mais "max_meses" opcional, padrão 1200);
+                        carteiras impagáveis param cedo, com "inviavel": true
+    GET  /metricas      latência p50/p99, vazão e tamanho dos lotes
+    GET  /saude
+
+Pedidos que chegam juntos são agrupados em micro-lotes (até `--max-lote` pedidos ou
+`--janela-ms` de espera) e simulados de uma vez no motor vetorizado de `batch.py`.
+A E/S é assíncrona (asyncio): clientes lentos só ocupam uma corrotina, e a conta do
+lote roda numa thread à parte para não travar o laço de eventos.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models import Divida
+from batch import CarteiraLote, simular_mes_lote, simular_quitacao_lote
+from calculator import MESES_LIMITE_SEGURANCA
+from strategies import estrategias_registradas
+
+SIMULAR_MES = 'simular_mes'
+SIMULAR = 'simular'
+
+JANELA_MS = 2.0  # Espera máxima para juntar pedidos num lote
+MAX_LOTE = 1024  # Pedidos por lote
+MAX_MESES_PADRAO = MESES_LIMITE_SEGURANCA  # Impagáveis saem cedo do lote, então o teto longo é barato
+MAX_MESES_LIMITE = MESES_LIMITE_SEGURANCA  # Maior horizonte aceito por pedido
+MAX_CORPO = 1024 * 1024  # Bytes
+MAX_DIVIDAS = 200  # Por pedido: o lote inteiro é completado até a carteira mais larga
+MAX_VALOR = 1e12  # Maior valor em reais aceito (renda, despesas, saldos e parcelas)
+MAX_TAXA = 1.0  # 100% a.m.
+JANELA_METRICAS = 60.0  # Segundos considerados na vazão
+AMOSTRAS_LATENCIA = 100_000  # Últimas latências guardadas para os percentis
+
+Pedido = Tuple[float, float, List[Divida]]  # (renda, despesas, dívidas)
+
+
+class PedidoInvalido(ValueError):
+    """Corpo do pedido fora do formato esperado (vira HTTP 400)."""
+
+
+# ==================== PEDIDOS ====================
+def _numero(campos: Dict, nome: str, padrao: Optional[float] = None, maximo: float = MAX_VALOR) -> float:
+    """Número entre 0 e `maximo` (json.loads aceita NaN e Infinity, que não têm resposta válida)."""
+    valor = campos.get(nome, padrao)
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        raise PedidoInvalido(f"'{nome}' precisa ser um número")
+    if not 0 <= valor <= maximo:  # Também recusa NaN
+        raise PedidoInvalido(f"'{nome}' precisa estar entre 0 e {maximo:g}")
+    return float(valor)
+
+
+def ler_pedido(corpo: Dict) -> Tuple[Pedido, Tuple]:
+    """Valida o corpo JSON. Retorna o pedido e as opções que definem o lote em que ele pode entrar."""
+    if not isinstance(corpo, dict) or not isinstance(corpo.get('dividas'), list):
+        raise PedidoInvalido("O corpo precisa ser um objeto com a lista 'dividas'")
+    if len(corpo['dividas']) > MAX_DIVIDAS:
+        raise PedidoInvalido(f"No máximo {MAX_DIVIDAS} dívidas por pedido")
+    dividas = []
+    for campos in corpo['dividas']:
+        if not isinstance(campos, dict):
+            raise PedidoInvalido("Cada dívida precisa ser um objeto")
+        prazo = campos.get('prazo_restante_meses')
+        if prazo is not None and (isinstance(prazo, bool) or not isinstance(prazo, int)):
+            raise PedidoInvalido("'prazo_restante_meses' precisa ser inteiro ou null")
+        if prazo is not None and prazo < 0:
+            raise PedidoInvalido("'prazo_restante_meses' não pode ser negativo")
+        dividas.append(Divida(
+            nome=str(campos.get('nome', '')),
+            saldo_devedor=_numero(campos, 'saldo_devedor'),
+            taxa_juros_mensal=_numero(campos, 'taxa_juros_mensal', maximo=MAX_TAXA),
+            parcela_mensal=_numero(campos, 'parcela_mensal'),
+            prazo_restante_meses=prazo
+        ))
+
+    estrategia = corpo.get('estrategia', 'avalanche')
+    nomes = [e.nome for e in estrategias_registradas()]
+    if estrategia not in nomes:
+        raise PedidoInvalido(f"'estrategia' precisa ser uma de {', '.join(nomes)}")
+    max_meses = corpo.get('max_meses', MAX_MESES_PADRAO)
+    if isinstance(max_meses, bool) or not isinstance(max_meses, int) or not 1 <= max_meses <= MAX_MESES_LIMITE:
+        raise PedidoInvalido(f"'max_meses' precisa ser inteiro entre 1 e {MAX_MESES_LIMITE}")
+    opcoes = (estrategia, bool(corpo.get('juros_antes_do_extra', False)), max_meses)
+    return (_numero(corpo, 'renda'), _numero(corpo, 'despesas', 0.0), dividas), opcoes
+
+
+# ==================== SIMULAÇÃO EM LOTE ====================
+def _lote(pedidos: List[Pedido]) -> Tuple[np.ndarray, np.ndarray, CarteiraLote]:
+    renda = np.array([p[0] for p in pedidos])
+    despesas = np.array([p[1] for p in pedidos])
+    return renda, despesas, CarteiraLote.from_dividas([p[2] for p in pedidos])
+
+
+def simular_mes_pedidos(pedidos: List[Pedido], estrategia: str, juros_antes_do_extra: bool) -> List[Dict]:
+    """Um mês para todos os pedidos de uma vez; devolve a resposta de cada um, na ordem."""
+    renda, despesas, lote = _lote(pedidos)
+    r = simular_mes_lote(renda, despesas, lote, estrategia, juros_antes_do_extra)
+    respostas = []
+    for i, (_, _, dividas) in enumerate(pedidos):
+        respostas.append({
+            "saldo_devedor_total": float(r["saldo_devedor_total"][i]),
+            "juros_pagos_mes": float(r["juros_pagos_mes"][i]),
+            "dividas_ativas": int(r["dividas_ativas"][i]),
+            "pagamento_total_dividas": float(r["pagamento_total_dividas"][i]),
+            "dividas": [
+                {"nome": d.nome, "saldo_devedor": float(lote.saldos[i, j]),
+                 "prazo_restante_meses": None if lote.prazos[i, j] < 0 else int(lote.prazos[i, j]),
+                 "pagamento": float(r["pagamento_por_divida"][i, j]), "juros": float(r["juros_por_divida"][i, j])}
+                for j, d in enumerate(dividas)
+            ]
+        })
+    return respostas
+
+
+def simular_pedidos(pedidos: List[Pedido], estrategia: str, juros_antes_do_extra: bool,
+                    max_meses: int) -> List[Dict]:
+    """Quitação de todos os pedidos de uma vez (carteiras impagáveis saem do lote cedo)."""
+    renda, despesas, lote = _lote(pedidos)
+    r = simular_quitacao_lote(renda, despesas, lote, estrategia, max_meses, juros_antes_do_extra,
+                              parar_inviaveis=True)
+    return [
+        {"meses": int(r["meses"][i]), "juros_totais": float(r["juros_totais"][i]),
+         "saldo_final": float(r["saldo_final"][i]), "quitado": bool(r["quitado"][i]),
+         "inviavel": bool(r["inviavel"][i])}
+        for i in range(len(pedidos))
+    ]
+
+
+def simular_grupo(tipo: str, opcoes: Tuple, pedidos: List[Pedido]) -> List[Dict]:
+    estrategia, juros_antes_do_extra, max_meses = opcoes
+    if tipo == SIMULAR_MES:
+        return simular_mes_pedidos(pedidos, estrategia, juros_antes_do_extra)
+    return simular_pedidos(pedidos, estrategia, juros_antes_do_extra, max_meses)
+
+
+# ==================== MÉTRICAS ====================
+class Metricas:
+    """Latência (do pedido lido à resposta pronta), vazão na última janela e tamanho dos lotes."""
+
+    def __init__(self):
+        self.inicio = time.monotonic()
+        self.respondidos = 0
+        self.erros = 0
+        self.lotes = 0
+        self.pedidos_em_lote = 0
+        self.maior_lote = 0
+        self._latencias = deque(maxlen=AMOSTRAS_LATENCIA)  # (instante, segundos)
+
+    def registrar(self, inicio: float, erro: bool = False):
+        agora = time.monotonic()
+        self.respondidos += 1
+        self.erros += erro
+        self._latencias.append((agora, agora - inicio))
+
+    def registrar_lote(self, tamanho: int):
+        self.lotes += 1
+        self.pedidos_em_lote += tamanho
+        self.maior_lote = max(self.maior_lote, tamanho)
+
+    def relatorio(self) -> Dict:
+        agora = time.monotonic()
+        recentes = [s for t, s in self._latencias if agora - t <= JANELA_METRICAS]
+        janela = min(JANELA_METRICAS, agora - self.inicio) or 1.0
+        p50, p99 = np.percentile(recentes, [50, 99]) * 1000 if recentes else (0.0, 0.0)
+        return {
+            "respondidos": self.respondidos,
+            "erros": self.erros,
+            "latencia_p50_ms": round(float(p50), 3),
+            "latencia_p99_ms": round(float(p99), 3),
+            "vazao_por_segundo": round(len(recentes) / janela, 1),
+            "janela_segundos": round(janela, 1),
+            "lotes": self.lotes,
+            "media_por_lote": round(self.pedidos_em_lote / self.lotes, 1) if self.lotes else 0.0,
+            "maior_lote": self.maior_lote
+        }
+
+
+# ==================== MICRO-LOTES ====================
+class AgrupadorLotes:
+    """
+    Junta os pedidos que chegam quase juntos e simula cada grupo numa chamada só do
+    motor em lote. Um lote é fechado ao atingir `max_lote` pedidos ou `janela_ms` depois
+    do primeiro; enquanto ele roda, os próximos pedidos já vão formando o lote seguinte
+    (sob carga os lotes crescem sozinhos). Só entram no mesmo lote pedidos com as mesmas
+    opções (rota, estratégia, ordem dos juros e horizonte).
+    """
+
+    def __init__(self, metricas: Metricas, janela_ms: float = JANELA_MS, max_lote: int = MAX_LOTE):
+        self.metricas = metricas
+        self.janela = janela_ms / 1000
+        self.max_lote = max_lote
+        self._fila: Optional[asyncio.Queue] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='lote')
+
+    async def simular(self, tipo: str, opcoes: Tuple, pedido: Pedido) -> Dict:
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((tipo, opcoes, pedido, futuro))
+        return await futuro
+
+    async def rodar(self):
+        self._fila = asyncio.Queue()
+        laco = asyncio.get_running_loop()
+        while True:
+            # 1. Esperar o primeiro pedido e juntar os que chegarem dentro da janela
+            itens = [await self._fila.get()]
+            limite = laco.time() + self.janela
+            while len(itens) < self.max_lote:
+                try:
+                    itens.append(self._fila.get_nowait())
+                except asyncio.QueueEmpty:
+                    restante = limite - laco.time()
+                    if restante <= 0:
+                        break
+                    try:
+                        itens.append(await asyncio.wait_for(self._fila.get(), restante))
+                    except asyncio.TimeoutError:
+                        break
+
+            # 2. Separar por opções e simular cada grupo fora do laço de eventos
+            grupos: Dict[Tuple, List] = {}
+            for tipo, opcoes, pedido, futuro in itens:
+                grupos.setdefault((tipo, opcoes), []).append((pedido, futuro))
+            for (tipo, opcoes), grupo in grupos.items():
+                self.metricas.registrar_lote(len(grupo))
+                try:
+                    respostas = await laco.run_in_executor(self._executor, simular_grupo, tipo, opcoes,
+                                                           [pedido for pedido, _ in grupo])
+                except Exception as erro:
+                    for _, futuro in grupo:
+                        if not futuro.done():
+                            futuro.set_exception(erro)
+                    continue
+
+                # 3. Entregar cada resposta a quem pediu
+                for (_, futuro), resposta in zip(grupo, respostas):
+                    if not futuro.done():  # Cliente pode ter desconectado
+                        futuro.set_result(resposta)
+
+
+# ==================== HTTP ====================
+STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+          413: 'Payload Too Large', 500: 'Internal Server Error'}
+ROTAS_SIMULACAO = {'/simular_mes': SIMULAR_MES, '/simular': SIMULAR}
+
+
+class Servidor:
+    """HTTP/1.1 mínimo com keep-alive, o suficiente para clientes JSON locais."""
+
+    def __init__(self, janela_ms: float = JANELA_MS, max_lote: int = MAX_LOTE):
+        self.metricas = Metricas()
+        self.agrupador = AgrupadorLotes(self.metricas, janela_ms, max_lote)
+
+    async def _responder(self, escritor: asyncio.StreamWriter, status: int, corpo: Dict, manter: bool):
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+        cabecalho = (f"HTTP/1.1 {status} {STATUS[status]}\r\n"
+                     f"Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(dados)}\r\n"
+                     f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n")
+        escritor.write(cabecalho.encode('ascii') + dados)
+        await escritor.drain()
+
+    async def _atender(self, metodo: str, caminho: str, corpo: bytes) -> Tuple[int, Dict]:
+        if caminho == '/saude':
+            return 200, {"status": "ok"}
+        if caminho == '/metricas':
+            return 200, self.metricas.relatorio()
+        if caminho not in ROTAS_SIMULACAO:
+            return 404, {"erro": f"Rota desconhecida: {caminho}"}
+        if metodo != 'POST':
+            return 405, {"erro": "Use POST"}
+
+        inicio = time.monotonic()
+        try:
+            pedido, opcoes = ler_pedido(json.loads(corpo or b'null'))
+        except (PedidoInvalido, json.JSONDecodeError, UnicodeDecodeError) as erro:
+            self.metricas.registrar(inicio, erro=True)
+            return 400, {"erro": str(erro)}
+        try:
+            resposta = await self.agrupador.simular(ROTAS_SIMULACAO[caminho], opcoes, pedido)
+        except Exception as erro:
+            self.metricas.registrar(inicio, erro=True)
+            return 500, {"erro": f"{type(erro).__name__}: {erro}"}
+        self.metricas.registrar(inicio)
+        return 200, resposta
+
+    async def conexao(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        """Atende os pedidos de uma conexão em sequência até o cliente fechar."""
+        try:
+            while True:
+                # 1. Linha de pedido e cabeçalhos
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                try:
+                    metodo, caminho, versao = linha.decode('latin-1').split()
+                except ValueError:
+                    await self._responder(escritor, 400, {"erro": "Linha de pedido inválida"}, False)
+                    break
+                cabecalhos = {}
+                while True:
+                    linha = await leitor.readline()
+                    if linha in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = linha.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                manter = cabecalhos.get('connection', '').lower() != 'close' and versao == 'HTTP/1.1'
+
+                # 2. Corpo
+                tamanho = int(cabecalhos.get('content-length') or 0)
+                if tamanho > MAX_CORPO:
+                    await self._responder(escritor, 413, {"erro": f"Corpo acima de {MAX_CORPO} bytes"}, False)
+                    break
+                corpo = await leitor.readexactly(tamanho) if tamanho else b''
+
+                # 3. Resposta
+                status, resposta = await self._atender(metodo, caminho.split('?', 1)[0], corpo)
+                await self._responder(escritor, status, resposta, manter)
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self, host: str, porta: int):
+        tarefa_lotes = asyncio.create_task(self.agrupador.rodar())
+        servidor = await asyncio.start_server(self.conexao, host, porta, backlog=1024)
+        print(f"Servindo em http://{host}:{porta} (janela {self.agrupador.janela * 1000:g} ms, "
+              f"até {self.agrupador.max_lote} pedidos por lote)")
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            tarefa_lotes.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP local do simulador de dívidas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--janela-ms", type=float, default=JANELA_MS,
+                        help="Espera máxima para juntar pedidos num lote")
+    parser.add_argument("--max-lote", type=int, default=MAX_LOTE, help="Pedidos por lote")
+    args = parser.parse_args()
+    try:
+        asyncio.run(Servidor(args.janela_ms, args.max_lote).servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import math
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import Divida
+from batch import CarteiraLote, simular_quitacao_lote
+
+
+def _avaliar(dividas: List[Divida], saldos_mensais: Sequence[float], estrategia: str,
+             max_meses: int, juros_antes_do_extra: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Avaliador em lote: replica a carteira uma vez por saldo mensal candidato e
+    simula todos juntos. Retorna (meses, quitado) por candidato.
+    """
+    saldos_mensais = np.asarray(saldos_mensais, dtype=float)
+    base = CarteiraLote.from_dividas([dividas])
+    n = saldos_mensais.size
+    carteira = CarteiraLote(np.repeat(base.saldos, n, axis=0), np.repeat(base.taxas, n, axis=0),
+                            np.repeat(base.parcelas, n, axis=0), np.repeat(base.prazos, n, axis=0))
+    resultado = simular_quitacao_lote(saldos_mensais, 0.0, carteira, estrategia,
+                                      max_meses, juros_antes_do_extra)
+    return resultado["meses"], resultado["quitado"]
+
+
+def meses_para_quitar(dividas: List[Divida], saldos_mensais: Sequence[float],
+                      estrategia: str = 'avalanche', max_meses: int = 120,
+                      juros_antes_do_extra: bool = False) -> np.ndarray:
+    """
+    Mês de quitação para cada saldo mensal da lista, numa única simulação em lote.
+    Candidatos que não quitam em `max_meses` recebem -1.
+    """
+    meses, quitado = _avaliar(dividas, saldos_mensais, estrategia, max_meses, juros_antes_do_extra)
+    return np.where(quitado, meses, -1)
+
+
+def mes_quitacao(dividas: List[Divida], saldo_mensal: float, estrategia: str = 'avalanche',
+                 max_meses: int = 120, juros_antes_do_extra: bool = False) -> Optional[int]:
+    """Inverso do solver: em quantos meses quita com este saldo mensal (None se não quita)."""
+    mes = meses_para_quitar(dividas, [saldo_mensal], estrategia, max_meses, juros_antes_do_extra)[0]
+    return None if mes < 0 else int(mes)
+
+
+def saldo_minimo_para_quitar(dividas: List[Divida], meses_alvo: int, estrategia: str = 'avalanche',
+                             juros_antes_do_extra: bool = False,
+                             candidatos_por_rodada: int = 32) -> Optional[float]:
+    """
+    Menor saldo mensal (renda - despesas), arredondado para cima no centavo,
+    que quita todas as dívidas em até `meses_alvo` meses. Nunca fica abaixo da
+    soma das parcelas mínimas.
+    Como o prazo só cai quando o saldo mensal sobe, cada rodada avalia uma grade
+    de candidatos em lote e estreita o intervalo até a precisão de R$ 0,01.
+    Retorna None se a meta for impossível (ex: zero meses com saldo em aberto).
+    """
+    def atinge(valores):
+        return _avaliar(dividas, valores, estrategia, meses_alvo, juros_antes_do_extra)[1]
+
+    # O modelo paga as parcelas mínimas de qualquer forma; abaixo disso o saldo não se sustenta
+    inferior = sum(d.parcela_mensal for d in dividas if d.saldo_devedor > 0)
+    if atinge([inferior])[0]:
+        return inferior
+    if meses_alvo < 1:
+        return None
+
+    # Quitar tudo no primeiro mês (saldo + um mês de juros) sempre atinge a meta
+    maior_taxa = max((d.taxa_juros_mensal for d in dividas), default=0.0)
+    superior = inferior + sum(d.saldo_devedor for d in dividas) * (1 + maior_taxa) + 1
+
+    # Invariante: `inferior` não atinge a meta e `superior` atinge
+    while superior - inferior > 0.01 * candidatos_por_rodada:
+        grade = np.linspace(inferior, superior, candidatos_por_rodada + 2)[1:-1]
+        ok = atinge(grade)
+        if ok.any():
+            primeiro = int(np.argmax(ok))
+            superior = grade[primeiro]
+            if primeiro > 0:
+                inferior = grade[primeiro - 1]
+        else:
+            inferior = grade[-1]
+
+    # Última rodada: todos os centavos restantes do intervalo de uma vez
+    centavos = np.arange(math.floor(inferior * 100) + 1, math.ceil(superior * 100) + 1) / 100
+    return float(centavos[np.argmax(atinge(centavos))])
+
+
+def renda_extra_necessaria(dividas: List[Divida], saldo_mensal_atual: float, meses_alvo: int,
+                           estrategia: str = 'avalanche',
+                           juros_antes_do_extra: bool = False) -> Optional[float]:
+    """Quanto de renda extra por mês falta para quitar em `meses_alvo` (0 se a sobra atual já basta)."""
+    minimo = saldo_minimo_para_quitar(dividas, meses_alvo, estrategia, juros_antes_do_extra)
+    if minimo is None:
+        return None
+    return max(0.0, minimo - saldo_mensal_atual)
@@ -0,0 +1,245 @@
+import os
+import pickle
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+CAMINHO_PADRAO = os.environ.get('SIMULADOR_DB', 'simulador.db')
+MAX_CONEXOES = 4
+DIAS_RESULTADOS = 30  # Resultados sem acesso há mais tempo que isso são apagados
+DIAS_PERFIS = 180  # Perfis sem uso (nem carregados nem alterados) há mais tempo que isso são apagados
+MAX_BYTES_RESULTADOS = 256 * 1024 * 1024
+ESCRITAS_POR_COMPACTACAO = 500  # Compacta sozinho a cada tantos resultados guardados
+ACESSOS_POR_ESCRITA = 64  # Datas de acesso acumuladas antes de gravar (em lote)
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS perfis (
+    id TEXT PRIMARY KEY,
+    despesas_fixas REAL NOT NULL DEFAULT 0,
+    atualizado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS perfis_atualizado_em ON perfis (atualizado_em);
+CREATE TABLE IF NOT EXISTS dividas (
+    perfil_id TEXT NOT NULL REFERENCES perfis (id) ON DELETE CASCADE,
+    posicao INTEGER NOT NULL,
+    nome TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    saldo REAL NOT NULL,
+    taxa_juros REAL NOT NULL,
+    parcela_minima REAL NOT NULL,
+    PRIMARY KEY (perfil_id, posicao)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS receitas (
+    perfil_id TEXT NOT NULL REFERENCES perfis (id) ON DELETE CASCADE,
+    posicao INTEGER NOT NULL,
+    nome TEXT NOT NULL,
+    valor REAL NOT NULL,
+    PRIMARY KEY (perfil_id, posicao)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS resultados (
+    chave TEXT PRIMARY KEY,
+    valor BLOB NOT NULL,
+    bytes INTEGER NOT NULL,
+    criado_em REAL NOT NULL,
+    acessado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS resultados_acessado_em ON resultados (acessado_em);
+"""
+
+
+class ArmazemSQLite:
+    """
+    Banco local (SQLite) com os perfis dos usuários (dívidas, receitas e despesas) e
+    os resultados de simulação por hash das entradas (`cache.chave_simulacao`).
+    Seguro para várias threads: cada operação pega uma conexão do pool e devolve ao fim.
+    Cada escrita é uma transação só (um perfil inteiro, ou um lote de resultados), e as
+    datas de acesso dos resultados lidos são gravadas em lote. O tamanho fica limitado
+    por `compactar`, que roda sozinho a cada ESCRITAS_POR_COMPACTACAO resultados guardados.
+    Os resultados são gravados com pickle: o banco é local e só este app escreve nele.
+    """
+
+    def __init__(self, caminho: str = CAMINHO_PADRAO, max_conexoes: int = MAX_CONEXOES):
+        self.caminho = caminho
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._acessos: Dict[str, float] = {}  # chave -> instante, ainda não gravados
+        self._escritas = 0
+        for i in range(max_conexoes):
+            conexao = sqlite3.connect(caminho, timeout=30, check_same_thread=False, isolation_level=None)
+            if i == 0:
+                # auto_vacuum só vale se definido antes de criar as tabelas
+                conexao.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conexao.execute("PRAGMA journal_mode = WAL")  # Leitores não esperam o escritor
+                conexao.executescript(ESQUEMA)
+            conexao.execute("PRAGMA synchronous = NORMAL")
+            conexao.execute("PRAGMA foreign_keys = ON")
+            self._pool.put(conexao)
+
+    @contextmanager
+    def _conexao(self) -> Iterator[sqlite3.Connection]:
+        conexao = self._pool.get()
+        try:
+            yield conexao
+        finally:
+            self._pool.put(conexao)
+
+    @contextmanager
+    def _transacao(self) -> Iterator[sqlite3.Connection]:
+        with self._conexao() as conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                yield conexao
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+            conexao.execute("COMMIT")
+
+    def fechar(self):
+        self.gravar_acessos()
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    # ==================== PERFIS ====================
+    def salvar_perfil(self, perfil_id: str, dividas: List[Dict], receitas: List[Dict], despesas_fixas: float):
+        """Grava o perfil inteiro numa transação (substitui dívidas e receitas anteriores)."""
+        with self._transacao() as conexao:
+            conexao.execute(
+                "INSERT INTO perfis (id, despesas_fixas, atualizado_em) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET despesas_fixas = excluded.despesas_fixas, "
+                "atualizado_em = excluded.atualizado_em",
+                (perfil_id, float(despesas_fixas), time.time()))
+            conexao.execute("DELETE FROM dividas WHERE perfil_id = ?", (perfil_id,))
+            conexao.execute("DELETE FROM receitas WHERE perfil_id = ?", (perfil_id,))
+            conexao.executemany(
+                "INSERT INTO dividas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(perfil_id, i, d['nome'], d['tipo'], d['saldo'], d['taxa_juros'], d['parcela_minima'])
+                 for i, d in enumerate(dividas)])
+            conexao.executemany(
+                "INSERT INTO receitas VALUES (?, ?, ?, ?)",
+                [(perfil_id, i, r['nome'], r['valor']) for i, r in enumerate(receitas)])
+
+    def carregar_perfil(self, perfil_id: str) -> Optional[Dict]:
+        """
+        {'dividas', 'receitas', 'despesas_fixas'} no formato da sessão do app, ou None.
+        Carregar conta como uso: renova `atualizado_em`, que decide a retenção do perfil.
+        """
+        with self._transacao() as conexao:
+            if not conexao.execute("UPDATE perfis SET atualizado_em = ? WHERE id = ?",
+                                   (time.time(), perfil_id)).rowcount:
+                return None
+            despesas_fixas = conexao.execute("SELECT despesas_fixas FROM perfis WHERE id = ?",
+                                             (perfil_id,)).fetchone()[0]
+            dividas = conexao.execute(
+                "SELECT nome, tipo, saldo, taxa_juros, parcela_minima FROM dividas "
+                "WHERE perfil_id = ? ORDER BY posicao", (perfil_id,)).fetchall()
+            receitas = conexao.execute(
+                "SELECT nome, valor FROM receitas WHERE perfil_id = ? ORDER BY posicao", (perfil_id,)).fetchall()
+        return {
+            "dividas": [{'nome': n, 'tipo': t, 'saldo': s, 'taxa_juros': j, 'parcela_minima': p}
+                        for n, t, s, j, p in dividas],
+            "receitas": [{'nome': n, 'valor': v} for n, v in receitas],
+            "despesas_fixas": despesas_fixas
+        }
+
+    def remover_perfil(self, perfil_id: str):
+        with self._transacao() as conexao:
+            conexao.execute("DELETE FROM perfis WHERE id = ?", (perfil_id,))
+
+    # ==================== RESULTADOS ====================
+    def obter_resultado(self, chave: str, padrao: Any = None) -> Any:
+        with self._conexao() as conexao:
+            linha = conexao.execute("SELECT valor FROM resultados WHERE chave = ?", (chave,)).fetchone()
+        if linha is None:
+            return padrao
+        try:
+            valor = pickle.loads(linha[0])
+        except Exception:  # Gravado por outra versão do código ou das bibliotecas: conta como ausente
+            with self._transacao() as conexao:
+                conexao.execute("DELETE FROM resultados WHERE chave = ?", (chave,))
+            return padrao
+        with self._lock:
+            self._acessos[chave] = time.time()
+            gravar = len(self._acessos) >= ACESSOS_POR_ESCRITA
+        if gravar:
+            self.gravar_acessos()
+        return valor
+
+    def guardar_resultado(self, chave: str, valor: Any):
+        self.guardar_resultados([(chave, valor)])
+
+    def guardar_resultados(self, itens: Iterable[Tuple[str, Any]]):
+        """Grava vários resultados numa transação (serializados antes de pegar a conexão)."""
+        agora = time.time()
+        linhas = []
+        for chave, valor in itens:
+            dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+            linhas.append((chave, dados, len(dados), agora, agora))
+        if not linhas:
+            return
+        with self._transacao() as conexao:
+            conexao.executemany("INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?)", linhas)
+        with self._lock:
+            self._escritas += len(linhas)
+            compactar = self._escritas >= ESCRITAS_POR_COMPACTACAO
+            if compactar:
+                self._escritas = 0
+        if compactar:
+            self.compactar()
+
+    def gravar_acessos(self):
+        """Grava as datas de acesso acumuladas (usadas para decidir o que apagar)."""
+        with self._lock:
+            acessos, self._acessos = self._acessos, {}
+        if acessos:
+            with self._transacao() as conexao:
+                conexao.executemany("UPDATE resultados SET acessado_em = ? WHERE chave = ?",
+                                    [(instante, chave) for chave, instante in acessos.items()])
+
+    # ==================== RETENÇÃO ====================
+    def compactar(self, dias_resultados: float = DIAS_RESULTADOS, dias_perfis: float = DIAS_PERFIS,
+                  max_bytes_resultados: int = MAX_BYTES_RESULTADOS) -> Dict:
+        """
+        Apaga resultados sem acesso há `dias_resultados`, depois os menos acessados até
+        caberem em `max_bytes_resultados`, e perfis sem uso há `dias_perfis`;
+        então devolve as páginas livres ao disco. Retorna quantos itens apagou.
+        """
+        self.gravar_acessos()
+        agora = time.time()
+        with self._transacao() as conexao:
+            # 1. Resultados velhos
+            antigos = conexao.execute("DELETE FROM resultados WHERE acessado_em < ?",
+                                      (agora - dias_resultados * 86400,)).rowcount
+            # 2. Teto de tamanho: apagar pelos acessos mais antigos
+            total = conexao.execute("SELECT COALESCE(SUM(bytes), 0) FROM resultados").fetchone()[0]
+            excesso = 0
+            if total > max_bytes_resultados:
+                corte = conexao.execute(
+                    "SELECT acessado_em FROM (SELECT acessado_em, SUM(bytes) OVER "
+                    "(ORDER BY acessado_em DESC, chave DESC) AS acumulado FROM resultados) "
+                    "WHERE acumulado > ? ORDER BY acessado_em DESC LIMIT 1", (max_bytes_resultados,)).fetchone()
+                if corte is not None:
+                    excesso = conexao.execute("DELETE FROM resultados WHERE acessado_em <= ?", corte).rowcount
+            # 3. Perfis abandonados: nem carregados nem alterados (dívidas e receitas vão junto, em cascata)
+            perfis = conexao.execute("DELETE FROM perfis WHERE atualizado_em < ?",
+                                     (agora - dias_perfis * 86400,)).rowcount
+        with self._conexao() as conexao:
+            conexao.executescript("PRAGMA incremental_vacuum")  # execute() só daria um passo (uma página)
+            conexao.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"resultados_antigos": antigos, "resultados_excesso": excesso, "perfis": perfis}
+
+    def estatisticas(self) -> Dict:
+        with self._conexao() as conexao:
+            resultados, bytes_resultados = conexao.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM resultados").fetchone()
+            perfis = conexao.execute("SELECT COUNT(*) FROM perfis").fetchone()[0]
+            paginas = conexao.execute("PRAGMA page_count").fetchone()[0]
+            tamanho_pagina = conexao.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            "perfis": perfis,
+            "resultados": resultados,
+            "bytes_resultados": bytes_resultados,
+            "bytes_arquivo": paginas * tamanho_pagina
+        }
@@ -0,0 +1,121 @@
+"""
+Registro de estratégias de pagamento extra.
+
+Uma estratégia é uma função vetorizada de prioridade: recebe as matrizes
+(carteiras x dívidas) de saldos, taxas e parcelas e devolve a chave de cada dívida;
+a sobra do mês vai primeiro para a menor chave (empates: ordem original). Novas
+estratégias entram com o decorador:
+
+    from strategies import registrar_estrategia
+
+    @registrar_estrategia('maior_juros_reais', 'Maior Juros em R$ 💸', 'Dívida que mais gera juros no mês primeiro')
+    def maior_juros_reais(saldos, taxas, parcelas):
+        return -saldos * taxas
+
+Plugins fora do repositório: módulos listados em SIMULADOR_ESTRATEGIAS (separados por
+vírgula) são importados na primeira consulta ao registro.
+"""
+import importlib
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+ChaveEstrategia = Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+
+
+@dataclass(frozen=True)
+class Estrategia:
+    nome: str  # Identificador usado pelos motores ('avalanche', 'snowball', ...)
+    rotulo: str  # Como aparece na interface
+    descricao: str
+    chave: ChaveEstrategia
+
+
+ESTRATEGIAS: Dict[str, Estrategia] = {}
+_plugins_carregados = False
+
+
+def registrar_estrategia(nome: str, rotulo: str, descricao: str = ''):
+    """Decorador: registra `chave(saldos, taxas, parcelas)` como a estratégia `nome`."""
+    def registrar(chave: ChaveEstrategia) -> ChaveEstrategia:
+        if nome in ESTRATEGIAS:
+            raise ValueError(f"Estratégia já registrada: {nome}")
+        ESTRATEGIAS[nome] = Estrategia(nome, rotulo, descricao, chave)
+        return chave
+    return registrar
+
+
+def carregar_plugins(modulos: Sequence[str] = ()):
+    """Importa os módulos de estratégias (os da SIMULADOR_ESTRATEGIAS só na primeira vez)."""
+    global _plugins_carregados
+    if not _plugins_carregados:
+        _plugins_carregados = True
+        modulos = list(modulos) + [m.strip() for m in os.environ.get('SIMULADOR_ESTRATEGIAS', '').split(',')]
+    for modulo in modulos:
+        if modulo:
+            importlib.import_module(modulo)
+
+
+def estrategias_registradas() -> List[Estrategia]:
+    carregar_plugins()
+    return list(ESTRATEGIAS.values())
+
+
+def obter_estrategia(nome: str) -> Estrategia:
+    if nome not in ESTRATEGIAS:
+        carregar_plugins()
+    try:
+        return ESTRATEGIAS[nome]
+    except KeyError:
+        raise ValueError(f"Estratégia desconhecida: {nome} (registradas: {', '.join(ESTRATEGIAS)})") from None
+
+
+@dataclass(frozen=True)
+class EstrategiasPorLinha:
+    """Uma estratégia por carteira do lote, em códigos inteiros (comparar nomes a cada mês sairia caro)."""
+    nomes: Tuple[str, ...]
+    codigos: np.ndarray  # Índice em `nomes` de cada linha
+
+    @classmethod
+    def de_nomes(cls, por_linha: Sequence[str]) -> "EstrategiasPorLinha":
+        nomes, codigos = np.unique(np.asarray(por_linha, dtype=str), return_inverse=True)
+        return cls(tuple(str(nome) for nome in nomes), codigos.ravel())
+
+    def linhas(self, selecao) -> "EstrategiasPorLinha":
+        return EstrategiasPorLinha(self.nomes, self.codigos[selecao])
+
+
+def ordem_extra(saldos: np.ndarray, taxas: np.ndarray, parcelas: np.ndarray,
+                estrategia: Union[str, Sequence[str], EstrategiasPorLinha]) -> np.ndarray:
+    """
+    Índices das dívidas de cada carteira na ordem em que recebem o pagamento extra.
+    `estrategia` pode ser um nome (vale para todas as linhas) ou um nome por linha,
+    para simular várias estratégias no mesmo lote.
+    """
+    if not isinstance(estrategia, (str, EstrategiasPorLinha)):
+        estrategia = EstrategiasPorLinha.de_nomes(estrategia)
+    if isinstance(estrategia, EstrategiasPorLinha) and len(estrategia.nomes) == 1:
+        estrategia = estrategia.nomes[0]
+    # Ordenação estável, igual ao sorted() de simular_mes (empates mantêm a ordem original)
+    if isinstance(estrategia, str):
+        return np.argsort(obter_estrategia(estrategia).chave(saldos, taxas, parcelas), axis=1, kind='stable')
+    # Chaves de todas as linhas numa matriz só, para ordenar tudo de uma vez
+    chave = np.empty(saldos.shape)
+    for codigo, nome in enumerate(estrategia.nomes):
+        linhas = estrategia.codigos == codigo
+        chave[linhas] = obter_estrategia(nome).chave(saldos[linhas], taxas[linhas], parcelas[linhas])
+    return np.argsort(chave, axis=1, kind='stable')
+
+
+# ==================== ESTRATÉGIAS PADRÃO ====================
+@registrar_estrategia('avalanche', 'Avalanche 🔥', 'Maiores juros primeiro: economiza dinheiro')
+def _avalanche(saldos, taxas, parcelas):
+    return -taxas
+
+
+@registrar_estrategia('snowball', 'Bola de Neve ❄️', 'Menores dívidas primeiro: menos boletos mais cedo')
+def _snowball(saldos, taxas, parcelas):
+    return saldos
+
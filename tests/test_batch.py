@@ -0,0 +1,39 @@
+import random
+
+import numpy as np
+import pytest
+
+from batch import CarteiraLote, simular_quitacao_lote
+from calculator import CarteiraSimulada, simular_quitacao
+from models import Divida
+
+
+def _carteiras(semente, n=200):
+    rnd = random.Random(semente)
+    carteiras, sobras = [], []
+    for _ in range(n):
+        dividas = [Divida(f'Dívida {j}', round(rnd.uniform(10, 20000), 2),
+                          rnd.choice([0.0, 0.005, 0.01, 0.02, 0.05, 0.08, 0.12, round(rnd.uniform(0, 0.15), 4)]),
+                          round(rnd.uniform(0, 800), 2), rnd.choice([None, rnd.randint(1, 60)]))
+                   for j in range(rnd.randint(1, 12))]
+        carteiras.append(dividas)
+        sobras.append(sum(d.parcela_mensal for d in dividas) + rnd.uniform(-200, 8000))
+    return carteiras, np.array(sobras)
+
+
+@pytest.mark.parametrize('juros_antes_do_extra', [False, True])
+@pytest.mark.parametrize('estrategia', ['avalanche', 'snowball'])
+def test_lote_igual_a_simular_quitacao(estrategia, juros_antes_do_extra):
+    carteiras, sobras = _carteiras(7)
+    lote = simular_quitacao_lote(sobras, 0.0, CarteiraLote.from_dividas(carteiras), estrategia,
+                                 juros_antes_do_extra=juros_antes_do_extra, registrar_historico=True)
+    for i, dividas in enumerate(carteiras):
+        r = simular_quitacao(float(sobras[i]), CarteiraSimulada.de_dividas(dividas), estrategia, juros_antes_do_extra)
+        assert bool(lote['quitado'][i]) == r.quitado
+        # Inviáveis: o lote só testa a cada 12 meses, então os meses de parada podem diferir
+        assert bool(lote['inviavel'][i]) == (r.mes_inviavel is not None)
+        if r.quitado:
+            assert lote['meses'][i] == r.meses
+            assert lote['juros_totais'][i] == pytest.approx(r.juros_totais, rel=1e-9, abs=1e-6)
+            assert lote['historico'][i, :r.meses + 1] == pytest.approx(r.historico, rel=1e-9, abs=1e-6)
+
@@ -0,0 +1,16 @@
+import pytest
+
+from batch import CarteiraLote
+from cents import comparar_com_float
+from test_batch import _carteiras
+
+
+@pytest.mark.parametrize('juros_antes_do_extra', [False, True])
+@pytest.mark.parametrize('estrategia', ['avalanche', 'snowball'])
+def test_centavos_quitam_as_mesmas_carteiras(estrategia, juros_antes_do_extra):
+    carteiras, sobras = _carteiras(11, n=500)
+    comparacao = comparar_com_float(sobras, 0.0, CarteiraLote.from_dividas(carteiras), estrategia,
+                                    juros_antes_do_extra=juros_antes_do_extra)
+    assert comparacao['quitadas_nos_dois'] > 0
+    assert comparacao['quitacao_diferente'] == 0
+    assert comparacao['maior_diferenca_meses'] <= 1
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+import calculator
+from calculator import CarteiraSimulada, simular_quitacao
+from fastforward import simular_quitacao_rapida
+from models import Divida
+
+
+def _carteira(semente):
+    rnd = random.Random(semente)
+    dividas = [Divida(f'Dívida {j}', round(rnd.uniform(10, 50000), 2),
+                      rnd.choice([0.0, 0.005, 0.01, 0.02, 0.05, 0.08, 0.12, round(rnd.uniform(0, 0.15), 4)]),
+                      round(rnd.uniform(0, 800), 2), rnd.choice([None, rnd.randint(1, 60)]))
+               for j in range(rnd.randint(1, 12))]
+    return dividas, sum(d.parcela_mensal for d in dividas) + rnd.uniform(-200, 3000)
+
+
+def _mes_a_mes(monkeypatch, *args):
+    with monkeypatch.context() as m:
+        m.setattr(calculator, 'pode_saltar', lambda *_: False)
+        return simular_quitacao(*args)
+
+
+def _confere(rapido, laco):
+    assert (rapido.meses, rapido.quitado, rapido.mes_quitacao_garantida, rapido.mes_inviavel) \
+        == (laco.meses, laco.quitado, laco.mes_quitacao_garantida, laco.mes_inviavel)
+    assert rapido.juros_totais == pytest.approx(laco.juros_totais, rel=1e-7, abs=1e-6)
+    assert rapido.historico == pytest.approx(laco.historico, rel=1e-7, abs=1e-6)
+
+
+@pytest.mark.parametrize('juros_antes_do_extra', [False, True])
+@pytest.mark.parametrize('estrategia', ['avalanche', 'snowball'])
+def test_saltos_iguais_ao_laco_mes_a_mes(monkeypatch, estrategia, juros_antes_do_extra):
+    for semente in range(300):
+        dividas, saldo_mensal = _carteira(semente)
+        args = (saldo_mensal, CarteiraSimulada.de_dividas(dividas), estrategia, juros_antes_do_extra)
+        _confere(simular_quitacao(*args), _mes_a_mes(monkeypatch, saldo_mensal, CarteiraSimulada.de_dividas(dividas),
+                                                     estrategia, juros_antes_do_extra))
+
+
+@pytest.mark.parametrize('juros_antes_do_extra', [False, True])
+def test_financiamento_longo_com_valores_inteiros(monkeypatch, juros_antes_do_extra):
+    dividas = [Divida('Casa', 300000, 0.008, 2200), Divida('Cartão', 5000, 0.12, 250)]
+    args = (2900, CarteiraSimulada.de_dividas(dividas), 'avalanche', juros_antes_do_extra)
+    rapido = simular_quitacao(*args)
+    assert rapido.quitado and rapido.meses > 200
+    _confere(rapido, _mes_a_mes(monkeypatch, 2900, CarteiraSimulada.de_dividas(dividas), 'avalanche',
+                                juros_antes_do_extra))
+
+
+@pytest.mark.parametrize('juros_antes_do_extra', [False, True])
+def test_quitacao_rapida_por_dividas(monkeypatch, juros_antes_do_extra):
+    for semente in range(100):
+        dividas, saldo_mensal = _carteira(semente)
+        laco = _mes_a_mes(monkeypatch, saldo_mensal, CarteiraSimulada.de_dividas(dividas), 'snowball',
+                          juros_antes_do_extra, 600)
+        r = simular_quitacao_rapida(saldo_mensal, 0.0, dividas, 'snowball', 600, juros_antes_do_extra)
+        if laco.mes_inviavel is None:
+            assert (r['meses'], r['quitado']) == (laco.meses, laco.quitado)
+            assert r['juros_totais'] == pytest.approx(laco.juros_totais, rel=1e-7, abs=1e-6)
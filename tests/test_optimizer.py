@@ -0,0 +1,41 @@
+import random
+from itertools import permutations
+
+import pytest
+
+from models import Divida
+from optimizer import MAX_DIVIDAS_BUSCA_EXATA, PoliticaOrdem, otimizar_alocacao, simular_politica
+
+
+def _dividas(semente, n):
+    rnd = random.Random(semente)
+    dividas = [Divida(f'D{j}', round(rnd.uniform(500, 20000), 2), round(rnd.uniform(0.0, 0.05), 4),
+                      round(rnd.uniform(50, 500), 2)) for j in range(n)]
+    return dividas, sum(d.parcela_mensal for d in dividas) + rnd.uniform(300, 3000)
+
+
+@pytest.mark.parametrize('juros_antes_do_extra', [False, True])
+@pytest.mark.parametrize('objetivo', ['juros', 'meses'])
+def test_nenhuma_ordem_fixa_faz_melhor(objetivo, juros_antes_do_extra):
+    for semente in range(15):
+        dividas, sobra = _dividas(semente, 5)
+        r = otimizar_alocacao(sobra, 0, dividas, objetivo, juros_antes_do_extra=juros_antes_do_extra)
+        assert r['busca_completa']
+        custo = (r['juros_totais'], r['meses']) if objetivo == 'juros' else (r['meses'], r['juros_totais'])
+        for ordem in permutations(range(len(dividas))):
+            o = simular_politica(sobra, 0, dividas, PoliticaOrdem(ordem), juros_antes_do_extra=juros_antes_do_extra)
+            assert o['quitado'] == r['quitado']
+            outro = (o['juros_totais'], o['meses']) if objetivo == 'juros' else (o['meses'], o['juros_totais'])
+            assert custo[0] <= outro[0] + 1e-6
+
+
+def test_busca_cortada_nao_e_completa():
+    dividas, sobra = _dividas(3, 8)
+    assert not otimizar_alocacao(sobra, 0, dividas, max_nos=1)['busca_completa']
+
+
+def test_carteira_grande_sem_busca_exata():
+    dividas, sobra = _dividas(4, MAX_DIVIDAS_BUSCA_EXATA + 3)
+    r = otimizar_alocacao(sobra, 0, dividas)
+    assert not r['busca_completa'] and r['nos_avaliados'] == 0
+    assert r['juros_totais'] <= r['avalanche']['juros_totais']
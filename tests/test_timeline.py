@@ -0,0 +1,56 @@
+import random
+from dataclasses import replace
+
+import pytest
+
+from models import Divida
+from timeline import AJUSTE_DESPESAS, AJUSTE_RENDA, BONUS, NOVA_DIVIDA, Evento, LinhaDoTempo
+
+
+def _linha(eventos=()):
+    linha = LinhaDoTempo(5000, 1500, [Divida('Cartão', 28000, 0.03, 300), Divida('Loja', 3000, 0.1, 200)])
+    linha.eventos.extend(eventos)
+    return linha
+
+
+def _emprestimo(mes):
+    return Evento(mes, NOVA_DIVIDA, divida=Divida('Empréstimo', 2000, 0.03, 150))
+
+
+def _resumo(resultado):
+    return (resultado['meses'], round(resultado['juros_totais'], 6),
+            [round(h, 6) for h in resultado['historico']], resultado['registro'])
+
+
+def _confere(linha):
+    assert _resumo(linha.simular()) == _resumo(_linha(linha.eventos).simular())
+
+
+def test_remover_emprestimo_depois_da_quitacao():
+    linha = _linha()
+    linha.simular()
+    emprestimo = _emprestimo(21)
+    linha.adicionar_evento(emprestimo)
+    _confere(linha)
+    linha.remover_evento(emprestimo)
+    _confere(linha)
+
+
+@pytest.mark.parametrize('semente', range(50))
+def test_incremental_igual_a_rodar_do_zero(semente):
+    rnd = random.Random(semente)
+    linha = _linha()
+    linha.simular()
+    for _ in range(8):
+        operacao = rnd.random()
+        if operacao < 0.45 or not linha.eventos:
+            tipo = rnd.choice([AJUSTE_RENDA, AJUSTE_DESPESAS, BONUS, NOVA_DIVIDA])
+            mes = rnd.randint(1, 40)
+            linha.adicionar_evento(_emprestimo(mes) if tipo == NOVA_DIVIDA
+                                   else Evento(mes, tipo, rnd.uniform(-500, 2000)))
+        elif operacao < 0.75:
+            linha.remover_evento(rnd.choice(linha.eventos))
+        else:
+            antigo = rnd.choice(linha.eventos)
+            linha.editar_evento(antigo, replace(antigo, mes=rnd.randint(1, 40)))
+        _confere(linha)
@@ -0,0 +1,150 @@
+from copy import deepcopy
+from dataclasses import dataclass
+from typing import List, Dict, Optional
+
+from models import Divida
+from calculator import simular_mes
+
+# Tipos de evento aceitos na linha do tempo
+AJUSTE_RENDA = 'ajuste_renda'  # Aumento (ou corte) de renda a partir do mês
+AJUSTE_DESPESAS = 'ajuste_despesas'  # Mudança nas despesas fixas a partir do mês
+BONUS = 'bonus'  # Valor extra só naquele mês (13º, PLR, venda de algo)
+NOVA_DIVIDA = 'nova_divida'  # Empréstimo/compra parcelada que começa no mês
+
+
+@dataclass(frozen=True)
+class Evento:
+    mes: int  # Mês (a partir de 1) em que o evento passa a valer
+    tipo: str
+    valor: float = 0.0
+    divida: Optional[Divida] = None  # Só para NOVA_DIVIDA
+    descricao: str = ""
+
+
+class LinhaDoTempo:
+    """
+    Simulação com eventos datados. O estado é salvo num checkpoint a cada mês
+    com evento; ao editar um evento, a simulação recomeça do último checkpoint
+    anterior a ele, então mexer no fim da linha do tempo só recalcula a cauda.
+    Quando o prazo de um financiamento chega a zero, a última parcela encerra o
+    contrato e o saldo residual é zerado.
+    """
+
+    def __init__(self, renda: float, despesas: float, dividas: List[Divida],
+                 estrategia: str = 'avalanche', max_meses: int = 120):
+        self.renda = renda
+        self.despesas = despesas
+        self.dividas = deepcopy(dividas)
+        self.estrategia = estrategia
+        self.max_meses = max_meses
+        self.eventos: List[Evento] = []
+        self.meses_recalculados = 0  # Custo acumulado: meses efetivamente simulados
+
+        self._checkpoints: List[Dict] = []  # Estado antes dos eventos de cada mês, em ordem
+        self._historico: List[float] = []
+        self._registro: List[Dict] = []
+        self._resultado: Optional[Dict] = None
+
+    # ==================== EDIÇÃO ====================
+    def adicionar_evento(self, evento: Evento):
+        self.eventos.append(evento)
+        self._invalidar(evento.mes, evento.tipo == NOVA_DIVIDA)
+
+    def remover_evento(self, evento: Evento):
+        self.eventos.remove(evento)
+        self._invalidar(evento.mes, evento.tipo == NOVA_DIVIDA)
+
+    def editar_evento(self, antigo: Evento, novo: Evento):
+        self.eventos[self.eventos.index(antigo)] = novo
+        self._invalidar(min(antigo.mes, novo.mes), NOVA_DIVIDA in (antigo.tipo, novo.tipo))
+
+    def _invalidar(self, mes: int, nova_divida: bool = False):
+        """
+        Descarta os checkpoints que dependem de eventos a partir de `mes`. Mexer num
+        NOVA_DIVIDA muda também até quando a linha do tempo espera quitada pelo próximo
+        empréstimo, então caem ainda os checkpoints tirados depois da primeira quitação.
+        """
+        self._checkpoints = [c for c in self._checkpoints
+                             if c['mes'] <= mes and not (nova_divida and c['ja_quitou'])]
+        self._resultado = None
+
+    # ==================== SIMULAÇÃO ====================
+    def _estado_inicial(self) -> Dict:
+        return {'mes': 1, 'renda': self.renda, 'despesas': self.despesas,
+                'dividas': deepcopy(self.dividas), 'juros': 0.0,
+                'n_historico': 0, 'n_registro': 0, 'ja_quitou': False}
+
+    def simular(self) -> Dict:
+        """Resultado da linha do tempo, recalculando só a partir do último checkpoint válido."""
+        if self._resultado is not None:
+            return self._resultado
+
+        estado = deepcopy(self._checkpoints[-1]) if self._checkpoints else self._estado_inicial()
+        del self._historico[estado['n_historico']:]
+        del self._registro[estado['n_registro']:]
+        renda, despesas = estado['renda'], estado['despesas']
+        dividas, juros_totais = estado['dividas'], estado['juros']
+        meses = estado['mes'] - 1
+        ja_quitou = estado['ja_quitou']  # Já passou por saldo <= R$ 1 esperando um empréstimo novo
+        retomado_de = meses
+
+        por_mes: Dict[int, List[Evento]] = {}
+        for evento in self.eventos:
+            por_mes.setdefault(evento.mes, []).append(evento)
+        ultima_nova_divida = max((e.mes for e in self.eventos if e.tipo == NOVA_DIVIDA), default=0)
+
+        while meses < self.max_meses:
+            # Quitado só termina se não houver empréstimo novo mais adiante
+            if sum(d.saldo_devedor for d in dividas) <= 1:
+                if ultima_nova_divida <= meses:
+                    break
+                ja_quitou = True
+
+            mes = meses + 1
+            bonus = 0.0
+            if mes in por_mes:
+                if not self._checkpoints or self._checkpoints[-1]['mes'] < mes:
+                    self._checkpoints.append(deepcopy({
+                        'mes': mes, 'renda': renda, 'despesas': despesas, 'dividas': dividas,
+                        'juros': juros_totais, 'n_historico': len(self._historico),
+                        'n_registro': len(self._registro), 'ja_quitou': ja_quitou}))
+                for evento in por_mes[mes]:
+                    if evento.tipo == BONUS:
+                        bonus += evento.valor
+                    renda, despesas = self._aplicar(evento, renda, despesas, dividas)
+                    self._registro.append({'mes': mes, 'evento': evento.descricao or evento.tipo})
+
+            self._historico.append(sum(d.saldo_devedor for d in dividas))
+            prazos_antes = [d.prazo_restante_meses for d in dividas]
+            resultado = simular_mes(renda + bonus, despesas, dividas, self.estrategia)
+            juros_totais += resultado['juros_pagos_mes']
+            meses = mes
+            self.meses_recalculados += 1
+
+            # Fim do prazo: a última parcela encerra o contrato
+            for d, prazo in zip(dividas, prazos_antes):
+                if prazo and d.prazo_restante_meses == 0 and d.saldo_devedor > 0:
+                    d.saldo_devedor = 0.0
+                    self._registro.append({'mes': mes, 'evento': f"Contrato encerrado: {d.nome}"})
+
+        saldo_final = sum(d.saldo_devedor for d in dividas)
+        self._resultado = {
+            "meses": meses,
+            "juros_totais": juros_totais,
+            "quitado": saldo_final <= 1,
+            "historico": self._historico + [saldo_final],
+            "registro": list(self._registro),
+            "retomado_do_mes": retomado_de
+        }
+        return self._resultado
+
+    @staticmethod
+    def _aplicar(evento: Evento, renda: float, despesas: float, dividas: List[Divida]):
+        """Aplica um evento ao estado; devolve a nova (renda, despesas)."""
+        if evento.tipo == AJUSTE_RENDA:
+            renda += evento.valor
+        elif evento.tipo == AJUSTE_DESPESAS:
+            despesas += evento.valor
+        elif evento.tipo == NOVA_DIVIDA:
+            dividas.append(deepcopy(evento.divida))
+        return renda, despesas
@@ -1,34 +1,164 @@
-import matplotlib.pyplot as plt
-
-def plotar_evolucao_divida(historico_saldos):
-    """
-    Plota um gráfico simples da evolução do saldo devedor ao longo dos meses.
-    """
-    meses = range(len(historico_saldos))
-    
-    plt.figure(figsize=(10, 6))
-    plt.plot(meses, historico_saldos, marker='o', linestyle='-', color='b')
-    
-    plt.title('Evolução do Saldo Devedor Total')
-    plt.xlabel('Meses')
-    plt.ylabel('Saldo Devedor (R$)')
-    plt.grid(True)
-    
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+
+import numpy as np
+
+PONTOS_MAXIMOS = 600  # Acima disso a série é reduzida (LTTB) antes de desenhar
+LIMITE_MARCADORES = 60  # Marcadores por ponto só em séries curtas
+
+
+# ==================== REDUÇÃO DE PONTOS (LTTB) ====================
+def indices_lttb(y: Sequence[float], n_saida: int, x: Optional[Sequence[float]] = None) -> np.ndarray:
+    """
+    Índices escolhidos pelo Largest-Triangle-Three-Buckets: mantém o primeiro e o
+    último ponto e, em cada faixa, o ponto que forma o maior triângulo com o ponto
+    já escolhido e a média da faixa seguinte. Preserva picos e a forma da curva.
+    Devolve índices (e não valores) para aplicar a mesma amostra a várias séries.
+    """
+    n = len(y)
+    if n_saida >= n or n_saida < 3:
+        return np.arange(n)
+    y = np.asarray(y, dtype=float)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    limites = np.linspace(1, n - 1, n_saida - 1).astype(np.int64)  # n_saida - 2 faixas entre as pontas
+    indices = np.empty(n_saida, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for faixa in range(n_saida - 2):
+        inicio, fim = limites[faixa], limites[faixa + 1]
+        proximo_fim = limites[faixa + 2] if faixa + 2 < len(limites) else n
+        media_x = x[fim:proximo_fim].mean()
+        media_y = y[fim:proximo_fim].mean()
+        areas = np.abs((x[a] - media_x) * (y[inicio:fim] - y[a]) - (x[a] - x[inicio:fim]) * (media_y - y[a]))
+        a = inicio + int(np.argmax(areas))
+        indices[faixa + 1] = a
+    return indices
+
+
+def reduzir_serie(x: Sequence[float], y: Sequence[float], n_saida: int = PONTOS_MAXIMOS):
+    """(x, y) com no máximo `n_saida` pontos, via LTTB."""
+    indices = indices_lttb(y, n_saida, x)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
+
+
+# ==================== PLOTLY (app) ====================
+def figura_evolucao(meses: Sequence[float], saldos: Sequence[float], titulo: str = "📈 Sua Jornada para R$ 0,00",
+                    pontos_maximos: int = PONTOS_MAXIMOS):
+    """Curva da dívida total, reduzida por LTTB a no máximo `pontos_maximos` pontos."""
+    import plotly.graph_objects as go
+
+    x, y = reduzir_serie(meses, saldos, pontos_maximos)
+    fig = go.Figure(go.Scatter(
+        x=x, y=y,
+        mode='lines+markers' if len(x) <= LIMITE_MARCADORES else 'lines',
+        fill='tozeroy',
+        line=dict(width=3, color='#667eea')
+    ))
+    fig.update_layout(title=titulo, xaxis_title="Meses", yaxis_title="Dívida Total (R$)",
+                      template='plotly_white', height=400)
+    return fig
+
+
+def figura_por_divida(meses: Sequence[float], saldos: np.ndarray, nomes: Sequence[str],
+                      titulo: str = "📊 Saldo por Dívida", pontos_maximos: int = PONTOS_MAXIMOS,
+                      webgl: bool = True):
+    """
+    Áreas empilhadas do saldo de cada dívida (`saldos`: meses x dívidas). Acima de
+    `pontos_maximos` meses desenha em WebGL (Scattergl) com todos os pontos; sem WebGL
+    (ou abaixo do limite) usa SVG, com a amostra LTTB escolhida sobre o total e aplicada
+    a todas as camadas. As camadas são somadas aqui (fill='tonexty'), porque o
+    Scattergl não empilha sozinho.
+    """
+    import plotly.graph_objects as go
+
+    saldos = np.asarray(saldos, dtype=float)
+    usar_webgl = webgl and len(meses) > pontos_maximos
+    indices = np.arange(len(meses)) if usar_webgl else indices_lttb(saldos.sum(axis=1), pontos_maximos, meses)
+    x = np.asarray(meses)[indices]
+    acumulado = np.cumsum(saldos[indices], axis=1)
+    Trace = go.Scattergl if usar_webgl else go.Scatter
+    fig = go.Figure([
+        Trace(x=x, y=acumulado[:, j], name=nome, mode='lines', fill='tozeroy' if j == 0 else 'tonexty',
+              customdata=saldos[indices, j], hovertemplate=f"{nome}: R$ %{{customdata:,.2f}}<extra></extra>")
+        for j, nome in enumerate(nomes)
+    ])
+    fig.update_layout(title=titulo, xaxis_title="Meses", yaxis_title="Saldo (R$)",
+                      template='plotly_white', height=400, hovermode='x unified')
+    return fig
+
+
+# ==================== MATPLOTLIB (main / lote) ====================
+def _pyplot(headless: bool = True):
+    """Importa o pyplot só quando um gráfico é pedido; sem janela usa o backend Agg."""
+    import matplotlib
+    if headless:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _desenhar(ax, historico_saldos, pontos_maximos: int):
+    meses, saldos = reduzir_serie(np.arange(len(historico_saldos)), historico_saldos, pontos_maximos)
+    ax.plot(meses, saldos, marker='o' if len(meses) <= LIMITE_MARCADORES else None, linestyle='-', color='b')
+    ax.set_title('Evolução do Saldo Devedor Total')
+    ax.set_xlabel('Meses')
+    ax.set_ylabel('Saldo Devedor (R$)')
+    ax.grid(True)
+
     # Adicionar anotação no ponto final
-    if historico_saldos:
+    if len(historico_saldos):
         ultimo_mes = len(historico_saldos) - 1
         ultimo_valor = historico_saldos[-1]
-        plt.annotate(f'Quitado em {ultimo_mes} meses!', 
-                     xy=(ultimo_mes, ultimo_valor), 
-                     xytext=(ultimo_mes - 2, ultimo_valor + 5000),
-                     arrowprops=dict(facecolor='black', shrink=0.05))
-
-    # Salvar a imagem ao invés de mostrar (para garantir que funcione sem interface gráfica se necessário)
-    plt.savefig('evolucao_divida.png')
-    print("Gráfico 'evolucao_divida.png' gerado com sucesso!")
-    
-    # Tentar mostrar se possível
-    try:
+        ax.annotate(f'Quitado em {ultimo_mes} meses!',
+                    xy=(ultimo_mes, ultimo_valor),
+                    xytext=(ultimo_mes - 2, ultimo_valor + 5000),
+                    arrowprops=dict(facecolor='black', shrink=0.05))
+
+
+def plotar_evolucao_divida(historico_saldos, arquivo: str = 'evolucao_divida.png', mostrar: bool = False,
+                           pontos_maximos: int = PONTOS_MAXIMOS):
+    """
+    Plota a evolução do saldo devedor ao longo dos meses e salva em `arquivo`.
+    Sem janela por padrão (backend Agg); `mostrar=True` abre a janela do matplotlib.
+    """
+    plt = _pyplot(headless=not mostrar)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    _desenhar(ax, historico_saldos, pontos_maximos)
+    fig.savefig(arquivo)
+    print(f"Gráfico '{arquivo}' gerado com sucesso!")
+
+    if mostrar:
         plt.show()
-    except:
-        pass
+    plt.close(fig)
+
+
+def salvar_graficos(historicos: Sequence[Sequence[float]], arquivos: Sequence[str], processos: int = 1,
+                    pontos_maximos: int = PONTOS_MAXIMOS) -> int:
+    """
+    Salva um PNG por carteira. Uma figura só é reaproveitada entre os gráficos
+    (limpar os eixos custa bem menos que criar a figura). Com `processos > 1`,
+    divide os gráficos em partes iguais entre processos. Retorna quantos salvou.
+    """
+    if processos > 1 and len(arquivos) > 1:
+        partes = np.array_split(np.arange(len(arquivos)), min(processos, len(arquivos)))
+        with ProcessPoolExecutor(max_workers=len(partes)) as executor:
+            futuros = [executor.submit(salvar_graficos, [historicos[i] for i in parte],
+                                       [arquivos[i] for i in parte], 1, pontos_maximos)
+                       for parte in partes]
+            return sum(f.result() for f in futuros)
+
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    try:
+        for historico, arquivo in zip(historicos, arquivos):
+            ax.clear()
+            _desenhar(ax, historico, pontos_maximos)
+            pasta = os.path.dirname(arquivo)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            fig.savefig(arquivo)
+    finally:
+        plt.close(fig)
+    return len(arquivos)